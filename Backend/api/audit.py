@@ -0,0 +1,89 @@
+from flask import request
+from flask_restful import Resource
+from db_models.models import Chemical, Room
+from db_models.queries import chemicals_by_barcodes
+from api.scan_cache import scan_entry
+from api.serializers import CHEMICAL_IN_ROOM, CHEMICAL_SCAN
+
+# --- Batch room audit ---
+#
+# Checks a whole room's worth of scanned barcodes in one request instead of
+# one /scan/check_chemical call per bottle. The scanned barcodes are resolved
+# with set-based IN lookups (room, building and space joined in), and the
+# room's expected inventory is read with one more query to report what was
+# not scanned.
+
+MAX_AUDIT_BARCODES = 10000
+
+
+class AuditError(ValueError):
+    pass
+
+
+def audit_params(data):
+    """Validate the request body; returns (room_id, barcodes) with duplicates removed."""
+    if not isinstance(data, dict):
+        raise AuditError('Request body must be a JSON object')
+    room_id = data.get('room_id')
+    barcodes = data.get('barcodes')
+    if not isinstance(room_id, int) or isinstance(room_id, bool):
+        raise AuditError('room_id must be an integer')
+    if not isinstance(barcodes, list) or not all(isinstance(barcode, str) for barcode in barcodes):
+        raise AuditError('barcodes must be a list of strings')
+    if len(barcodes) > MAX_AUDIT_BARCODES:
+        raise AuditError(f'At most {MAX_AUDIT_BARCODES} barcodes per audit')
+    return room_id, list(dict.fromkeys(barcodes))
+
+
+def audit_room(room_id, barcodes):
+    """Sort scanned `barcodes` into matched / misplaced / unknown and list the room's unscanned chemicals."""
+    scanned = chemicals_by_barcodes(barcodes, CHEMICAL_SCAN.query())
+
+    matched, misplaced, unknown = [], [], []
+    for barcode in barcodes:
+        row = scanned.get(barcode)
+        if row is None:
+            unknown.append(barcode)
+            continue
+        entry = scan_entry(CHEMICAL_SCAN.serialize(row))
+        if entry['room_id'] == room_id:
+            matched.append(entry['chemical_info'])
+        else:
+            misplaced.append({
+                'barcode': barcode,
+                'alert': f"Please return this chemical to {entry['return_location']}",
+                'chemical_info': entry['chemical_info']
+            })
+
+    # Same fields as GET /chemicals/room/<room_id>
+    expected = CHEMICAL_IN_ROOM.query(Chemical.query.filter_by(room_id=room_id)).order_by(Chemical.id)
+    not_scanned = [CHEMICAL_IN_ROOM.serialize(row) for row in expected if row.barcode not in scanned]
+
+    return {
+        'room_id': room_id,
+        'matched': matched,
+        'misplaced': misplaced,
+        'unknown': unknown,
+        'not_scanned': not_scanned,
+        'counts': {
+            'scanned': len(barcodes),
+            'matched': len(matched),
+            'misplaced': len(misplaced),
+            'unknown': len(unknown),
+            'not_scanned': len(not_scanned)
+        }
+    }
+
+
+class RoomAuditResource(Resource):
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        try:
+            room_id, barcodes = audit_params(data)
+        except AuditError as e:
+            return {'success': False, 'message': str(e)}, 400
+
+        if Room.query.get(room_id) is None:
+            return {'success': False, 'message': 'Room not found'}, 404
+
+        return {'success': True, **audit_room(room_id, barcodes)}, 200
@@ -0,0 +1,204 @@
+import functools
+import logging
+import os
+import secrets
+import threading
+import time
+from flask import current_app, g, request
+from flask_restful import Resource
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from db_models.models import User, PI
+from db_models.queries import pi_room_tree
+
+# --- Token-based sessions ---
+#
+# /login and /pi-login still check the password with bcrypt, but now also hand
+# out a signed access token and a longer-lived refresh token. Later requests
+# send "Authorization: Bearer <token>"; verifying it is an HMAC check, and the
+# principal's PI/room tree is served from an in-process cache instead of being
+# rebuilt with bcrypt + queries on every app launch.
+
+logger = logging.getLogger(__name__)
+
+USER = 'user'
+PI_PRINCIPAL = 'pi'
+
+ACCESS_TOKEN_SALT = 'access-token'
+REFRESH_TOKEN_SALT = 'refresh-token'
+DEFAULT_ACCESS_TOKEN_MAX_AGE = 60 * 60             # 1 hour
+DEFAULT_REFRESH_TOKEN_MAX_AGE = 30 * 24 * 60 * 60  # 30 days
+
+
+class AuthError(Exception):
+    pass
+
+
+def secret_key_from_env(debug=False):
+    """
+    SECRET_KEY from the environment. Without one, a debug server gets a random
+    key for this process only (tokens stop working on restart); anything else
+    refuses to start rather than sign tokens with a guessable key.
+    """
+    key = os.environ.get('SECRET_KEY')
+    if key:
+        return key
+    if not debug:
+        raise RuntimeError('SECRET_KEY is not set; set it, or run with FLASK_DEBUG=1 for local development')
+    logger.warning('SECRET_KEY is not set; using a random key for this process')
+    return secrets.token_hex(32)
+
+
+def _serializer(salt):
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=salt)
+
+
+def issue_tokens(kind, principal_id):
+    """Return the token fields added to login / refresh responses."""
+    payload = {'kind': kind, 'id': principal_id}
+    return {
+        'token': _serializer(ACCESS_TOKEN_SALT).dumps(payload),
+        'refresh_token': _serializer(REFRESH_TOKEN_SALT).dumps(payload),
+        'expires_in': current_app.config.get('ACCESS_TOKEN_MAX_AGE', DEFAULT_ACCESS_TOKEN_MAX_AGE)
+    }
+
+
+def _load(token, salt, max_age):
+    try:
+        payload = _serializer(salt).loads(token, max_age=max_age)
+    except SignatureExpired:
+        raise AuthError('Token expired')
+    except BadSignature:
+        raise AuthError('Invalid token')
+    return payload['kind'], payload['id']
+
+
+def verify_access_token(token):
+    max_age = current_app.config.get('ACCESS_TOKEN_MAX_AGE', DEFAULT_ACCESS_TOKEN_MAX_AGE)
+    return _load(token, ACCESS_TOKEN_SALT, max_age)
+
+
+def verify_refresh_token(token):
+    max_age = current_app.config.get('REFRESH_TOKEN_MAX_AGE', DEFAULT_REFRESH_TOKEN_MAX_AGE)
+    return _load(token, REFRESH_TOKEN_SALT, max_age)
+
+
+def bearer_token():
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[len('Bearer '):].strip()
+    return None
+
+
+def current_principal():
+    """(kind, id) for a valid bearer token, None when no token was sent. Raises AuthError for bad tokens."""
+    token = bearer_token()
+    if token is None:
+        return None
+    return verify_access_token(token)
+
+
+def token_required(method):
+    """Resource method decorator: reject the request unless it carries a valid access token."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            principal = current_principal()
+        except AuthError as e:
+            return {'success': False, 'message': str(e)}, 401
+        if principal is None:
+            return {'success': False, 'message': 'Authorization token required'}, 401
+        g.principal = principal
+        return method(*args, **kwargs)
+    return wrapper
+
+
+# --- Per-process cache of each principal's PI/room tree ---
+
+class ScopeCache:
+    """
+    Caches the login payload (PI -> rooms -> building tree) per principal.
+    Entries expire after `ttl` seconds so other gunicorn workers pick up
+    changes even when the invalidation happened in a different process.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.entries.pop(key, None)
+                return None
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key=None):
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+
+scope_cache = ScopeCache()
+
+
+def build_scope(kind, principal_id):
+    """Build the session payload for a principal, or None if it no longer exists."""
+    if kind == USER:
+        user = User.query.get(principal_id)
+        if user is None:
+            return None
+        return {'user_name': user.name, 'pis': pi_room_tree(user.pis)}
+    pi = PI.query.get(principal_id)
+    if pi is None:
+        return None
+    tree = pi_room_tree([pi])[0]
+    return {'pi_id': pi.id, 'pi_name': pi.name, 'rooms': tree['rooms']}
+
+
+def session_scope(kind, principal_id):
+    """Cached session payload for a principal."""
+    key = (kind, principal_id)
+    scope = scope_cache.get(key)
+    if scope is None:
+        scope = build_scope(kind, principal_id)
+        if scope is not None:
+            scope_cache.set(key, scope)
+    return scope
+
+
+def remember_scope(kind, principal_id, scope):
+    scope_cache.set((kind, principal_id), scope)
+
+
+class SessionResource(Resource):
+    """Return the logged-in principal's PI/room tree without re-checking the password."""
+
+    @token_required
+    def get(self):
+        kind, principal_id = g.principal
+        scope = session_scope(kind, principal_id)
+        if scope is None:
+            return {'success': False, 'message': 'Account no longer exists'}, 401
+        return {'success': True, 'principal': kind, **scope}, 200
+
+
+class RefreshTokenResource(Resource):
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        try:
+            kind, principal_id = verify_refresh_token(data.get('refresh_token', ''))
+        except AuthError as e:
+            return {'success': False, 'message': str(e)}, 401
+
+        model = User if kind == USER else PI
+        if model.query.get(principal_id) is None:
+            return {'success': False, 'message': 'Account no longer exists'}, 401
+        return {'success': True, **issue_tokens(kind, principal_id)}, 200
@@ -0,0 +1,156 @@
+import csv
+import io
+import logging
+from flask import request
+from flask_restful import Resource
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from db_models.models import db, Chemical
+from db_models.versioning import bump_counters, next_version, room_counter
+from db_models.summary import apply_deltas, deltas_for_rows
+from db_models.jobs import enqueue, job_status
+from api.validation import chemical_values, DUPLICATE_BARCODE_MESSAGE, SERVER_ERROR_MESSAGE
+
+# --- Bulk chemical ingest ---
+#
+# Accepts a JSON array (or {"chemicals": [...]}) or a CSV upload with the same
+# field names as /add_chemical. Barcodes are checked against the database in
+# set-based lookups, valid rows are inserted with executemany in chunks (one
+# transaction per chunk), and every input row gets its own success/error entry.
+# A chunk that fails in the database is retried row by row (a savepoint per
+# row), so one bad row does not fail the other rows of its chunk.
+# With ?async=1 the rows are queued as an ingest-chemicals job (api.jobs) and
+# the response is the job to poll instead.
+
+logger = logging.getLogger(__name__)
+
+INSERT_CHUNK_SIZE = 500
+# Stay under SQLite's default limit on bound parameters per statement
+BARCODE_LOOKUP_CHUNK_SIZE = 900
+ADDED_MESSAGE = 'Chemical added successfully.'
+
+
+class BulkIngestError(ValueError):
+    pass
+
+
+def read_rows():
+    """Return the uploaded rows as a list of dicts."""
+    upload = request.files.get('file')
+    if upload is not None:
+        return list(csv.DictReader(io.StringIO(upload.read().decode('utf-8-sig'))))
+    if request.mimetype == 'text/csv':
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('chemicals')
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise BulkIngestError('Expected a JSON array of chemicals or a CSV upload')
+    return data
+
+
+def existing_barcodes(barcodes):
+    """Return the subset of `barcodes` already present in the chemical table."""
+    barcodes = list(barcodes)
+    found = set()
+    for start in range(0, len(barcodes), BARCODE_LOOKUP_CHUNK_SIZE):
+        chunk = barcodes[start:start + BARCODE_LOOKUP_CHUNK_SIZE]
+        found.update(
+            barcode for (barcode,) in
+            db.session.query(Chemical.barcode).filter(Chemical.barcode.in_(chunk))
+        )
+    return found
+
+
+def ingest_rows(rows, chunk_size=INSERT_CHUNK_SIZE, progress=None):
+    """
+    Validate and insert `rows`. Returns one result dict per input row, in order.
+    `progress(done, total)` is called after each committed chunk of valid rows.
+    """
+    results = [None] * len(rows)
+    valid = []  # (row index, column values)
+    for index, row in enumerate(rows):
+        values, error = chemical_values(row)
+        if error is not None:
+            results[index] = {'row': index, 'barcode': row.get('barcode'), 'success': False, 'message': error}
+        else:
+            valid.append((index, values))
+
+    # Only validated barcodes are looked up: they are known to be strings
+    taken = existing_barcodes({values['barcode'] for _, values in valid})
+    pending = []  # (row index, column values)
+    for index, values in valid:
+        if values['barcode'] in taken:
+            results[index] = {'row': index, 'barcode': values['barcode'], 'success': False,
+                              'message': DUPLICATE_BARCODE_MESSAGE}
+            continue
+        # Later rows reusing a barcode from this upload are duplicates too
+        taken.add(values['barcode'])
+        pending.append((index, values))
+
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        try:
+            insert_chunk([values for _, values in chunk])
+            db.session.commit()
+            for index, values in chunk:
+                results[index] = {'row': index, 'barcode': values['barcode'], 'success': True, 'message': ADDED_MESSAGE}
+        except Exception:
+            logger.warning("Bulk insert of %d chemicals failed; retrying row by row", len(chunk), exc_info=True)
+            db.session.rollback()
+            insert_row_by_row(chunk, results)
+        if progress is not None:
+            progress(start + len(chunk), len(pending))
+
+    return results
+
+
+def insert_chunk(rows):
+    """Insert validated rows without committing."""
+    # Core inserts skip the ORM flush hooks: stamp versions and update the summary here
+    version = next_version(db.session)
+    room_counters = {room_counter(values['room_id']) for values in rows}
+    bump_counters(db.session, {Chemical.__tablename__} | room_counters)
+    db.session.execute(insert(Chemical), [dict(values, version=version) for values in rows])
+    apply_deltas(db.session, deltas_for_rows(db.session, rows))
+
+
+def insert_row_by_row(chunk, results):
+    """
+    After a failed chunk, insert its rows one at a time, each in its own
+    savepoint, so only the rows that fail are rejected, each with its own error.
+    """
+    for index, values in chunk:
+        try:
+            with db.session.begin_nested():
+                insert_chunk([values])
+            success, message = True, ADDED_MESSAGE
+        except DBAPIError as e:
+            success, message = False, f'{SERVER_ERROR_MESSAGE} ({e.orig})'
+        except Exception as e:
+            logger.exception("Inserting chemical %s failed", values['barcode'])
+            success, message = False, f'{SERVER_ERROR_MESSAGE} ({e})'
+        results[index] = {'row': index, 'barcode': values['barcode'], 'success': success, 'message': message}
+    db.session.commit()
+
+
+class BulkChemicalIngestResource(Resource):
+    def post(self):
+        try:
+            rows = read_rows()
+        except (BulkIngestError, UnicodeDecodeError, csv.Error) as e:
+            return {'success': False, 'message': str(e)}, 400
+
+        if request.args.get('async', '0').lower() in ('1', 'true', 'yes'):
+            job = enqueue(db.session, 'ingest-chemicals', {'rows': rows})
+            return {'success': True, 'job': job_status(job)}, 202
+
+        results = ingest_rows(rows)
+        inserted = sum(1 for result in results if result['success'])
+        return {
+            'success': inserted == len(results),
+            'inserted': inserted,
+            'failed': len(results) - inserted,
+            'results': results
+        }, 200
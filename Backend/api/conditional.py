@@ -0,0 +1,50 @@
+import functools
+from flask import Response, request
+from db_models.models import db
+from db_models.versioning import counter_values
+
+# --- Conditional GET ---
+#
+# Read-heavy resources declare which change counters (db_models.versioning)
+# their payload depends on. The ETag is built from those counter values alone,
+# so a client sending a matching If-None-Match gets a 304 after one small
+# counter lookup, without the resource querying or serializing any rows.
+# ETags are weak because the same payload may be sent gzip / brotli encoded.
+
+
+def current_etag(names, values=None):
+    values = values(names) if values is not None else counter_values(db.session, names)
+    return '.'.join(f'{name}-{values[name]}' for name in names)
+
+
+def conditional(*counters, values=None):
+    """
+    Resource method decorator. Each counter is a name, or a callable taking the
+    view arguments and returning one (e.g. the counter of the requested room).
+    `values` optionally replaces the counter lookup, e.g. with an in-memory cache.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            names = [counter(**kwargs) if callable(counter) else counter for counter in counters]
+            etag = current_etag(names, values)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            result = method(*args, **kwargs)
+            etag_header = f'W/"{etag}"'
+            if isinstance(result, Response):
+                if result.status_code == 200:
+                    result.headers['ETag'] = etag_header
+                    result.headers['Cache-Control'] = 'no-cache'
+                return result
+            if not isinstance(result, tuple):
+                result = (result, 200)
+            data, status, headers = (result + ({},))[:3]
+            if status == 200:
+                headers = dict(headers, **{'ETag': etag_header, 'Cache-Control': 'no-cache'})
+            return data, status, headers
+        return wrapper
+    return decorator
@@ -0,0 +1,156 @@
+from datetime import datetime, time, timedelta
+from flask import request
+from flask_restful import Resource
+from sqlalchemy import delete, insert
+from db_models.models import db, Chemical, ExpirationDigest, PI, Room
+from db_models.reference import building_names
+from api.serializers import CHEMICAL_EXPIRING, dumps, loads
+
+# --- Expiring chemicals ---
+#
+# GET /chemicals/expiring?days=30[&include_expired=0][&pi_id=|room_id=]
+#   Live report: chemicals expiring within `days` (and, by default, those
+#   already expired), grouped by PI and room. One range query on the
+#   expiration_date index.
+#
+# GET /expiration/digest?pi_id=<id>
+#   The same report for one PI, precomputed by `flask expiration-digest`
+#   (run daily from cron / the platform scheduler) into expiration_digest.
+#   Served with a primary-key lookup, never touching the chemical table.
+#   Without pi_id, lists every PI's digest counts.
+
+DEFAULT_WINDOW_DAYS = 30
+MAX_WINDOW_DAYS = 3650
+
+
+class ExpirationError(ValueError):
+    pass
+
+
+def expiring_params(args):
+    try:
+        days = int(args.get('days', DEFAULT_WINDOW_DAYS))
+    except ValueError:
+        raise ExpirationError('days must be an integer')
+    if not 0 <= days <= MAX_WINDOW_DAYS:
+        raise ExpirationError(f'days must be between 0 and {MAX_WINDOW_DAYS}')
+    include_expired = args.get('include_expired', '1').lower() not in ('0', 'false', 'no')
+    return days, include_expired, args.get('pi_id', type=int), args.get('room_id', type=int)
+
+
+def expiration_window(days, today=None):
+    """(start of today, end of the last day of the window), as naive UTC datetimes."""
+    start = datetime.combine(today or datetime.utcnow().date(), time.min)
+    return start, start + timedelta(days=days + 1)
+
+
+def expiring_rows(days, include_expired=True, pi_id=None, room_id=None, today=None):
+    """Rows of CHEMICAL_EXPIRING ordered by PI, room and expiration date, and the window start."""
+    start, end = expiration_window(days, today)
+    query = CHEMICAL_EXPIRING.query().filter(Chemical.expiration_date < end)
+    if not include_expired:
+        query = query.filter(Chemical.expiration_date >= start)
+    if pi_id is not None:
+        query = query.filter(Room.pi_id == pi_id)
+    if room_id is not None:
+        query = query.filter(Chemical.room_id == room_id)
+    return query.order_by(Room.pi_id, Chemical.room_id, Chemical.expiration_date, Chemical.id), start
+
+
+def empty_report(pi_id):
+    return {'pi_id': pi_id, 'expired_count': 0, 'expiring_count': 0, 'rooms': []}
+
+
+def group_by_pi(rows, start):
+    """{pi_id: report} with rooms and their chemicals, from rows ordered by PI and room."""
+    reports = {}
+    for row in rows:
+        chemical = CHEMICAL_EXPIRING.serialize(row)
+        pi_id, room_id = chemical.pop('pi_id'), chemical.pop('room_id')
+        room_number, building_id = chemical.pop('room_number'), chemical.pop('building_id')
+        chemical['expired'] = row.expiration_date < start
+
+        report = reports.get(pi_id)
+        if report is None:
+            report = reports[pi_id] = empty_report(pi_id)
+        rooms = report['rooms']
+        if not rooms or rooms[-1]['room_id'] != room_id:
+            rooms.append({
+                'room_id': room_id,
+                'room_number': room_number,
+                'building_id': building_id,
+                'building_name': building_names.name(building_id),
+                'chemicals': []
+            })
+        rooms[-1]['chemicals'].append(chemical)
+        report['expired_count' if chemical['expired'] else 'expiring_count'] += 1
+    return reports
+
+
+def refresh_expiration_digests(session, days=DEFAULT_WINDOW_DAYS):
+    """Rebuild every PI's digest in one transaction; returns the number of digests written."""
+    rows, start = expiring_rows(days)
+    reports = group_by_pi(rows, start)
+    generated_at = datetime.utcnow()
+
+    digests = []
+    for pi_id, pi_name in session.query(PI.id, PI.name).order_by(PI.id):
+        report = reports.get(pi_id) or empty_report(pi_id)
+        report.update(pi_name=pi_name, window_days=days, as_of=start.strftime('%Y-%m-%d'))
+        digests.append({
+            'pi_id': pi_id,
+            'generated_at': generated_at,
+            'window_days': days,
+            'expired_count': report['expired_count'],
+            'expiring_count': report['expiring_count'],
+            'payload': dumps(report).decode('utf-8'),
+        })
+
+    session.execute(delete(ExpirationDigest))
+    if digests:
+        session.execute(insert(ExpirationDigest), digests)
+    session.commit()
+    return len(digests)
+
+
+class ExpiringChemicalsResource(Resource):
+    def get(self):
+        try:
+            days, include_expired, pi_id, room_id = expiring_params(request.args)
+        except ExpirationError as e:
+            return {'success': False, 'message': str(e)}, 400
+
+        rows, start = expiring_rows(days, include_expired, pi_id, room_id)
+        reports = group_by_pi(rows, start)
+        names = dict(db.session.query(PI.id, PI.name).filter(PI.id.in_(reports))) if reports else {}
+        for report in reports.values():
+            report['pi_name'] = names.get(report['pi_id'])
+        return {
+            'success': True,
+            'days': days,
+            'as_of': start.strftime('%Y-%m-%d'),
+            'pis': list(reports.values())
+        }, 200
+
+
+class ExpirationDigestResource(Resource):
+    def get(self):
+        pi_id = request.args.get('pi_id', type=int)
+        if pi_id is None:
+            digests = db.session.query(
+                ExpirationDigest.pi_id, PI.name, ExpirationDigest.generated_at, ExpirationDigest.window_days,
+                ExpirationDigest.expired_count, ExpirationDigest.expiring_count
+            ).join(PI, PI.id == ExpirationDigest.pi_id).order_by(ExpirationDigest.pi_id)
+            return {'success': True, 'digests': [{
+                'pi_id': digest_pi_id,
+                'pi_name': pi_name,
+                'generated_at': generated_at.isoformat(),
+                'window_days': window_days,
+                'expired_count': expired_count,
+                'expiring_count': expiring_count
+            } for digest_pi_id, pi_name, generated_at, window_days, expired_count, expiring_count in digests]}, 200
+
+        digest = db.session.get(ExpirationDigest, pi_id)
+        if digest is None:
+            return {'success': False, 'message': 'No expiration digest for this PI yet.'}, 404
+        return dict(loads(digest.payload), success=True, generated_at=digest.generated_at.isoformat()), 200
@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+from flask import Response, request, stream_with_context
+from flask_restful import Resource
+from sqlalchemy import select
+from db_models.models import db, Chemical, Room, Building, Space, PI
+
+# --- Streaming inventory export (NDJSON / CSV, optionally gzipped) ---
+#
+# Rows are read through a server-side cursor (yield_per) and written out as
+# they arrive, so memory stays flat regardless of inventory size.
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    ('id', Chemical.id),
+    ('name', Chemical.name),
+    ('cas_number', Chemical.cas_number),
+    ('barcode', Chemical.barcode),
+    ('amount', Chemical.amount),
+    ('unit', Chemical.unit),
+    ('total_weight_lbs', Chemical.total_weight_lbs),
+    ('expiration_date', Chemical.expiration_date),
+    ('date_added', Chemical.date_added),
+    ('room_id', Chemical.room_id),
+    ('room_number', Room.room_number),
+    ('building_id', Room.building_id),
+    ('building_name', Building.name),
+    ('pi_id', Room.pi_id),
+    ('pi_name', PI.name),
+    ('space_id', Chemical.space_id),
+    ('space', Space.description),
+    ('space_type', Space.space_type),
+]
+FIELD_NAMES = [name for name, _ in EXPORT_COLUMNS]
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _parse_date(field):
+    value = request.args.get(field)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ExportError(f'Invalid {field} format. Use YYYY-MM-DD.')
+
+
+def _parse_int(field):
+    value = request.args.get(field)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ExportError(f'{field} must be an integer')
+
+
+def export_statement():
+    """Build the export SELECT from the request's filter arguments."""
+    stmt = (
+        select(*[column for _, column in EXPORT_COLUMNS])
+        .join(Room, Chemical.room_id == Room.id)
+        .join(Building, Room.building_id == Building.id)
+        .join(PI, Room.pi_id == PI.id)
+        .outerjoin(Space, Chemical.space_id == Space.id)
+    )
+
+    building_id = _parse_int('building_id')
+    pi_id = _parse_int('pi_id')
+    room_id = _parse_int('room_id')
+    expires_after = _parse_date('expires_after')
+    expires_before = _parse_date('expires_before')
+    expiring_within_days = _parse_int('expiring_within_days')
+
+    if building_id is not None:
+        stmt = stmt.where(Room.building_id == building_id)
+    if pi_id is not None:
+        stmt = stmt.where(Room.pi_id == pi_id)
+    if room_id is not None:
+        stmt = stmt.where(Chemical.room_id == room_id)
+    if expiring_within_days is not None:
+        # Combined with expires_before, the earlier cutoff wins
+        expires_after = expires_after or datetime.utcnow()
+        cutoff = datetime.utcnow() + timedelta(days=expiring_within_days)
+        expires_before = min(expires_before, cutoff) if expires_before is not None else cutoff
+    if expires_after is not None:
+        stmt = stmt.where(Chemical.expiration_date >= expires_after)
+    if expires_before is not None:
+        stmt = stmt.where(Chemical.expiration_date < expires_before)
+
+    return stmt.order_by(Chemical.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+def ndjson_chunks(result):
+    for rows in result.partitions():
+        yield ''.join(
+            json.dumps(dict(zip(FIELD_NAMES, map(_format_value, row)))) + '\n'
+            for row in rows
+        )
+
+
+def csv_chunks(result):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELD_NAMES)
+    yield buffer.getvalue()
+    for rows in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([map(_format_value, row) for row in rows])
+        yield buffer.getvalue()
+
+
+def gzip_chunks(chunks):
+    # wbits=31 writes a gzip container; sync-flush per batch so clients start
+    # receiving data before the whole export is compressed.
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        yield compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+class ChemicalExportResource(Resource):
+    def get(self):
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in ('ndjson', 'csv'):
+            return {'error': 'format must be ndjson or csv'}, 400
+        compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+        try:
+            stmt = export_statement()
+        except ExportError as e:
+            return {'error': str(e)}, 400
+
+        def generate():
+            result = db.session.execute(stmt)
+            chunks = ndjson_chunks(result) if export_format == 'ndjson' else csv_chunks(result)
+            yield from gzip_chunks(chunks) if compress else chunks
+
+        filename = f"chemicals.{export_format}" + ('.gz' if compress else '')
+        mimetype = 'application/gzip' if compress else (
+            'application/x-ndjson' if export_format == 'ndjson' else 'text/csv'
+        )
+        return Response(
+            stream_with_context(generate()),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
@@ -0,0 +1,93 @@
+from flask import request
+from flask_restful import Resource
+from sqlalchemy import func, select
+from db_models.models import db, InventorySummary, PI, Room
+from db_models.reference import building_names
+import db_models.summary  # noqa: F401  registers the flush hook that keeps inventory_summary current
+
+# --- Inventory aggregates ---
+#
+# GET /inventory/summary?group_by=building,space_type&space_type=Flammable
+#
+# Chemical count and total weight (lbs) grouped by any of room, pi, building
+# and space_type, optionally filtered by room_id, pi_id, building_id and
+# space_type. Reads the inventory_summary table (one row per room and space
+# type), so the cost grows with the number of groups, not chemicals.
+
+GROUPINGS = {
+    'room': [('room_id', Room.id), ('room_number', Room.room_number)],
+    'pi': [('pi_id', Room.pi_id), ('pi_name', PI.name)],
+    'building': [('building_id', Room.building_id)],
+    'space_type': [('space_type', InventorySummary.space_type)],
+}
+
+FILTERS = {
+    'room_id': (Room.id, int),
+    'pi_id': (Room.pi_id, int),
+    'building_id': (Room.building_id, int),
+    'space_type': (InventorySummary.space_type, str),
+}
+
+
+class SummaryError(ValueError):
+    pass
+
+
+def summary_params(args):
+    group_by = [name.strip() for name in args.get('group_by', 'building').split(',') if name.strip()]
+    unknown = [name for name in group_by if name not in GROUPINGS]
+    if not group_by or unknown:
+        raise SummaryError(f"group_by must be a comma-separated list of: {', '.join(GROUPINGS)}")
+
+    filters = {}
+    for name, (_, cast) in FILTERS.items():
+        value = args.get(name)
+        if value in (None, ''):
+            continue
+        try:
+            filters[name] = cast(value)
+        except ValueError:
+            raise SummaryError(f'{name} must be an integer')
+    return group_by, filters
+
+
+def inventory_summary(group_by, filters):
+    """Aggregated rows for the requested grouping, plus overall totals."""
+    columns = [column.label(key) for name in group_by for key, column in GROUPINGS[name]]
+    chemical_count = func.sum(InventorySummary.chemical_count)
+    total_weight = func.sum(InventorySummary.total_weight_lbs)
+
+    stmt = (
+        select(*columns, chemical_count.label('chemical_count'), total_weight.label('total_weight_lbs'))
+        .select_from(InventorySummary)
+        .join(Room, Room.id == InventorySummary.room_id)
+    )
+    if 'pi' in group_by:
+        stmt = stmt.join(PI, PI.id == Room.pi_id)
+    for name, value in filters.items():
+        stmt = stmt.where(FILTERS[name][0] == value)
+    stmt = stmt.group_by(*columns).having(chemical_count > 0).order_by(*columns)
+
+    groups = []
+    totals = {'chemical_count': 0, 'total_weight_lbs': 0.0}
+    for row in db.session.execute(stmt):
+        group = dict(row._mapping)
+        if 'building' in group_by:
+            group['building_name'] = building_names.name(group['building_id'])
+        group['total_weight_lbs'] = round(group['total_weight_lbs'] or 0.0, 3)
+        totals['chemical_count'] += group['chemical_count']
+        totals['total_weight_lbs'] += group['total_weight_lbs']
+        groups.append(group)
+    totals['total_weight_lbs'] = round(totals['total_weight_lbs'], 3)
+    return groups, totals
+
+
+class InventorySummaryResource(Resource):
+    def get(self):
+        try:
+            group_by, filters = summary_params(request.args)
+        except SummaryError as e:
+            return {'success': False, 'message': str(e)}, 400
+
+        groups, totals = inventory_summary(group_by, filters)
+        return {'success': True, 'group_by': group_by, 'groups': groups, 'totals': totals}, 200
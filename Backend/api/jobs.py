@@ -0,0 +1,228 @@
+import logging
+import os
+import signal
+import socket
+import time
+from flask import request
+from flask_restful import Resource
+from sqlalchemy import select
+from db_models.models import db, Chemical, Job
+from db_models.jobs import (
+    CANCELLED, FAILED, STATUSES, SUCCEEDED, JobCancelled,
+    claim_next, enqueue, finish, job_status, report_progress, request_cancel, requeue_stale
+)
+from db_models.units import BACKFILL_CHUNK_SIZE, backfill_total_weights
+from api.bulk_ingest import ingest_rows
+from api.expiration import DEFAULT_WINDOW_DAYS, MAX_WINDOW_DAYS, refresh_expiration_digests
+
+# --- Background jobs ---
+#
+# POST /jobs {"kind": ..., "params": {...}}   submit (202 with the job)
+# GET  /jobs[?status=running]                 recent jobs
+# GET  /jobs/<id>                             status, progress and result
+# POST /jobs/<id>/cancel                      cancel (at the next chunk boundary if running)
+#
+# Each kind has a handler (run in a worker process) and a validator (run at
+# submit time, so bad parameters are a 400 rather than a failed job). Work a
+# cancelled or failed job already committed, chunk by chunk, is kept.
+
+logger = logging.getLogger(__name__)
+
+DELETE_CHUNK_SIZE = 500
+MAX_DELETE_IDS = 100000
+DEFAULT_JOB_LIST_SIZE = 50
+MAX_JOB_LIST_SIZE = 1000
+WORKER_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', 2))
+# Running jobs without a progress report for this long are handed to another worker
+JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 15 * 60))
+
+
+class JobError(ValueError):
+    pass
+
+
+JOB_HANDLERS = {}
+
+
+def job_handler(kind, validate):
+    """Register `handler(job_id, **params)` for `kind`; `validate(params)` returns the cleaned params."""
+    def decorator(handler):
+        JOB_HANDLERS[kind] = (handler, validate)
+        return handler
+    return decorator
+
+
+def _optional_int(params, name, default, low, high):
+    value = params.get(name, default)
+    if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+        raise JobError(f'{name} must be an integer between {low} and {high}')
+    return value
+
+
+def _ingest_params(params):
+    rows = params.get('rows')
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise JobError('rows must be a list of chemicals')
+    return {'rows': rows}
+
+
+@job_handler('ingest-chemicals', _ingest_params)
+def ingest_chemicals_job(job_id, rows):
+    """Bulk ingest (e.g. a new room's inventory) in the background."""
+    results = ingest_rows(rows, progress=lambda done, total: report_progress(job_id, done, total))
+    errors = [result for result in results if not result['success']]
+    return {'inserted': len(results) - len(errors), 'failed': len(errors), 'errors': errors}
+
+
+def _delete_params(params):
+    room_id, ids = params.get('room_id'), params.get('ids')
+    if (room_id is None) == (ids is None):
+        raise JobError('Exactly one of room_id or ids is required')
+    if room_id is not None:
+        if not isinstance(room_id, int) or isinstance(room_id, bool):
+            raise JobError('room_id must be an integer')
+        return {'room_id': room_id}
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise JobError('ids must be a list of integers')
+    if len(ids) > MAX_DELETE_IDS:
+        raise JobError(f'At most {MAX_DELETE_IDS} ids per job')
+    return {'ids': ids}
+
+
+@job_handler('delete-chemicals', _delete_params)
+def delete_chemicals_job(job_id, room_id=None, ids=None):
+    """Delete a room's chemicals (or the given ids) in chunks."""
+    query = select(Chemical.id).order_by(Chemical.id)
+    query = query.where(Chemical.room_id == room_id) if room_id is not None else query.where(Chemical.id.in_(ids))
+    chemical_ids = db.session.execute(query).scalars().all()
+
+    deleted = 0
+    for start in range(0, len(chemical_ids), DELETE_CHUNK_SIZE):
+        chunk = chemical_ids[start:start + DELETE_CHUNK_SIZE]
+        # ORM deletes, so the flush hooks write tombstones, update the summary
+        # and bump the scan-cache counter the web processes' caches watch
+        chemicals = Chemical.query.filter(Chemical.id.in_(chunk)).all()
+        for chemical in chemicals:
+            db.session.delete(chemical)
+        db.session.commit()
+        deleted += len(chemicals)
+        report_progress(job_id, start + len(chunk), len(chemical_ids))
+    return {'deleted': deleted}
+
+
+def _backfill_params(params):
+    return {'chunk_size': _optional_int(params, 'chunk_size', BACKFILL_CHUNK_SIZE, 1, 100000)}
+
+
+@job_handler('backfill-weights', _backfill_params)
+def backfill_weights_job(job_id, chunk_size):
+    return backfill_total_weights(
+        db.session, chunk_size, progress=lambda done, total: report_progress(job_id, done, total))
+
+
+def _digest_params(params):
+    return {'days': _optional_int(params, 'days', DEFAULT_WINDOW_DAYS, 0, MAX_WINDOW_DAYS)}
+
+
+@job_handler('expiration-digest', _digest_params)
+def expiration_digest_job(job_id, days):
+    return {'digests': refresh_expiration_digests(db.session, days)}
+
+
+def submit_job(kind, params):
+    """Validate and enqueue; raises JobError for unknown kinds or bad parameters."""
+    if kind not in JOB_HANDLERS:
+        raise JobError(f"kind must be one of: {', '.join(sorted(JOB_HANDLERS))}")
+    if not isinstance(params, dict):
+        raise JobError('params must be an object')
+    _, validate = JOB_HANDLERS[kind]
+    return enqueue(db.session, kind, validate(params))
+
+
+def run_job(job_id, kind, params):
+    handler, _ = JOB_HANDLERS.get(kind, (None, None))
+    logger.info("Running job %s (%s)", job_id, kind)
+    try:
+        if handler is None:
+            raise JobError(f'Unknown job kind {kind!r}')
+        result = handler(job_id, **params)
+    except JobCancelled:
+        db.session.rollback()
+        finish(job_id, CANCELLED)
+        logger.info("Job %s cancelled", job_id)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Job %s failed", job_id)
+        finish(job_id, FAILED, error=str(e))
+    else:
+        finish(job_id, SUCCEEDED, result)
+        logger.info("Job %s finished", job_id)
+    finally:
+        db.session.remove()
+
+
+def run_worker(poll_seconds=WORKER_POLL_SECONDS, once=False):
+    """Run queued jobs until SIGTERM / SIGINT (or, with `once`, until the queue is empty)."""
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    stopping = []
+
+    def stop(signum, frame):
+        logger.info("Worker %s stopping after the current job", worker)
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info("Worker %s started", worker)
+    while not stopping:
+        requeued = requeue_stale(JOB_STALE_SECONDS)
+        if requeued:
+            logger.warning("Requeued %d stale jobs", requeued)
+        claimed = claim_next(worker)
+        if claimed is None:
+            if once:
+                break
+            time.sleep(poll_seconds)
+            continue
+        run_job(*claimed)
+
+
+class JobListResource(Resource):
+    def get(self):
+        status = request.args.get('status')
+        if status is not None and status not in STATUSES:
+            return {'success': False, 'message': f"status must be one of: {', '.join(STATUSES)}"}, 400
+        limit = request.args.get('limit', DEFAULT_JOB_LIST_SIZE, type=int)
+        if limit < 1:
+            return {'success': False, 'message': 'limit must be a positive integer'}, 400
+        limit = min(limit, MAX_JOB_LIST_SIZE)
+
+        query = Job.query
+        if status is not None:
+            query = query.filter(Job.status == status)
+        jobs = query.order_by(Job.id.desc()).limit(limit).all()
+        return {'success': True, 'jobs': [job_status(job) for job in jobs]}, 200
+
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        try:
+            job = submit_job(data.get('kind'), data.get('params', {}))
+        except JobError as e:
+            return {'success': False, 'message': str(e)}, 400
+        return {'success': True, 'job': job_status(job)}, 202
+
+
+class JobResource(Resource):
+    def get(self, job_id):
+        job = db.session.get(Job, job_id)
+        if job is None:
+            return {'success': False, 'message': 'Job not found'}, 404
+        return {'success': True, 'job': job_status(job)}, 200
+
+
+class JobCancelResource(Resource):
+    def post(self, job_id):
+        job = request_cancel(db.session, job_id)
+        if job is None:
+            return {'success': False, 'message': 'Job not found'}, 404
+        return {'success': True, 'job': job_status(job)}, 200
@@ -0,0 +1,64 @@
+from flask import Response, current_app, request, stream_with_context
+from api.serializers import dumps
+
+# --- Keyset (id-based) cursor pagination ---
+#
+# Clients pass `limit` and the `next_cursor` of the previous page as `cursor`.
+# Pages are read with `WHERE id > cursor ORDER BY id LIMIT n`, so every page
+# costs the same regardless of how deep into the table it is.
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def page_params():
+    """Read `limit` and `cursor` from the query string."""
+    default_size = current_app.config.get('CHEMICALS_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    max_size = current_app.config.get('CHEMICALS_MAX_PAGE_SIZE', MAX_PAGE_SIZE)
+
+    try:
+        limit = int(request.args.get('limit', default_size))
+        cursor = int(request.args.get('cursor', 0))
+    except ValueError:
+        raise PaginationError('limit and cursor must be integers')
+    if limit < 1 or cursor < 0:
+        raise PaginationError('limit must be positive and cursor non-negative')
+
+    return min(limit, max_size), cursor
+
+
+def paginate(query, key, limit, cursor):
+    """
+    Return (rows, next_cursor) for one page of `query` ordered by `key`.
+    next_cursor is None on the last page.
+    """
+    rows = query.filter(key > cursor).order_by(key).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, getattr(rows[-1], key.key)
+    return rows, None
+
+
+def stream_requested():
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def stream_json_array(query, key, serialize):
+    """
+    Stream every row of `query` as one JSON array, reading it in batches so the
+    full result is never materialized in memory.
+    """
+    def generate():
+        yield b'['
+        first = True
+        for row in query.order_by(key).yield_per(STREAM_BATCH_SIZE):
+            yield (b'' if first else b',') + dumps(serialize(row))
+            first = False
+        yield b']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
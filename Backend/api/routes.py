@@ -8,12 +8,43 @@ from flask_restful import Resource, reqparse
 from werkzeug.security import check_password_hash
 from db_models.models import db, User, PI, Room, Building
 from sqlalchemy import or_
+import logging
+from db_models.search import search_chemicals
+from db_models.versioning import room_counter
+from db_models.reference import building_names
+from db_models.units import is_known_unit
+from api.auth import (
+    USER, PI_PRINCIPAL, AuthError, SessionResource, RefreshTokenResource,
+    current_principal, issue_tokens, remember_scope
+)
+from api.search_scope import ScopeError, resolve_room_ids, invalidate_principal_caches
+from api.scan_cache import barcode_cache
+from api.bulk_ingest import BulkChemicalIngestResource
+from api.export import ChemicalExportResource
+from api.audit import RoomAuditResource
+from api.sync import SyncResource
+from api.inventory import InventorySummaryResource
+from api.expiration import ExpiringChemicalsResource, ExpirationDigestResource
+from api.jobs import JobListResource, JobResource, JobCancelResource
+from api.conditional import conditional
+from api.serializers import CHEMICAL_LIST, CHEMICAL_SEARCH, CHEMICAL_IN_ROOM, output_json
+from api.validation import (
+    MISSING_FIELDS_MESSAGE, DUPLICATE_BARCODE_MESSAGE, INVALID_BARCODE_MESSAGE, INVALID_DATE_MESSAGE, INVALID_NUMBER_MESSAGE,
+    INVALID_UNIT_MESSAGE, SERVER_ERROR_MESSAGE, missing_required_fields, parse_barcode, parse_expiration_date,
+    total_weight_lbs as compute_total_weight_lbs
+)
+from api.pagination import PaginationError, page_params, paginate, stream_requested, stream_json_array
+from db_models.queries import (
+    rooms_for_pis, room_with_details,
+    pis_with_rooms, user_with_pi_rooms, users_with_pis, building_name, room_summary, pi_room_tree
+)
+
+logger = logging.getLogger(__name__)
 
 class AddChemicalResource(Resource):
     def post(self):
-        print("DEBUG: AddChemicalResource endpoint called.")
         data = request.get_json()
-        print("DEBUG: Received data:", data)
+        logger.debug("Received data: %s", data)
 
         # Extract fields
         barcode = data.get('barcode')
@@ -26,42 +57,52 @@ class AddChemicalResource(Resource):
         expiration_date = data.get('expiration_date')
 
         # Validation
-        if not barcode or not name or not cas_number or not room_id or not amount or not unit:
-            response = {'success': False, 'message': 'Missing required fields'}
-            print("DEBUG: Response before return:", response)
+        if missing_required_fields(data):
+            response = {'success': False, 'message': MISSING_FIELDS_MESSAGE}
+            logger.debug("Response before return: %s", response)
+            return response, 400
+        try:
+            barcode = parse_barcode(barcode)
+        except ValueError:
+            response = {'success': False, 'message': INVALID_BARCODE_MESSAGE}
+            logger.debug("Response before return: %s", response)
             return response, 400
 
         # Check for existing barcode
-        print(f"DEBUG: Checking for existing chemical with barcode {barcode}")
+        logger.debug("Checking for existing chemical with barcode %s", barcode)
         existing_chemical = Chemical.query.filter_by(barcode=barcode).first()
         if existing_chemical:
-            print(f"DEBUG: Barcode {barcode} is already in use by chemical ID {existing_chemical.id}.")
-            response = {'success': False, 'message': 'This barcode is already in use.'}
-            print("DEBUG: Response before return:", response)
+            logger.info("Barcode %s is already in use by chemical ID %s", barcode, existing_chemical.id)
+            response = {'success': False, 'message': DUPLICATE_BARCODE_MESSAGE}
+            logger.debug("Response before return: %s", response)
             return response, 400
         else:
-            print(f"DEBUG: No existing chemical found for barcode {barcode}")
+            logger.debug("No existing chemical found for barcode %s", barcode)
 
         # Parse expiration date
-        expiration_date_parsed = None
-        if expiration_date:
-            try:
-                expiration_date_parsed = datetime.strptime(expiration_date, "%Y-%m-%d")
-                print(f"DEBUG: Parsed expiration date: {expiration_date_parsed}")
-            except ValueError:
-                response = {'success': False, 'message': 'Invalid expiration date format. Use YYYY-MM-DD.'}
-                print("DEBUG: Response before return:", response)
-                return response, 400
-        else:
-            print("DEBUG: No expiration date provided.")
+        try:
+            expiration_date_parsed = parse_expiration_date(expiration_date)
+            logger.debug("Parsed expiration date: %s", expiration_date_parsed)
+        except ValueError:
+            response = {'success': False, 'message': INVALID_DATE_MESSAGE}
+            logger.debug("Response before return: %s", response)
+            return response, 400
 
         # Calculate total weight in pounds
-        total_weight_lbs = amount if unit.lower() in ['lb', 'lbs'] else amount * 2.20462
-        print(f"DEBUG: Calculated total weight in lbs: {total_weight_lbs}")
+        if not is_known_unit(unit):
+            response = {'success': False, 'message': INVALID_UNIT_MESSAGE}
+            logger.debug("Response before return: %s", response)
+            return response, 400
+        try:
+            total_weight_lbs = compute_total_weight_lbs(amount, unit, cas_number)
+        except (TypeError, ValueError):
+            response = {'success': False, 'message': INVALID_NUMBER_MESSAGE}
+            logger.debug("Response before return: %s", response)
+            return response, 400
+        logger.debug("Calculated total weight in lbs: %s", total_weight_lbs)
 
         # Add the new chemical
         try:
-            print("DEBUG: Attempting to add new chemical to database.")
             new_chemical = Chemical(
                 name=name,
                 cas_number=cas_number,
@@ -75,23 +116,23 @@ class AddChemicalResource(Resource):
             )
             db.session.add(new_chemical)
             db.session.commit()
-            print(f"DEBUG: New chemical added with ID: {new_chemical.id}")
+            barcode_cache.invalidate(barcode)
+            logger.info("New chemical added with ID %s", new_chemical.id)
 
             response = {'success': True, 'message': 'Chemical added successfully.'}
-            print("DEBUG: Response before return:", response)
+            logger.debug("Response before return: %s", response)
             return response, 201
         except Exception as e:
-            print(f"DEBUG: Exception occurred: {e}")
+            logger.exception("Exception occurred: %s", e)
             db.session.rollback()
-            response = {'success': False, 'message': 'Failed to add chemical due to a server error.'}
-            print("DEBUG: Response before return:", response)
+            response = {'success': False, 'message': SERVER_ERROR_MESSAGE}
+            logger.debug("Response before return: %s", response)
             return response, 500
 
 class AddRoomResource(Resource):
     def post(self):
-        print("DEBUG: AddRoomResource endpoint called.")
         data = request.get_json()
-        print("DEBUG: Received data:", data)
+        logger.debug("Received data: %s", data)
 
         pi_id = data.get("pi_id")
         room_number = data.get("room_number")
@@ -113,20 +154,19 @@ class AddRoomResource(Resource):
         )
         db.session.add(new_room)
         db.session.commit()
+        invalidate_principal_caches()  # Every session that can see this PI now has a new room
 
-        print(f"DEBUG: Added new room with ID: {new_room.id}")
+        logger.info("Added new room with ID %s", new_room.id)
 
         # Fetch updated data for the associated PI
         pi = PI.query.get(pi_id)
         if not pi:
             return jsonify({"success": False, "message": "PI not found"}), 404
 
-        rooms = Room.query.filter_by(pi_id=pi.id).all()
+        rooms = rooms_for_pis([pi.id])[pi.id]
         room_data = [
             {
-                "room_id": room.id,
-                "room_number": room.room_number,
-                "building_name": Building.query.get(room.building_id).name,
+                **room_summary(room),
                 "contact_name": room.contact_name,
                 "contact_phone": room.contact_phone
             }
@@ -146,20 +186,18 @@ class AddRoomResource(Resource):
         })
 
 class FetchBuildingsResource(Resource):
+    @conditional('building', values=building_names.counter_values)
     def get(self):
-        print("DEBUG: BuildingsResource endpoint called.")
-        buildings = Building.query.all()
-        result = [{"id": building.id, "name": building.name} for building in buildings]
-        print("DEBUG: Retrieved buildings:", result)
+        result = [{"id": building_id, "name": name} for building_id, name in building_names.current().items()]
+        logger.debug("Retrieved %d buildings", len(result))
         return jsonify({"success": True, "buildings": result})
 
 class RoomUpdateFieldResource(Resource):
     def post(self):
-        print("DEBUG: RoomUpdateFieldResource endpoint called.")
         
         # Parse the request data
         data = request.get_json()
-        print(f"DEBUG: Received data: {data}")
+        logger.debug("Received data: %s", data)
         
         room_id = data.get("room_id")
         if not room_id:
@@ -167,31 +205,30 @@ class RoomUpdateFieldResource(Resource):
         
         room = Room.query.get(room_id)
         if not room:
-            print(f"DEBUG: Room with ID {room_id} not found.")
+            logger.debug("Room with ID %s not found", room_id)
             return jsonify({"success": False, "message": "Room not found"}), 404
         
         # Update fields based on the key
         if "contact_name" in data:
             room.contact_name = data["contact_name"]
-            print(f"DEBUG: Updated contact_name to: {room.contact_name}")
+            logger.debug("Updated contact_name of room %s", room_id)
         if "contact_phone" in data:
             room.contact_phone = data["contact_phone"]
-            print(f"DEBUG: Updated contact_phone to: {room.contact_phone}")
+            logger.debug("Updated contact_phone of room %s", room_id)
         
         try:
             db.session.commit()
             return jsonify({"success": True, "message": "Room updated successfully"})
         except Exception as e:
-            print(f"DEBUG: Error while committing changes: {e}")
+            logger.exception("Error while committing changes: %s", e)
             return jsonify({"success": False, "message": "Failed to update room"}), 500
 
 
 class ManageSpaceResource(Resource):
     def post(self):
-        print("DEBUG: ManageSpaceResource endpoint called.")
         
         data = request.get_json()
-        print(f"DEBUG: Received data: {data}")
+        logger.debug("Received data: %s", data)
         
         space_id = data.get("id")
         room_id = data.get("room_id")
@@ -205,7 +242,7 @@ class ManageSpaceResource(Resource):
 
         # Handle editing existing space
         if space_id:
-            print(f"DEBUG: Editing space with ID: {space_id}")
+            logger.debug("Editing space with ID %s", space_id)
             space = Space.query.get(space_id)
             if not space:
                 return jsonify({"success": False, "message": "Space not found"}), 404
@@ -215,11 +252,11 @@ class ManageSpaceResource(Resource):
             space.space_type = space_type or space.space_type
             space.space_id = space_identifier or space.space_id
             db.session.commit()
-            print(f"DEBUG: Updated space: {space.id}")
+            barcode_cache.invalidate()  # Cached scan results embed the space description
+            logger.info("Updated space %s", space.id)
             return jsonify({"success": True, "message": "Space updated successfully"})
 
         # Handle adding a new space
-        print("DEBUG: Adding a new space.")
         new_space = Space(
             room_id=room_id,
             description=description,
@@ -228,37 +265,35 @@ class ManageSpaceResource(Resource):
         )
         db.session.add(new_space)
         db.session.commit()
-        print(f"DEBUG: Created new space with ID: {new_space.id}")
+        logger.info("Created new space with ID %s", new_space.id)
         return jsonify({"success": True, "message": "Space created successfully", "id": new_space.id})
 
 class RoomDetailsResource(Resource):
     def post(self):
-        print("DEBUG: RoomDetailsResource endpoint called.")
         
         # Get the request data
         data = request.get_json()
-        print(f"DEBUG: Received request data: {data}")
+        logger.debug("Received request data: %s", data)
         
         room_id = data.get("room_id")
         if not room_id:
-            print("DEBUG: Room ID is missing in the request.")
+            logger.debug("Room ID is missing in the request")
             return jsonify({"success": False, "message": "Room ID is required"}), 400
         
         try:
             # Fetch room details
-            room = Room.query.get(room_id)
+            room = room_with_details(room_id)
             if not room:
-                print(f"DEBUG: No room found for room_id={room_id}")
+                logger.debug("No room found for room_id=%s", room_id)
                 return jsonify({"success": False, "message": "Room not found"}), 404
             
-            building = Building.query.get(room.building_id)
-            spaces = Space.query.filter_by(room_id=room_id).all()
+            spaces = room.spaces
             
             # Prepare room data
             room_data = {
                 "room_id": room.id,
                 "room_number": room.room_number,
-                "building_name": building.name if building else "Unknown",
+                "building_name": building_name(room),
                 "contact_name": room.contact_name or "",
                 "contact_phone": room.contact_phone or "",
                 "spaces": [
@@ -271,139 +306,123 @@ class RoomDetailsResource(Resource):
                     for space in spaces
                 ]
             }
-            print("DEBUG: Prepared room data:", room_data)
+            logger.debug("Prepared room data: %s", room_data)
             
             return jsonify({"success": True, "room_data": room_data})
         
         except Exception as e:
-            print(f"DEBUG: Exception occurred: {e}")
+            logger.exception("Exception occurred: %s", e)
             return jsonify({"success": False, "error": str(e)}), 500
 
 class SearchChemicalsResource(Resource):
     def post(self):
-        print("DEBUG: SearchChemicalsResource endpoint called.")
 
         # Get the request data
         data = request.get_json()
-        print(f"DEBUG: Received request data: {data}")
+        logger.debug("Received request data: %s", data)
 
         # Parse query and filter
         query = data.get("query", "").lower()
-        filter_option = data.get("filter", "Current Room")
-        print(f"DEBUG: Query: {query}, Filter Option: {filter_option}")
-
-        # Parse PI and Room data
-        user_pis = data.get("pis", [])
-        pi_index = data.get("pi_index")  # Selected PI index
-        room_index = data.get("room_index")  # Selected Room index
-        print(f"DEBUG: User PIs: {user_pis}, PI Index: {pi_index}, Room Index: {room_index}")
 
         try:
-            chemicals = []
-
-            if filter_option == "Current Room" and pi_index is not None and room_index is not None:
-                # Get the room_id for the selected PI and Room
-                pi_data = user_pis[pi_index] if pi_index < len(user_pis) else None
-                if pi_data:
-                    room_data = pi_data["rooms"][room_index] if room_index < len(pi_data["rooms"]) else None
-                    room_id = room_data["room_id"] if room_data else None
-                    print(f"DEBUG: Current Room ID resolved: {room_id}")
-
-                    # Query chemicals in the specific room
-                    if room_id:
-                        chemicals = Chemical.query.filter(
-                            Chemical.room_id == room_id,
-                            db.or_(
-                                Chemical.name.ilike(f"%{query}%"),
-                                Chemical.cas_number.ilike(f"%{query}%"),
-                                Chemical.barcode.ilike(f"%{query}%")
-                            )
-                        ).all()
-                        print(f"DEBUG: Found {len(chemicals)} chemicals for Current Room.")
-
-            elif filter_option == "Current PI" and pi_index is not None:
-                # Get room_ids for the selected PI
-                pi_data = user_pis[pi_index] if pi_index < len(user_pis) else None
-                if pi_data:
-                    room_ids = [room["room_id"] for room in pi_data["rooms"]]
-                    print(f"DEBUG: Room IDs for Current PI: {room_ids}")
-
-                    # Query chemicals in all rooms for the selected PI
-                    chemicals = Chemical.query.filter(
-                        Chemical.room_id.in_(room_ids),
-                        db.or_(
-                            Chemical.name.ilike(f"%{query}%"),
-                            Chemical.cas_number.ilike(f"%{query}%"),
-                            Chemical.barcode.ilike(f"%{query}%")
-                        )
-                    ).all()
-                    print(f"DEBUG: Found {len(chemicals)} chemicals for Current PI.")
-
-            elif filter_option == "All PIs":
-                # Get room_ids for all PIs
-                room_ids = [room["room_id"] for pi in user_pis for room in pi["rooms"]]
-                print(f"DEBUG: Room IDs for All PIs: {room_ids}")
-
-                # Query chemicals in all rooms for all PIs
-                chemicals = Chemical.query.filter(
-                    Chemical.room_id.in_(room_ids),
-                    db.or_(
-                        Chemical.name.ilike(f"%{query}%"),
-                        Chemical.cas_number.ilike(f"%{query}%"),
-                        Chemical.barcode.ilike(f"%{query}%")
-                    )
-                ).all()
-                print(f"DEBUG: Found {len(chemicals)} chemicals for All PIs.")
-
+            if "scope" in data:
+                # Server-resolved scope: the client only names the scope
+                try:
+                    room_ids = self.scoped_room_ids(data)
+                except AuthError as e:
+                    return {"success": False, "message": str(e)}, 401
+                except ScopeError as e:
+                    return {"success": False, "message": str(e)}, e.status
             else:
-                print("DEBUG: Invalid filter or missing indices.")
-
-            # Use the exact response format you provided
-            results = [
-                {
-                    "name": chemical.name,
-                    "barcode": chemical.barcode,
-                    "room_number": Room.query.get(chemical.room_id).room_number,
-                    "building_name": Building.query.get(Room.query.get(chemical.room_id).building_id).name,
-                    "room_id": chemical.room_id,
-                }
-                for chemical in chemicals
-            ]
-            print(f"DEBUG: Prepared {len(results)} results.")
+                room_ids = self.client_room_ids(data)
+
+            # Query the search index for chemicals in the resolved rooms
+            results = []
+            if room_ids is not None:
+                rows = CHEMICAL_SEARCH.query(search_chemicals(query, room_ids=room_ids)).all()
+                results = CHEMICAL_SEARCH.serialize_all(rows)
+                logger.debug("Found %d chemicals in %d rooms", len(results), len(room_ids))
 
             return jsonify({"success": True, "results": results})
 
         except Exception as e:
-            print(f"DEBUG: Exception occurred: {e}")
-            return jsonify({"success": False, "error": str(e)}), 500
+            logger.exception("Exception occurred: %s", e)
+            return {"success": False, "error": str(e)}, 500
+
+    @staticmethod
+    def scoped_room_ids(data):
+        """
+        Rooms for {"scope": "room" | "pi" | "all", "room_id", "pi_id"}. The
+        principal comes from the bearer token.
+        """
+        principal = current_principal()
+        if principal is None:
+            raise ScopeError("Authorization token required", 401)
+        logger.debug("Scope %s for %s", data["scope"], principal)
+        return resolve_room_ids(principal, data["scope"], pi_id=data.get("pi_id"), room_id=data.get("room_id"))
+
+    @staticmethod
+    def client_room_ids(data):
+        """Rooms selected from the PI/room tree the client posted (legacy request format)."""
+        filter_option = data.get("filter", "Current Room")
+        user_pis = data.get("pis", [])
+        pi_index = data.get("pi_index")  # Selected PI index
+        room_index = data.get("room_index")  # Selected Room index
+        logger.debug("Filter Option: %s, PI Index: %s, Room Index: %s", filter_option, pi_index, room_index)
+
+        room_ids = None
+        if filter_option == "Current Room" and pi_index is not None and room_index is not None:
+            # Get the room_id for the selected PI and Room
+            pi_data = user_pis[pi_index] if pi_index < len(user_pis) else None
+            if pi_data:
+                room_data = pi_data["rooms"][room_index] if room_index < len(pi_data["rooms"]) else None
+                room_id = room_data["room_id"] if room_data else None
+                logger.debug("Current Room ID resolved: %s", room_id)
+                if room_id:
+                    room_ids = [room_id]
+
+        elif filter_option == "Current PI" and pi_index is not None:
+            # Get room_ids for the selected PI
+            pi_data = user_pis[pi_index] if pi_index < len(user_pis) else None
+            if pi_data:
+                room_ids = [room["room_id"] for room in pi_data["rooms"]]
+                logger.debug("Room IDs for Current PI: %s", room_ids)
+
+        elif filter_option == "All PIs":
+            # Get room_ids for all PIs
+            room_ids = [room["room_id"] for pi in user_pis for room in pi["rooms"]]
+            logger.debug("Room IDs for All PIs: %s", room_ids)
+
+        else:
+            logger.debug("Invalid filter or missing indices")
+
+        return room_ids
 
 
 
 class ChemicalDelete(Resource):
     def delete(self, chemical_id):
-        print(f"DEBUG: Received DELETE request for chemical ID: {chemical_id}")
 
         # Fetch the chemical by ID
         chemical = Chemical.query.get(chemical_id)
         if not chemical:
-            print(f"DEBUG: Chemical with ID {chemical_id} not found")
+            logger.debug("Chemical with ID %s not found", chemical_id)
             return {"message": "Chemical not found"}, 404
 
         try:
             db.session.delete(chemical)
             db.session.commit()
-            print(f"DEBUG: Chemical with ID {chemical_id} deleted successfully")
+            barcode_cache.invalidate(chemical.barcode)
+            logger.info("Chemical with ID %s deleted", chemical_id)
             return {"message": "Chemical deleted successfully"}, 200
         except Exception as e:
             db.session.rollback()
-            print(f"DEBUG: Error deleting chemical - {str(e)}")
+            logger.exception("Error deleting chemical %s", chemical_id)
             return {"message": f"Error deleting chemical: {str(e)}"}, 500
 
 
 class ChemicalEdit(Resource):
     def put(self):
-        print("DEBUG: Received PUT request for updating chemical")  # Debug start
-        print(f"DEBUG: Request headers: {request.headers}") 
 
         # Define the expected fields in the request
         parser = reqparse.RequestParser()
@@ -417,43 +436,48 @@ class ChemicalEdit(Resource):
 
         try:
             args = parser.parse_args()
-            print(f"DEBUG: Parsed arguments: {args}")  # Debug parsed arguments
+            logger.debug("Parsed arguments: %s", args)
         except Exception as e:
-            print(f"DEBUG: Failed to parse arguments - {str(e)}")  # Debug parsing failure
+            logger.debug("Failed to parse arguments - %s", e)
             return {'message': f'Error parsing arguments: {str(e)}'}, 400
 
         # Fetch the chemical by ID
         chemical = Chemical.query.get(args['id'])
         if not chemical:
-            print(f"DEBUG: Chemical with ID {args['id']} not found")  # Debug chemical lookup
+            logger.debug("Chemical with ID %s not found", args['id'])
             return {'message': 'Chemical not found'}, 404
         
         # Convert expiration_date from string to datetime.date
         try:
             expiration_date = datetime.strptime(args['expiration_date'], '%Y-%m-%d').date()
         except ValueError as e:
-            print(f"DEBUG: Invalid date format for expiration_date - {str(e)}")
+            logger.debug("Invalid date format for expiration_date - %s", e)
             return {'message': 'Invalid expiration date format. Use YYYY-MM-DD'}, 400
 
+        if not is_known_unit(args['unit']):
+            return {'message': INVALID_UNIT_MESSAGE}, 400
+
         # Update chemical fields
         try:
             chemical.name = args['name']
             chemical.cas_number = args['cas_number']
             chemical.amount = args['amount']
             chemical.unit = args['unit']
+            chemical.total_weight_lbs = compute_total_weight_lbs(args['amount'], args['unit'], args['cas_number'])
             chemical.expiration_date = expiration_date
             chemical.space_id = args['space_id']
-            print(f"DEBUG: Updated chemical object: {chemical}")  # Debug updated chemical object
 
             db.session.commit()
-            print("DEBUG: Successfully committed changes to the database")  # Debug success
+            barcode_cache.invalidate(chemical.barcode)
+            logger.info("Updated chemical %s", chemical.id)
             return {'message': 'Chemical updated successfully'}, 200
         except Exception as e:
             db.session.rollback()
-            print(f"DEBUG: Error updating chemical - {str(e)}")  # Debug database failure
+            logger.exception("Error updating chemical %s", args['id'])
             return {'message': f'Error updating chemical: {str(e)}'}, 500
 
 class SpaceResource(Resource):
+    @conditional(room_counter)
     def get(self, room_id):
         spaces = Space.query.filter_by(room_id=room_id).all()
         return [{"id": space.id, "name": space.description} for space in spaces], 200
@@ -467,99 +491,69 @@ class CheckChemical(Resource):
             selected_room_id = data.get('selected_room_id')
 
             if not barcode or not selected_room_id:
-                print("DEBUG: Missing barcode or selected_room_id in request")
+                logger.debug("Missing barcode or selected_room_id in request")
                 return {"error": "barcode and selected_room_id are required"}, 400
 
-            print(f"DEBUG: Received barcode: {barcode}, selected_room_id: {selected_room_id}")
+            logger.debug("Received barcode: %s, selected_room_id: %s", barcode, selected_room_id)
 
-            # Query chemical by barcode
-            chemical = Chemical.query.filter_by(barcode=barcode).first()
+            # Look up the chemical (served from the scan cache when possible)
+            entry = barcode_cache.lookup(barcode)
 
-            if not chemical:
-                print(f"DEBUG: Chemical with barcode {barcode} not found")
+            if not entry:
+                logger.debug("Chemical with barcode %s not found", barcode)
                 return {"alert": "Sorry, that chemical is not found"}, 404
 
-            print(f"DEBUG: Found chemical: {chemical}")
+            chemical_info = entry["chemical_info"]
+            logger.debug("Found chemical %s", chemical_info["id"])
 
-            # Fetch the associated Room
-            room = Room.query.get(chemical.room_id)
-            if not room:
-                print(f"DEBUG: Room with ID {chemical.room_id} not found")
+            if not entry["room_found"]:
+                logger.warning("Room with ID %s not found for chemical %s", entry["room_id"], chemical_info["id"])
                 return {"error": "Room not found for this chemical"}, 404
 
-            # Fetch the associated Building
-            building = Building.query.get(room.building_id)
-            building_name = building.name if building else "Unknown Building"
-
-            # Fetch the associated Space
-            space = chemical.space
-            space_description = space.description if space else None
-
             # Check if the room matches
-            if chemical.room_id != selected_room_id:
-                print(f"DEBUG: Room mismatch for chemical. Expected {selected_room_id}, found {chemical.room_id}")
-                room_number = room.room_number if room else "Unknown Room"
+            if entry["room_id"] != selected_room_id:
+                logger.debug("Room mismatch for chemical. Expected %s, found %s", selected_room_id, entry["room_id"])
                 return {
-                    "alert": f"Please return this chemical to {room_number}, {building_name} {space_description or ''}".strip()
+                    "alert": f"Please return this chemical to {entry['return_location']}"
                 }, 400
 
             # Chemical matches the room
-            print(f"DEBUG: Chemical is in the correct room: {selected_room_id}")
-            response_data = {
-                "chemical_info": {
-                    "id": chemical.id,
-                    "name": chemical.name,
-                    "cas_number": chemical.cas_number,
-                    "barcode": chemical.barcode,
-                    "amount": chemical.amount,
-                    "unit": chemical.unit,
-                    "expiration_date": chemical.expiration_date.strftime('%Y-%m-%d') if chemical.expiration_date else "N/A",
-                    "room": f"{room.room_number}, {building_name}",
-                    "room_id": chemical.room_id,
-                    "space": space_description or "",
-                    "space_id": chemical.space_id
-                }
-            }
-            print(f"DEBUG: Returning chemical info: {response_data}")
+            logger.debug("Chemical is in the correct room: %s", selected_room_id)
+            response_data = {"chemical_info": chemical_info}
+            logger.debug("Returning chemical info: %s", response_data)
             return response_data, 200
 
         except Exception as e:
-            print(f"ERROR: Exception occurred - {str(e)}")
+            logger.exception("Exception occurred - %s", e)
             return {"error": f"Internal server error: {str(e)}"}, 500
 
 
 class PILoginResource(Resource):
     def post(self):
-        print("DEBUG: PILoginResource called")
         data = request.get_json()
         email = data.get("email")  # Match LoginResource by using email
         password = data.get("password")
-        print("DEBUG: Email received:", email)
-        print("DEBUG: Password received:", password)
+        logger.debug("PI login attempt for %s", email)
 
         # Validate PI credentials
         pi = PI.query.filter_by(email=email).first()  # Use email for PI lookup
-        print("DEBUG: Found PI:", pi)
         if pi and pi.check_password(password):
             # Fetch rooms associated with the PI
-            rooms = Room.query.filter_by(pi_id=pi.id).all()
-            room_data = [
-                {
-                    "room_id": room.id,
-                    "room_number": room.room_number,
-                    "building_name": Building.query.get(room.building_id).name  # Correctly fetch building name
-                }
-                for room in rooms
-            ]
-
-            return jsonify({
-                "success": True,
+            room_data = pi_room_tree([pi])[0]["rooms"]
+            scope = {
                 "pi_id": pi.id,  # Include PI id for consistency
                 "pi_name": pi.name,  # Use pi.name as the PI's name
                 "rooms": room_data  # Associated rooms
+            }
+            remember_scope(PI_PRINCIPAL, pi.id, scope)
+
+            return jsonify({
+                "success": True,
+                **scope,
+                **issue_tokens(PI_PRINCIPAL, pi.id)  # Bearer token for /auth/session and later requests
             })
 
-        return jsonify({"success": False, "message": "Invalid email or password"}), 401
+        return {"success": False, "message": "Invalid email or password"}, 401
 
 
 
@@ -574,46 +568,47 @@ class LoginResource(Resource):
         user = User.query.filter_by(email=email).first()
         if user and user.check_password(password):
             # Fetch PIs and associated room/building details
-            pi_data = []
-            for pi in user.pis:
-                rooms = Room.query.filter_by(pi_id=pi.id).all()
-                room_data = [
-                    {
-                        "room_id": room.id,
-                        "room_number": room.room_number,
-                        "building_name": Building.query.get(room.building_id).name
-                    }
-                    for room in rooms
-                ]
-                pi_data.append({
-                    "pi_id": pi.id,
-                    "pi_name": pi.name,
-                    "rooms": room_data
-                })
+            pi_data = pi_room_tree(user.pis)
+            scope = {
+                "user_name": user.name,
+                "pis": pi_data
+            }
+            remember_scope(USER, user.id, scope)
 
             return jsonify({
                 "success": True,
-                "user_name": user.name,
-                "pis": pi_data
+                **scope,
+                **issue_tokens(USER, user.id)  # Bearer token for /auth/session and later requests
             })
 
-        return jsonify({"success": False, "message": "Invalid email or password"}), 401
+        return {"success": False, "message": "Invalid email or password"}, 401
 
 
 # --- Routes for Chemicals ---
+def chemical_page_response(query):
+    """
+    Paginated chemical list for `query`, or the full list streamed as one JSON
+    array when the client explicitly asks for ?stream=true.
+    """
+    query = CHEMICAL_LIST.query(query)
+    if stream_requested():
+        return stream_json_array(query, Chemical.id, CHEMICAL_LIST.serialize)
+
+    try:
+        limit, cursor = page_params()
+    except PaginationError as e:
+        return {'error': str(e)}, 400
+
+    chemicals, next_cursor = paginate(query, Chemical.id, limit, cursor)
+    return jsonify({
+        'chemicals': CHEMICAL_LIST.serialize_all(chemicals),
+        'next_cursor': next_cursor
+    })
+
+
 class ChemicalListResource(Resource):
     def get(self):
-        chemicals = Chemical.query.all()
-        return jsonify([{
-            'id': chem.id,
-            'name': chem.name,
-            'barcode': chem.barcode,
-            'amount': chem.amount,
-            'unit': chem.unit,
-            'total_weight_lbs': chem.total_weight_lbs,
-            'room': chem.room.room_number if chem.room else None,  # Room information
-            'space': chem.space.description if chem.space else None  # Space information
-        } for chem in chemicals])
+        return chemical_page_response(Chemical.query)
 
     def post(self):
         data = request.get_json()
@@ -621,16 +616,19 @@ class ChemicalListResource(Resource):
         expiration_date = data.get('expiration_date')
         if expiration_date:
             expiration_date = datetime.strptime(expiration_date, '%Y-%m-%d').date()
+        if not is_known_unit(data['unit']):
+            return {'message': INVALID_UNIT_MESSAGE}, 400
         
         new_chemical = Chemical(
             name=data['name'],
             cas_number=data['cas_number'],
+            barcode=data.get('barcode', ''),  # Optional; the column is unique, so only one chemical can go without
             room_id=data['room_id'],
             space_id=data.get('space_id'),  # Optional
             amount=data['amount'],
             unit=data['unit'],
             expiration_date=expiration_date,
-            total_weight_lbs=data['total_weight_lbs']
+            total_weight_lbs=compute_total_weight_lbs(data['amount'], data['unit'], data['cas_number'])
         )
         db.session.add(new_chemical)
         db.session.commit()
@@ -652,22 +650,12 @@ class ChemicalQueryResource(Resource):
         if cas_number:
             query = query.filter_by(cas_number=cas_number)
         
-        chemicals = query.all()
-        return jsonify([{
-            'id': chem.id,
-            'name': chem.name,
-            'barcode': chem.barcode,
-            'amount': chem.amount,
-            'unit': chem.unit,
-            'total_weight_lbs': chem.total_weight_lbs,
-            'room': chem.room.room_number if chem.room else None,  # Room information
-            'space': chem.space.description if chem.space else None  # Space information
-        } for chem in chemicals])
+        return chemical_page_response(query)
 
 # --- Route to find PIs associated with a user ---
 class UserPIResource(Resource):
     def get(self, user_id):
-        user = User.query.get(user_id)
+        user = user_with_pi_rooms(user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
@@ -685,9 +673,9 @@ class UserResource(Resource):
         data = request.get_json()
         new_user = User(
             name=data['name'],
-            email=data['email'],
-            password=data['password']
+            email=data['email']
         )
+        new_user.set_password(data['password'])
         db.session.add(new_user)
         db.session.commit()
         return jsonify({'id': new_user.id, 'name': new_user.name})
@@ -704,6 +692,7 @@ class UserPIAssociationResource(Resource):
         # Associate PI with the User (many-to-many relationship)
         user.pis.append(pi)
         db.session.commit()
+        invalidate_principal_caches((USER, user.id))
 
         return jsonify({'message': f'PI {pi.name} associated with User {user.name}'})
 
@@ -717,6 +706,7 @@ class UserPIAssociationResource(Resource):
         # Remove association between PI and User
         user.pis.remove(pi)
         db.session.commit()
+        invalidate_principal_caches((USER, user.id))
 
         return jsonify({'message': f'PI {pi.name} removed from User {user.name}'})
 
@@ -726,17 +716,18 @@ class PIResource(Resource):
         data = request.get_json()
         new_pi = PI(
             name=data['name'],
-            email=data['email'],
-            password=data['password']
+            email=data['email']
         )
+        new_pi.set_password(data['password'])
         db.session.add(new_pi)
         db.session.commit()
         return jsonify({'id': new_pi.id, 'name': new_pi.name})
     
 # --- Route to get all PIs ---
 class PIListResource(Resource):
+    @conditional('pi', 'room')
     def get(self):
-        pis = PI.query.all()
+        pis = pis_with_rooms()
         return jsonify([{
             'id': pi.id,
             'name': pi.name,
@@ -746,8 +737,9 @@ class PIListResource(Resource):
 
 # --- Route to get all Users ---
 class UserListResource(Resource):
+    @conditional('user', 'pi')
     def get(self):
-        users = User.query.all()
+        users = users_with_pis()
         return jsonify([{
             'id': user.id,
             'name': user.name,
@@ -765,6 +757,7 @@ class BuildingResource(Resource):
         )
         db.session.add(new_building)
         db.session.commit()
+        building_names.load()  # Other workers pick up the counter bump on their next check
         return jsonify({'id': new_building.id, 'name': new_building.name})
 
 # --- Route to create Rooms ---
@@ -780,6 +773,7 @@ class RoomResource(Resource):
         )
         db.session.add(new_room)
         db.session.commit()
+        invalidate_principal_caches()
         return jsonify({'id': new_room.id, 'room_number': new_room.room_number})
 
 # --- Route to create Spaces ---
@@ -801,28 +795,31 @@ class ChemicalsByRoom(Resource):
     RESTful resource to handle retrieving chemicals by room ID.
     """
 
+    @conditional(room_counter)
     def get(self, room_id):
         """
-        Retrieve a list of chemicals associated with the given room_id.
+        Retrieve a page of chemicals associated with the given room_id.
         """
+        query = CHEMICAL_IN_ROOM.query(Chemical.query.filter_by(room_id=room_id))
+        if stream_requested():
+            return stream_json_array(query, Chemical.id, CHEMICAL_IN_ROOM.serialize)
+
+        try:
+            limit, cursor = page_params()
+        except PaginationError as e:
+            return {"error": str(e)}, 400
+
         try:
             # Query the database for chemicals with the specified room_id
-            chemicals = Chemical.query.filter_by(room_id=room_id).all()
+            chemicals, next_cursor = paginate(query, Chemical.id, limit, cursor)
 
-            if not chemicals:
+            if not chemicals and not cursor:
                 return {"message": "No chemicals found for the given room ID"}, 404
 
             # Format the response
-            chemical_list = [
-                {
-                    "room_id": chemical.room_id,
-                    "barcode": chemical.barcode,
-                    "name": chemical.name
-                }
-                for chemical in chemicals
-            ]
+            chemical_list = CHEMICAL_IN_ROOM.serialize_all(chemicals)
 
-            return {"chemicals": chemical_list}, 200
+            return {"chemicals": chemical_list, "next_cursor": next_cursor}, 200
 
         except Exception as e:
             return {"error": str(e)}, 500
@@ -830,7 +827,9 @@ class ChemicalsByRoom(Resource):
 
 # --- Add the new routes to your app ---
 def initialize_routes(api):
+    api.representation('application/json')(output_json)
     api.add_resource(AddChemicalResource, '/add_chemical')
+    api.add_resource(BulkChemicalIngestResource, '/chemicals/bulk')
     api.add_resource(FetchBuildingsResource, '/buildings-fetch')
     api.add_resource(AddRoomResource, '/add_room')
     api.add_resource(RoomUpdateFieldResource, '/rooms/update_field')
@@ -841,10 +840,21 @@ def initialize_routes(api):
     api.add_resource(ChemicalEdit, '/chemicals/update')
     api.add_resource(SpaceResource, '/rooms/<int:room_id>/spaces')
     api.add_resource(CheckChemical, '/scan/check_chemical')
+    api.add_resource(RoomAuditResource, '/scan/audit')
+    api.add_resource(SyncResource, '/sync')
     api.add_resource(PILoginResource, '/pi-login')
     api.add_resource(LoginResource, '/login')
+    api.add_resource(SessionResource, '/auth/session')
+    api.add_resource(RefreshTokenResource, '/auth/refresh')
     api.add_resource(ChemicalListResource, '/chemicals')
     api.add_resource(ChemicalQueryResource, '/chemicals/query')
+    api.add_resource(ChemicalExportResource, '/chemicals/export')
+    api.add_resource(InventorySummaryResource, '/inventory/summary')
+    api.add_resource(ExpiringChemicalsResource, '/chemicals/expiring')
+    api.add_resource(ExpirationDigestResource, '/expiration/digest')
+    api.add_resource(JobListResource, '/jobs')
+    api.add_resource(JobResource, '/jobs/<int:job_id>')
+    api.add_resource(JobCancelResource, '/jobs/<int:job_id>/cancel')
     api.add_resource(UserPIResource, '/users/<int:user_id>/pis')
     api.add_resource(UserResource, '/users')
     api.add_resource(PIResource, '/pis')
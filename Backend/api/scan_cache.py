@@ -0,0 +1,235 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from db_models.models import db, Chemical, Space
+from db_models.reference import building_names
+from db_models.versioning import current_version, next_version
+from api.serializers import CHEMICAL_SCAN
+from instrumentation import register_collector
+
+# --- Barcode lookup cache for /scan/check_chemical ---
+#
+# Audits scan shelves continuously, and every scan used to load the chemical,
+# room, building and space. The denormalized scan payload is now cached per
+# barcode in a bounded LRU with a TTL. The route that changes a chemical drops
+# its barcode; one that changes a space clears the whole cache (scan results
+# embed the space description).
+#
+# By default the cache is local to each process. Setting SCAN_CACHE_REDIS_URL
+# (requires the redis package) makes all gunicorn workers share one cache, so
+# an invalidation in one worker is seen by the others.
+#
+# Local caches of other processes (other gunicorn workers, and the web
+# processes when the jobs worker deletes a room's chemicals) learn of a write
+# through the "scan-cache" change counter (db_models.versioning): a before_flush
+# hook bumps it in the transaction of every flush that changes or deletes a
+# Chemical or Space. Each local cache compares it at most every
+# SCAN_CACHE_CHECK_SECONDS and clears itself when it moved, so a write is
+# stale elsewhere for seconds, not the TTL.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL = 300  # seconds
+DEFAULT_CHECK_SECONDS = 5
+SCAN_CACHE_COUNTER = 'scan-cache'
+
+
+class LocalCacheBackend:
+    """In-process LRU with per-entry expiry."""
+
+    shared = False
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class RedisCacheBackend:
+    """Shared cache in Redis; entries expire server-side and eviction is left to Redis' maxmemory policy."""
+
+    shared = True
+
+    def __init__(self, url, ttl=DEFAULT_TTL, prefix='scan:'):
+        import redis  # optional dependency, only needed when the shared cache is enabled
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*', count=1000))
+        if keys:
+            self.client.delete(*keys)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + '*', count=1000))
+
+
+class BarcodeCache:
+    def __init__(self, backend, check_seconds=DEFAULT_CHECK_SECONDS):
+        self.backend = backend
+        self.check_seconds = check_seconds
+        self.version = None
+        self.checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def _count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def lookup(self, barcode):
+        """Scan payload for `barcode` (see scan_entry), or None if there is no such chemical."""
+        key = str(barcode)
+        self._check_counter()
+        try:
+            entry = self.backend.get(key)
+        except Exception:
+            logger.exception("Scan cache read failed; falling back to the database")
+            entry = None
+        if entry is not None:
+            self._count('hits')
+            return entry
+
+        self._count('misses')
+        row = CHEMICAL_SCAN.query().filter(Chemical.barcode == barcode).first()
+        if row is None:
+            return None
+        entry = scan_entry(CHEMICAL_SCAN.serialize(row))
+        try:
+            self.backend.set(key, entry)
+        except Exception:
+            logger.exception("Scan cache write failed")
+        return entry
+
+    def invalidate(self, barcode=None):
+        """Drop one barcode, or everything when `barcode` is None."""
+        self._count('invalidations')
+        try:
+            if barcode is None:
+                self.backend.clear()
+            else:
+                self.backend.delete(str(barcode))
+        except Exception:
+            logger.exception("Scan cache invalidation failed")
+
+    def _check_counter(self):
+        """Clear a local cache when another process bumped the scan-cache counter."""
+        if self.backend.shared or time.monotonic() - self.checked_at < self.check_seconds:
+            return
+        self.checked_at = time.monotonic()
+        version = current_version(db.session, SCAN_CACHE_COUNTER)
+        if self.version is not None and version != self.version:
+            self.invalidate()
+        self.version = version
+
+    def metrics(self):
+        lines = []
+        for name, help_text, value in (
+            ('scan_cache_hits_total', 'Barcode lookups served from the scan cache.', self.hits),
+            ('scan_cache_misses_total', 'Barcode lookups that went to the database.', self.misses),
+            ('scan_cache_evictions_total', 'Entries evicted to stay within SCAN_CACHE_SIZE.', self.backend.evictions),
+            ('scan_cache_invalidations_total', 'Invalidations triggered by writes.', self.invalidations),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter', f'{name} {value}']
+        return lines
+
+
+@event.listens_for(Session, 'before_flush')
+def bump_scan_cache_counter(session, flush_context, instances):
+    """Changed or deleted chemicals and spaces may sit in any process's scan cache."""
+    changed = any(isinstance(obj, (Chemical, Space)) and session.is_modified(obj) for obj in session.dirty)
+    if changed or any(isinstance(obj, (Chemical, Space)) for obj in session.deleted):
+        next_version(session, SCAN_CACHE_COUNTER)
+
+
+def scan_entry(values):
+    """Everything CheckChemical needs about a chemical, from a serialized CHEMICAL_SCAN row."""
+    room_found = values['room_number'] is not None
+    building = building_names.name(values['building_id'], "Unknown Building")
+    space = values['space_description'] or ""
+    return {
+        'room_id': values['room_id'],
+        'room_found': room_found,
+        'return_location': (
+            f"{values['room_number'] if room_found else 'Unknown Room'}, {building} {space}"
+        ).strip(),
+        'chemical_info': {
+            "id": values['id'],
+            "name": values['name'],
+            "cas_number": values['cas_number'],
+            "barcode": values['barcode'],
+            "amount": values['amount'],
+            "unit": values['unit'],
+            "expiration_date": values['expiration_date'],
+            "room": f"{values['room_number']}, {building}" if room_found else "",
+            "room_id": values['room_id'],
+            "space": space,
+            "space_id": values['space_id']
+        }
+    }
+
+
+def cache_from_env(environ=os.environ):
+    ttl = int(environ.get('SCAN_CACHE_TTL', DEFAULT_TTL))
+    redis_url = environ.get('SCAN_CACHE_REDIS_URL')
+    if redis_url:
+        return BarcodeCache(RedisCacheBackend(redis_url, ttl=ttl))
+    max_entries = int(environ.get('SCAN_CACHE_SIZE', DEFAULT_MAX_ENTRIES))
+    check_seconds = float(environ.get('SCAN_CACHE_CHECK_SECONDS', DEFAULT_CHECK_SECONDS))
+    return BarcodeCache(LocalCacheBackend(max_entries=max_entries, ttl=ttl), check_seconds)
+
+
+barcode_cache = cache_from_env()
+register_collector(barcode_cache.metrics)
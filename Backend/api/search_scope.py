@@ -0,0 +1,58 @@
+from api.auth import USER, ScopeCache, scope_cache
+from db_models.queries import room_ids_by_pi
+
+# --- Server-resolved search scope ---
+#
+# Instead of posting its whole PI/room tree, a client names a scope and the
+# server works out which rooms that covers for the authenticated user or PI.
+# The allowed rooms come from one join (user_pi -> room) and are cached per
+# principal; writes that change the mapping invalidate the cache.
+
+SCOPE_ROOM = 'room'
+SCOPE_PI = 'pi'
+SCOPE_ALL = 'all'
+SCOPES = (SCOPE_ROOM, SCOPE_PI, SCOPE_ALL)
+
+room_scope_cache = ScopeCache()
+
+
+class ScopeError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def allowed_rooms(principal):
+    """{pi_id: [room_id, ...]} the principal may search, cached per principal."""
+    rooms = room_scope_cache.get(principal)
+    if rooms is None:
+        kind, principal_id = principal
+        if kind == USER:
+            rooms = room_ids_by_pi(user_id=principal_id)
+        else:
+            rooms = room_ids_by_pi(pi_id=principal_id)
+        room_scope_cache.set(principal, rooms)
+    return rooms
+
+
+def resolve_room_ids(principal, scope, pi_id=None, room_id=None):
+    """Room ids covered by `scope`, checked against what the principal may access."""
+    if scope not in SCOPES:
+        raise ScopeError(f"scope must be one of: {', '.join(SCOPES)}")
+
+    rooms = allowed_rooms(principal)
+    if scope == SCOPE_ALL:
+        return [room for pi_rooms in rooms.values() for room in pi_rooms]
+    if scope == SCOPE_PI:
+        if pi_id not in rooms:
+            raise ScopeError('PI not accessible', 403)
+        return rooms[pi_id]
+    if not any(room_id in pi_rooms for pi_rooms in rooms.values()):
+        raise ScopeError('Room not accessible', 403)
+    return [room_id]
+
+
+def invalidate_principal_caches(principal=None):
+    """Drop cached session trees and search scopes (for one principal, or all)."""
+    scope_cache.invalidate(principal)
+    room_scope_cache.invalidate(principal)
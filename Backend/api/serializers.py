@@ -0,0 +1,161 @@
+import json
+from flask import Response
+from flask.json.provider import DefaultJSONProvider, _default
+from db_models.models import Chemical, Room, Space
+from db_models.reference import building_names
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+# --- Serialization ---
+#
+# Each response shape is a RowSchema: the columns it needs and a row -> dict
+# function compiled once at import. Resources apply a schema to their query,
+# so only those columns are selected (plain rows, no ORM entities or lazy
+# relationship loads), and serialize the rows with it.
+#
+# JSON is encoded with orjson when it is installed and the stdlib otherwise,
+# both for jsonify() (the app's JSON provider) and for Flask-RESTful return
+# values (the API's application/json representation).
+
+
+def dumps(obj):
+    """Encode `obj` as compact JSON bytes."""
+    if orjson is not None:
+        # Datetimes go through Flask's default so the output matches jsonify's
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(obj, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """Decode JSON text or bytes."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if orjson is not None else json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+def output_json(data, code, headers=None):
+    """Flask-RESTful representation for application/json."""
+    response = Response(dumps(data), status=code, mimetype='application/json')
+    response.headers.extend(headers or {})
+    return response
+
+
+class RowSchema:
+    """
+    A response shape: `fields` are (key, column) or (key, column, convert)
+    tuples, `joins` the (table, on clause) pairs to outer-join so the columns
+    are reachable.
+    """
+
+    def __init__(self, fields, joins=()):
+        self.keys = tuple(field[0] for field in fields)
+        self.columns = tuple(field[1].label(field[0]) for field in fields)
+        self.joins = joins
+        self.serialize = self._compile([field[2] if len(field) > 2 else None for field in fields])
+
+    def _compile(self, converters):
+        keys = self.keys
+        if not any(converters):
+            return lambda row: dict(zip(keys, row))
+        steps = tuple(zip(keys, converters))
+
+        def serialize(row):
+            return {key: convert(value) if convert else value for (key, convert), value in zip(steps, row)}
+        return serialize
+
+    def query(self, query=None):
+        """Restrict `query` (default: all chemicals) to this schema's columns."""
+        query = Chemical.query if query is None else query
+        for target, on_clause in self.joins:
+            query = query.outerjoin(target, on_clause)
+        return query.with_entities(*self.columns)
+
+    def serialize_all(self, rows):
+        serialize = self.serialize
+        return [serialize(row) for row in rows]
+
+
+def _date(value):
+    return value.strftime('%Y-%m-%d') if value else "N/A"
+
+
+def _building_name(building_id):
+    return building_names.name(building_id)
+
+
+ROOM_JOIN = (Room, Chemical.room_id == Room.id)
+SPACE_JOIN = (Space, Chemical.space_id == Space.id)
+
+# /chemicals and /chemicals/query
+CHEMICAL_LIST = RowSchema([
+    ('id', Chemical.id),
+    ('name', Chemical.name),
+    ('barcode', Chemical.barcode),
+    ('amount', Chemical.amount),
+    ('unit', Chemical.unit),
+    ('total_weight_lbs', Chemical.total_weight_lbs),
+    ('room', Room.room_number),
+    ('space', Space.description),
+], joins=(ROOM_JOIN, SPACE_JOIN))
+
+# /search-chemical
+CHEMICAL_SEARCH = RowSchema([
+    ('name', Chemical.name),
+    ('barcode', Chemical.barcode),
+    ('room_number', Room.room_number),
+    ('building_name', Room.building_id, _building_name),
+    ('room_id', Chemical.room_id),
+], joins=(ROOM_JOIN,))
+
+# /chemicals/room/<id>
+CHEMICAL_IN_ROOM = RowSchema([
+    ('room_id', Chemical.room_id),
+    ('barcode', Chemical.barcode),
+    ('name', Chemical.name),
+    ('id', Chemical.id),
+])
+
+# /scan/check_chemical and /scan/audit; the raw values api.scan_cache.scan_entry formats
+CHEMICAL_SCAN = RowSchema([
+    ('id', Chemical.id),
+    ('name', Chemical.name),
+    ('cas_number', Chemical.cas_number),
+    ('barcode', Chemical.barcode),
+    ('amount', Chemical.amount),
+    ('unit', Chemical.unit),
+    ('expiration_date', Chemical.expiration_date, _date),
+    ('room_id', Chemical.room_id),
+    ('space_id', Chemical.space_id),
+    ('room_number', Room.room_number),
+    ('building_id', Room.building_id),
+    ('space_description', Space.description),
+], joins=(ROOM_JOIN, SPACE_JOIN))
+
+# /chemicals/expiring and the expiration digests
+CHEMICAL_EXPIRING = RowSchema([
+    ('id', Chemical.id),
+    ('name', Chemical.name),
+    ('cas_number', Chemical.cas_number),
+    ('barcode', Chemical.barcode),
+    ('amount', Chemical.amount),
+    ('unit', Chemical.unit),
+    ('expiration_date', Chemical.expiration_date, _date),
+    ('space', Space.description),
+    ('room_id', Chemical.room_id),
+    ('room_number', Room.room_number),
+    ('building_id', Room.building_id),
+    ('pi_id', Room.pi_id),
+], joins=(ROOM_JOIN, SPACE_JOIN))
@@ -0,0 +1,136 @@
+from flask import request
+from flask_restful import Resource
+from sqlalchemy import or_
+from db_models.models import db, Chemical, Room, Space, Tombstone
+from db_models.queries import building_name
+from db_models.versioning import current_version
+
+# --- Delta sync ---
+#
+# GET /sync?room_id=<id>&since=<version>   (or pi_id=<id> for all of a PI's rooms)
+#
+# Returns the rooms, spaces and chemicals of the scope whose version is newer
+# than `since`, plus the ids deleted from (or moved out of) the scope, and the
+# version to send as `since` next time. since=0 (or no since) returns the whole
+# scope. A handful of edits a day therefore costs a few rows, not the full
+# inventory.
+
+
+class SyncError(ValueError):
+    pass
+
+
+def sync_params(args):
+    since = args.get('since', '0')
+    try:
+        since = int(since)
+    except ValueError:
+        raise SyncError('since must be a version number')
+    if since < 0:
+        raise SyncError('since must be a version number')
+
+    room_id = args.get('room_id', type=int)
+    pi_id = args.get('pi_id', type=int)
+    if (room_id is None) == (pi_id is None):
+        raise SyncError('Exactly one of room_id or pi_id is required')
+    return since, room_id, pi_id
+
+
+def sync_room(room):
+    return {
+        "id": room.id,
+        "room_number": room.room_number,
+        "building_id": room.building_id,
+        "building_name": building_name(room),
+        "pi_id": room.pi_id,
+        "contact_name": room.contact_name,
+        "contact_phone": room.contact_phone,
+        "version": room.version
+    }
+
+
+def sync_space(space):
+    return {
+        "id": space.id,
+        "room_id": space.room_id,
+        "description": space.description,
+        "space_type": space.space_type,
+        "space_id": space.space_id,
+        "version": space.version
+    }
+
+
+def sync_chemical(chemical):
+    return {
+        "id": chemical.id,
+        "name": chemical.name,
+        "cas_number": chemical.cas_number,
+        "barcode": chemical.barcode,
+        "room_id": chemical.room_id,
+        "space_id": chemical.space_id,
+        "amount": chemical.amount,
+        "unit": chemical.unit,
+        "expiration_date": chemical.expiration_date.strftime('%Y-%m-%d') if chemical.expiration_date else None,
+        "total_weight_lbs": chemical.total_weight_lbs,
+        "version": chemical.version
+    }
+
+
+def changes_since(since, room_id=None, pi_id=None):
+    """Changed rows and tombstones for one room or one PI's rooms."""
+    # Read the version first: rows committed while we query get a higher
+    # version and are simply sent again on the next sync.
+    version = current_version(db.session)
+
+    if room_id is not None:
+        room_filter = Room.id == room_id
+        room_ids = [room_id]
+        tombstone_scope = or_(
+            Tombstone.room_id == room_id,
+            (Tombstone.table_name == Room.__tablename__) & (Tombstone.row_id == room_id)
+        )
+    else:
+        room_filter = Room.pi_id == pi_id
+        room_ids = db.select(Room.id).where(Room.pi_id == pi_id).scalar_subquery()
+        tombstone_scope = or_(Tombstone.pi_id == pi_id, Tombstone.room_id.in_(room_ids))
+
+    rooms = Room.query.filter(room_filter)
+    spaces = Space.query.filter(Space.room_id.in_(room_ids))
+    chemicals = Chemical.query.filter(Chemical.room_id.in_(room_ids))
+    if since > 0:
+        rooms = rooms.filter(Room.version > since)
+        spaces = spaces.filter(Space.version > since)
+        chemicals = chemicals.filter(Chemical.version > since)
+    changed = {
+        'rooms': [sync_room(room) for room in rooms.order_by(Room.id)],
+        'spaces': [sync_space(space) for space in spaces.order_by(Space.id)],
+        'chemicals': [sync_chemical(chemical) for chemical in chemicals.order_by(Chemical.id)]
+    }
+
+    deleted = {'rooms': [], 'spaces': [], 'chemicals': []}
+    if since > 0:
+        tombstones = db.session.query(Tombstone.table_name, Tombstone.row_id).filter(
+            tombstone_scope, Tombstone.version > since).distinct()
+        keys = {Room.__tablename__: 'rooms', Space.__tablename__: 'spaces', Chemical.__tablename__: 'chemicals'}
+        current = {key: {row['id'] for row in rows} for key, rows in changed.items()}
+        for table_name, row_id in tombstones:
+            key = keys[table_name]
+            # A row that left the scope and came back is sent as a change, not a delete
+            if row_id not in current[key]:
+                deleted[key].append(row_id)
+
+    return {
+        'version': version,
+        'since': since,
+        **changed,
+        'deleted': deleted
+    }
+
+
+class SyncResource(Resource):
+    def get(self):
+        try:
+            since, room_id, pi_id = sync_params(request.args)
+        except SyncError as e:
+            return {'success': False, 'message': str(e)}, 400
+        return {'success': True, **changes_since(since, room_id=room_id, pi_id=pi_id)}, 200
@@ -0,0 +1,90 @@
+from datetime import datetime
+from db_models.units import is_known_unit, to_pounds
+
+# --- Shared validation for chemical writes ---
+#
+# Used by AddChemicalResource and the bulk ingest endpoint so both report
+# exactly the same messages for the same problems.
+
+MISSING_FIELDS_MESSAGE = 'Missing required fields'
+DUPLICATE_BARCODE_MESSAGE = 'This barcode is already in use.'
+INVALID_DATE_MESSAGE = 'Invalid expiration date format. Use YYYY-MM-DD.'
+INVALID_BARCODE_MESSAGE = 'Barcode must be a string or a number.'
+INVALID_NUMBER_MESSAGE = 'Amount, room ID and space ID must be numbers.'
+INVALID_UNIT_MESSAGE = 'Unknown unit. Use a mass (lb, oz, kg, g, mg) or volume (L, mL, uL) unit.'
+SERVER_ERROR_MESSAGE = 'Failed to add chemical due to a server error.'
+
+REQUIRED_FIELDS = ('barcode', 'name', 'cas_number', 'room_id', 'amount', 'unit')
+
+
+def total_weight_lbs(amount, unit, cas_number=None):
+    # Calculate total weight in pounds (see db_models.units)
+    return to_pounds(amount, unit, cas_number)
+
+
+def missing_required_fields(data):
+    return any(not data.get(field) for field in REQUIRED_FIELDS)
+
+
+def parse_expiration_date(value):
+    """Parse a YYYY-MM-DD string; returns None for empty values, raises ValueError on bad input."""
+    if not value:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f'expiration_date must be a string, not {type(value).__name__}')
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def parse_barcode(value):
+    """Barcodes are stored as strings; JSON numbers are accepted, anything else raises ValueError."""
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        raise ValueError(f'barcode must be a string, not {type(value).__name__}')
+    return str(value)
+
+
+def _number(value, cast):
+    # CSV uploads deliver every field as a string
+    if value in (None, ''):
+        return None
+    return cast(value)
+
+
+def chemical_values(data):
+    """
+    Validate one new-chemical payload (barcode uniqueness excluded) and return
+    (column values, None) or (None, error message).
+    """
+    if missing_required_fields(data):
+        return None, MISSING_FIELDS_MESSAGE
+
+    try:
+        barcode = parse_barcode(data.get('barcode'))
+    except ValueError:
+        return None, INVALID_BARCODE_MESSAGE
+
+    try:
+        expiration_date = parse_expiration_date(data.get('expiration_date'))
+    except ValueError:
+        return None, INVALID_DATE_MESSAGE
+
+    try:
+        amount = _number(data.get('amount'), float)
+        room_id = _number(data.get('room_id'), int)
+        space_id = _number(data.get('space_id'), int)
+    except (TypeError, ValueError):
+        return None, INVALID_NUMBER_MESSAGE
+
+    if not is_known_unit(data.get('unit')):
+        return None, INVALID_UNIT_MESSAGE
+
+    return {
+        'name': data.get('name'),
+        'cas_number': data.get('cas_number'),
+        'barcode': barcode,
+        'room_id': room_id,
+        'space_id': space_id,
+        'amount': amount,
+        'unit': data.get('unit'),
+        'expiration_date': expiration_date,
+        'total_weight_lbs': total_weight_lbs(amount, data.get('unit'), data.get('cas_number')),
+    }, None
@@ -4,16 +4,43 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_restful import Api
 from flask_migrate import Migrate
 from db_models.models import db  
+from db_models.engine import (
+    database_uri_from_env, engine_options_from_env, sqlite_pragmas_from_env, install_sqlite_pragmas
+)
 from api.routes import initialize_routes  
 from flask_bcrypt import Bcrypt
+from logging_config import configure_logging
+from api.auth import secret_key_from_env
+from instrumentation import init_instrumentation
+from db_models.reference import building_names
+from compression import init_compression
+from api.serializers import FastJSONProvider
+from commands import init_commands
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # orjson when installed
+configure_logging(app)  # LOG_LEVEL=DEBUG for verbose request logging
 bcrypt = Bcrypt(app)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(app.instance_path, 'chemicals.db') 
+# Signs session tokens; must be set (and identical on every worker/host) in production
+app.config['SECRET_KEY'] = secret_key_from_env(debug=app.debug or __name__ == '__main__')
+app.config['ACCESS_TOKEN_MAX_AGE'] = int(os.environ.get('ACCESS_TOKEN_MAX_AGE', 60 * 60))
+app.config['REFRESH_TOKEN_MAX_AGE'] = int(os.environ.get('REFRESH_TOKEN_MAX_AGE', 30 * 24 * 60 * 60))
+# DATABASE_URL selects the backend (e.g. postgresql://...); defaults to the local SQLite file
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri_from_env('sqlite:///' + os.path.join(app.instance_path, 'chemicals.db'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['CHEMICALS_PAGE_SIZE'] = int(os.environ.get('CHEMICALS_PAGE_SIZE', 100))  # Default page size for chemical lists
+app.config['CHEMICALS_MAX_PAGE_SIZE'] = int(os.environ.get('CHEMICALS_MAX_PAGE_SIZE', 1000))
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_env()  # DB_POOL_SIZE, DB_MAX_OVERFLOW, ...
+app.config['SQLITE_PRAGMAS'] = sqlite_pragmas_from_env()
 
 db.init_app(app)
+with app.app_context():
+    install_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+    init_instrumentation(app, db.engine)  # /metrics, SLOW_QUERY_MS, SERVER_TIMING=1
+    building_names.preload()
+init_compression(app)  # gzip/brotli for JSON responses over COMPRESS_MIN_SIZE bytes
 migrate = Migrate(app, db)  # Initialize Flask-Migrate with the app and db
+init_commands(app)  # flask backfill-weights, ...
 
 # Initialize the API
 api = Api(app)
@@ -0,0 +1,44 @@
+import click
+from db_models.models import db
+from db_models.units import BACKFILL_CHUNK_SIZE, backfill_total_weights
+from api.expiration import DEFAULT_WINDOW_DAYS, refresh_expiration_digests
+from api.jobs import WORKER_POLL_SECONDS, run_worker
+from db_models.data_migrations import DEFAULT_CHUNK_SIZE
+from update_database import DATA_MIGRATIONS, print_report, update_database
+
+# --- Maintenance commands (flask <command>) ---
+
+
+def init_commands(app):
+    @app.cli.command('backfill-weights')
+    @click.option('--chunk-size', default=BACKFILL_CHUNK_SIZE, show_default=True, help='Chemicals per UPDATE / transaction.')
+    def backfill_weights(chunk_size):
+        """Recompute total_weight_lbs for every chemical from its amount and unit."""
+        result = backfill_total_weights(db.session, chunk_size)
+        click.echo(f"Updated {result['updated']} chemicals.")
+        if result['unknown_unit']:
+            click.echo(f"Skipped {result['unknown_unit']} chemicals with an unknown unit.")
+
+    @app.cli.command('expiration-digest')
+    @click.option('--days', default=DEFAULT_WINDOW_DAYS, show_default=True, help='Report chemicals expiring within this many days.')
+    def expiration_digest(days):
+        """Precompute every PI's expiring-chemicals digest (run daily, e.g. from cron)."""
+        count = refresh_expiration_digests(db.session, days)
+        click.echo(f"Wrote {count} expiration digests.")
+
+    @app.cli.command('jobs-worker')
+    @click.option('--poll-seconds', default=WORKER_POLL_SECONDS, show_default=True, help='Idle wait between queue checks.')
+    @click.option('--once', is_flag=True, help='Exit when the queue is empty.')
+    def jobs_worker(poll_seconds, once):
+        """Run queued background jobs (see api.jobs)."""
+        run_worker(poll_seconds, once)
+
+    @app.cli.command('data-migrate')
+    @click.argument('names', nargs=-1, type=click.Choice([migration.name for migration in DATA_MIGRATIONS]))
+    @click.option('--dry-run', is_flag=True, help='Report what would change without writing.')
+    @click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True, help='Rows per chunk / transaction.')
+    @click.option('--rerun', is_flag=True, help='Run migrations that already finished again.')
+    def data_migrate(names, dry_run, chunk_size, rerun):
+        """Run the data migrations in update_database.py (all, or NAMES), resuming interrupted ones."""
+        for report in update_database(chunk_size, dry_run, rerun, names):
+            print_report(report)
@@ -0,0 +1,54 @@
+import gzip
+import os
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+# --- Response compression ---
+#
+# JSON / text responses above COMPRESS_MIN_SIZE bytes are compressed with
+# brotli (when the brotli package is installed and the client accepts "br")
+# or gzip. Streamed responses (exports, ?stream=1 listings) and responses that
+# already carry a Content-Encoding are left alone.
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+def choose_encoding(accept_encodings):
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def init_compression(app):
+    min_size = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    gzip_level = int(os.environ.get('COMPRESS_LEVEL', 6))
+    brotli_quality = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or not (response.mimetype or '').startswith(COMPRESSIBLE_MIMETYPES)):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        if encoding == 'br':
+            data = brotli.compress(data, quality=brotli_quality)
+        else:
+            data = gzip.compress(data, compresslevel=gzip_level)
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,102 @@
+import abc
+import json
+import logging
+import time
+from datetime import datetime
+from db_models.models import DataMigrationCheckpoint
+
+# --- Resumable data migrations ---
+#
+# A data migration is a named change to existing rows, applied in chunks.
+# Subclasses implement two methods:
+#   pending(session, after, limit)  the next `limit` keys (ids, codes, ...)
+#                                   still needing the change, in key order,
+#                                   after `after`. Found with set-based queries.
+#   apply(session, keys)            change those rows. It must not commit and
+#                                   returns how many rows changed.
+#
+# run_data_migration() commits each chunk together with its checkpoint (the
+# last key handled). An interrupted run therefore resumes after the last
+# committed chunk, and a finished migration is skipped unless rerun. The
+# write lock is held for one chunk at a time. With dry_run nothing is written;
+# the report lists what would change.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DRY_RUN_SAMPLE_SIZE = 20
+
+
+class DataMigration(abc.ABC):
+    name = None
+    description = ''
+
+    @abc.abstractmethod
+    def pending(self, session, after, limit):
+        """The next `limit` keys after `after` that still need the change, in key order."""
+
+    @abc.abstractmethod
+    def apply(self, session, keys):
+        """Change the rows for `keys` without committing; returns how many changed."""
+
+
+def checkpoint_for(session, name):
+    checkpoint = session.get(DataMigrationCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = DataMigrationCheckpoint(name=name, applied=0)
+        session.add(checkpoint)
+    return checkpoint
+
+
+def run_data_migration(session, migration, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, rerun=False, progress=None):
+    """
+    Apply `migration` chunk by chunk; returns a report dict. `progress(report)`
+    is called after each chunk.
+    """
+    started = time.perf_counter()
+    checkpoint = session.get(DataMigrationCheckpoint, migration.name)
+    report = {'name': migration.name, 'dry_run': dry_run, 'chunks': 0, 'changed': 0, 'skipped': False}
+    if dry_run:
+        report['planned'] = []
+
+    if checkpoint is not None and checkpoint.finished_at is not None and not rerun:
+        report['skipped'] = True
+        report['seconds'] = round(time.perf_counter() - started, 3)
+        return report
+
+    resume = checkpoint is not None and checkpoint.finished_at is None and checkpoint.position is not None
+    after = json.loads(checkpoint.position) if resume else None
+    if not dry_run:
+        checkpoint = checkpoint_for(session, migration.name)
+        if not resume:
+            checkpoint.applied = 0
+        checkpoint.finished_at = None
+
+    while True:
+        keys = migration.pending(session, after, chunk_size)
+        if not keys:
+            break
+        report['chunks'] += 1
+        after = keys[-1]
+        if dry_run:
+            report['changed'] += len(keys)
+            if len(report['planned']) < DRY_RUN_SAMPLE_SIZE:
+                report['planned'].extend(keys[:DRY_RUN_SAMPLE_SIZE - len(report['planned'])])
+        else:
+            changed = migration.apply(session, keys)
+            checkpoint.position = json.dumps(after)
+            checkpoint.applied += changed
+            session.commit()
+            report['changed'] += changed
+        if progress is not None:
+            progress(report)
+
+    if not dry_run:
+        checkpoint.position = None
+        checkpoint.finished_at = datetime.utcnow()
+        session.commit()
+    else:
+        session.rollback()
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    logger.info("Data migration %s: %s", migration.name, report)
+    return report
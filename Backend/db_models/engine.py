@@ -0,0 +1,72 @@
+import os
+from sqlalchemy import event
+
+# --- Engine configuration ---
+#
+# The database URL, pool options and SQLite pragmas are read from the
+# environment so production (gunicorn with several workers, or several app
+# hosts sharing one PostgreSQL database) can be tuned without code changes.
+
+# WAL lets readers run concurrently with a writer; busy_timeout makes writers
+# wait for the lock instead of failing with "database is locked".
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,         # milliseconds
+    'mmap_size': 268435456,       # 256 MiB
+    'cache_size': -65536,         # negative = KiB, i.e. 64 MiB per connection
+    'temp_store': 'MEMORY',
+}
+
+# environment variable -> (create_engine keyword, type)
+ENGINE_OPTION_VARIABLES = {
+    'DB_POOL_SIZE': ('pool_size', int),
+    'DB_MAX_OVERFLOW': ('max_overflow', int),
+    'DB_POOL_TIMEOUT': ('pool_timeout', int),
+    'DB_POOL_RECYCLE': ('pool_recycle', int),
+    'DB_POOL_PRE_PING': ('pool_pre_ping', lambda value: value.lower() in ('1', 'true', 'yes')),
+}
+
+
+def database_uri_from_env(default, environ=os.environ):
+    """
+    SQLALCHEMY_DATABASE_URI from DATABASE_URL, falling back to `default`.
+    Heroku-style postgres:// URLs are rewritten to the postgresql:// scheme
+    SQLAlchemy expects.
+    """
+    uri = environ.get('DATABASE_URL') or default
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options_from_env(environ=os.environ):
+    """Build SQLALCHEMY_ENGINE_OPTIONS from DB_POOL_* environment variables."""
+    options = {}
+    for variable, (option, cast) in ENGINE_OPTION_VARIABLES.items():
+        if environ.get(variable):
+            options[option] = cast(environ[variable])
+    return options
+
+
+def sqlite_pragmas_from_env(environ=os.environ):
+    """Default pragmas, each overridable with SQLITE_<PRAGMA NAME>, e.g. SQLITE_BUSY_TIMEOUT=10000."""
+    pragmas = dict(DEFAULT_SQLITE_PRAGMAS)
+    for name in pragmas:
+        value = environ.get(f'SQLITE_{name.upper()}')
+        if value:
+            pragmas[name] = value
+    return pragmas
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Apply `pragmas` to every new connection of a SQLite engine."""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
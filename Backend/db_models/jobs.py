@@ -0,0 +1,121 @@
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from db_models.models import db, Job
+
+# --- Background job queue ---
+#
+# Heavy operations are stored as rows of the job table and run by separate
+# worker processes (`flask jobs-worker`, started next to gunicorn), so the
+# request that submits them returns at once.
+#
+# A worker claims the oldest queued job with a conditional UPDATE (only one
+# worker can move it from queued to running). Handlers report progress
+# between chunks of work. That also refreshes the heartbeat and is where a
+# requested cancellation takes effect. Running jobs whose heartbeat is older
+# than the stale timeout (a worker that died) are queued again.
+#
+# Queue bookkeeping uses its own short transactions on the engine, never the
+# handler's session, so progress is visible while the handler works.
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+STATUSES = (QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def enqueue(session, kind, params):
+    """Add a job and commit; returns it."""
+    job = Job(kind=kind, status=QUEUED, params=json.dumps(params))
+    session.add(job)
+    session.commit()
+    return job
+
+
+def claim_next(worker):
+    """Mark the oldest queued job as running for `worker`; returns (id, kind, params) or None."""
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        while True:
+            job_id = conn.execute(
+                select(Job.id).where(Job.status == QUEUED).order_by(Job.id).limit(1)
+            ).scalar()
+            if job_id is None:
+                return None
+            claimed = conn.execute(
+                update(Job).where(Job.id == job_id, Job.status == QUEUED)
+                .values(status=RUNNING, worker=worker, started_at=now, heartbeat_at=now)
+            ).rowcount
+            if claimed:
+                kind, params = conn.execute(select(Job.kind, Job.params).where(Job.id == job_id)).one()
+                return job_id, kind, json.loads(params)
+
+
+def report_progress(job_id, done, total=None):
+    """Record progress; raises JobCancelled if cancellation was requested."""
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(Job).where(Job.id == job_id)
+            .values(progress_done=done, progress_total=total, heartbeat_at=datetime.utcnow())
+        )
+        cancel = conn.execute(select(Job.cancel_requested).where(Job.id == job_id)).scalar()
+    if cancel:
+        raise JobCancelled()
+
+
+def finish(job_id, status, result=None, error=None):
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(Job).where(Job.id == job_id).values(
+                status=status,
+                result=json.dumps(result) if result is not None else None,
+                error=error,
+                finished_at=datetime.utcnow()
+            )
+        )
+
+
+def request_cancel(session, job_id):
+    """
+    Cancel a queued job at once, or ask a running one to stop at its next
+    progress report. Returns the job, or None if there is no such job.
+    """
+    # Conditional updates, so a worker claiming the job concurrently is not overwritten
+    session.execute(
+        update(Job).where(Job.id == job_id, Job.status == QUEUED)
+        .values(status=CANCELLED, cancel_requested=True, finished_at=datetime.utcnow())
+    )
+    session.execute(update(Job).where(Job.id == job_id, Job.status == RUNNING).values(cancel_requested=True))
+    session.commit()
+    return session.get(Job, job_id, populate_existing=True)
+
+
+def requeue_stale(stale_seconds):
+    """Queue running jobs again whose worker stopped reporting; returns how many."""
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_seconds)
+    with db.engine.begin() as conn:
+        return conn.execute(
+            update(Job).where(Job.status == RUNNING, Job.heartbeat_at < cutoff)
+            .values(status=QUEUED, worker=None)
+        ).rowcount
+
+
+def job_status(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': {'done': job.progress_done, 'total': job.progress_total},
+        'cancel_requested': job.cancel_requested,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -8,7 +8,8 @@ bcrypt = Bcrypt()
 # Association table for User and PI many-to-many relationship
 user_pi = db.Table('user_pi',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('pi_id', db.Integer, db.ForeignKey('pi.id'), primary_key=True)
+    db.Column('pi_id', db.Integer, db.ForeignKey('pi.id'), primary_key=True),
+    db.Index('ix_user_pi_pi_id', 'pi_id')  # PI -> users lookups (the PK covers user -> PIs)
 )
 
 class User(db.Model):
@@ -43,38 +44,114 @@ class PI(db.Model):
 
 class Building(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(80), nullable=False)
+    name = db.Column(db.String(80), nullable=False, index=True)
     rooms = db.relationship('Room', backref='building', lazy=True)
 
 class Room(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    building_id = db.Column(db.Integer, db.ForeignKey('building.id'), nullable=False)
+    building_id = db.Column(db.Integer, db.ForeignKey('building.id'), nullable=False, index=True)
     room_number = db.Column(db.String(10), nullable=False)
-    pi_id = db.Column(db.Integer, db.ForeignKey('pi.id'), nullable=False)
+    pi_id = db.Column(db.Integer, db.ForeignKey('pi.id'), nullable=False, index=True)
     contact_name = db.Column(db.String(80), nullable=True)
     contact_phone = db.Column(db.String(15), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)  # Set by db_models.versioning
     spaces = db.relationship('Space', backref='room', lazy=True)
     chemicals = db.relationship('Chemical', backref='room', lazy=True)
 
 class Space(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False, index=True)
     description = db.Column(db.String(200), nullable=True)
     space_type = db.Column(db.String(50), nullable=True)
     space_id = db.Column(db.String(50), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
 
 class Chemical(db.Model):
+    __table_args__ = (
+        # Covers room_id lookups on its own and per-room listings ordered by name
+        db.Index('ix_chemical_room_id_name', 'room_id', 'name'),
+        # Delta sync: rows of a room changed since a version
+        db.Index('ix_chemical_room_id_version', 'room_id', 'version'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    cas_number = db.Column(db.String(50), nullable=False)
+    cas_number = db.Column(db.String(50), nullable=False, index=True)
     barcode = db.Column(db.String(10), unique=True, nullable=False, default='')
     room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
-    space_id = db.Column(db.Integer, db.ForeignKey('space.id'), nullable=True)  # Foreign key to Space
+    space_id = db.Column(db.Integer, db.ForeignKey('space.id'), nullable=True, index=True)  # Foreign key to Space
     amount = db.Column(db.Float, nullable=False)
     unit = db.Column(db.String(10), nullable=False)
-    expiration_date = db.Column(db.DateTime, nullable=True)
+    expiration_date = db.Column(db.DateTime, nullable=True, index=True)
     date_added = db.Column(db.DateTime, default=datetime.utcnow)
     total_weight_lbs = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     space = db.relationship('Space', backref='chemicals', lazy=True)
 
-    
+# Chemical count and weight per (room, space type), kept current by db_models.summary
+class InventorySummary(db.Model):
+    __tablename__ = 'inventory_summary'
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), primary_key=True)
+    space_type = db.Column(db.String(50), primary_key=True, default='')  # '' for chemicals without a space type
+    chemical_count = db.Column(db.Integer, nullable=False, default=0)
+    total_weight_lbs = db.Column(db.Float, nullable=False, default=0.0)
+
+# Precomputed expiring-chemicals report per PI, refreshed by `flask expiration-digest`
+class ExpirationDigest(db.Model):
+    __tablename__ = 'expiration_digest'
+    pi_id = db.Column(db.Integer, db.ForeignKey('pi.id'), primary_key=True)
+    generated_at = db.Column(db.DateTime, nullable=False)
+    window_days = db.Column(db.Integer, nullable=False)
+    expired_count = db.Column(db.Integer, nullable=False, default=0)
+    expiring_count = db.Column(db.Integer, nullable=False, default=0)
+    payload = db.Column(db.Text, nullable=False)  # JSON: rooms and their expired / expiring chemicals
+
+# Background job queue (see db_models.jobs); worker processes run `flask jobs-worker`
+class Job(db.Model):
+    __table_args__ = (
+        # Workers claim the oldest queued job
+        db.Index('ix_job_status_id', 'status', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed, cancelled
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    result = db.Column(db.Text, nullable=True)  # JSON
+    error = db.Column(db.Text, nullable=True)
+    progress_done = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer, nullable=True)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    worker = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+# Progress of resumable data migrations (see db_models.data_migrations)
+class DataMigrationCheckpoint(db.Model):
+    __tablename__ = 'data_migration'
+    name = db.Column(db.String(100), primary_key=True)
+    position = db.Column(db.Text, nullable=True)  # JSON key of the last row handled
+    applied = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+# Named, monotonically increasing change counters (see db_models.versioning)
+class VersionCounter(db.Model):
+    __tablename__ = 'version_counter'
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+# Records deleted (or moved) rows so delta-sync clients can drop them
+class Tombstone(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    room_id = db.Column(db.Integer, nullable=True, index=True)  # Room the chemical / space was in
+    pi_id = db.Column(db.Integer, nullable=True, index=True)    # PI the room belonged to
+    version = db.Column(db.Integer, nullable=False, index=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
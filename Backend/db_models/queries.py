@@ -0,0 +1,129 @@
+from sqlalchemy.orm import joinedload, selectinload
+from db_models.models import db, user_pi, Chemical, PI, Room, User
+from db_models.reference import building_names
+
+# --- Shared query layer ---
+#
+# Resources that render a chemical together with its room / building / space
+# (or a PI together with its rooms) go through these helpers so the related rows
+# are fetched in the same query instead of one lookup per result row.
+
+
+def with_location(query):
+    """Eager-load room and space for every Chemical in `query` (building names come from building_names)."""
+    return query.options(
+        joinedload(Chemical.room),
+        joinedload(Chemical.space)
+    )
+
+
+# Stay under SQLite's default limit on bound parameters per statement
+IN_CLAUSE_CHUNK_SIZE = 900
+
+
+def chemicals_by_barcodes(barcodes, query=None):
+    """
+    Return {barcode: row} in one query per 900 barcodes. `query` defaults to
+    Chemical entities with locations loaded; a column query (api.serializers)
+    returns plain rows instead.
+    """
+    query = with_location(Chemical.query) if query is None else query
+    barcodes = list(barcodes)
+    found = {}
+    for start in range(0, len(barcodes), IN_CLAUSE_CHUNK_SIZE):
+        chunk = barcodes[start:start + IN_CLAUSE_CHUNK_SIZE]
+        for row in query.filter(Chemical.barcode.in_(chunk)):
+            found[row.barcode] = row
+    return found
+
+
+def rooms_for_pis(pi_ids):
+    """Return {pi_id: [Room, ...]} for the given PIs."""
+    rooms_by_pi = {pi_id: [] for pi_id in pi_ids}
+    if not rooms_by_pi:
+        return rooms_by_pi
+    rooms = (
+        Room.query
+        .filter(Room.pi_id.in_(rooms_by_pi.keys()))
+        .order_by(Room.id)
+        .all()
+    )
+    for room in rooms:
+        rooms_by_pi[room.pi_id].append(room)
+    return rooms_by_pi
+
+
+def room_with_details(room_id):
+    """Load a room with its spaces."""
+    return (
+        Room.query.options(selectinload(Room.spaces))
+        .filter_by(id=room_id)
+        .first()
+    )
+
+
+def pis_with_rooms():
+    return PI.query.options(selectinload(PI.rooms)).all()
+
+
+def user_with_pi_rooms(user_id):
+    return (
+        User.query.options(selectinload(User.pis).selectinload(PI.rooms))
+        .filter_by(id=user_id)
+        .first()
+    )
+
+
+def users_with_pis():
+    return User.query.options(selectinload(User.pis)).all()
+
+
+def building_name(room, default="Unknown"):
+    return building_names.name(room.building_id, default) if room is not None else default
+
+
+def room_summary(room):
+    """The room entry used in login / PI responses."""
+    return {
+        "room_id": room.id,
+        "room_number": room.room_number,
+        "building_name": building_name(room)
+    }
+
+
+def pi_room_tree(pis):
+    """Build the PI -> rooms -> building structure returned at login."""
+    rooms_by_pi = rooms_for_pis([pi.id for pi in pis])
+    return [
+        {
+            "pi_id": pi.id,
+            "pi_name": pi.name,
+            "rooms": [room_summary(room) for room in rooms_by_pi[pi.id]]
+        }
+        for pi in pis
+    ]
+
+
+def room_ids_by_pi(user_id=None, pi_id=None):
+    """
+    Return {pi_id: [room_id, ...]} for the rooms a user (through user_pi) or a
+    single PI may access, in one query.
+    """
+    if user_id is not None:
+        # Outer join so PIs without rooms still show up (with no rooms)
+        query = (
+            db.session.query(user_pi.c.pi_id, Room.id)
+            .select_from(user_pi)
+            .outerjoin(Room, Room.pi_id == user_pi.c.pi_id)
+            .filter(user_pi.c.user_id == user_id)
+        )
+        rooms = {}
+    else:
+        query = db.session.query(Room.pi_id, Room.id).filter(Room.pi_id == pi_id)
+        rooms = {pi_id: []}
+
+    for room_pi_id, room_id in query.order_by(Room.id):
+        pi_rooms = rooms.setdefault(room_pi_id, [])
+        if room_id is not None:
+            pi_rooms.append(room_id)
+    return rooms
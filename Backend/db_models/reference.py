@@ -0,0 +1,72 @@
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from sqlalchemy.exc import SQLAlchemyError
+from db_models.models import db, Building
+from db_models.versioning import current_version
+
+# --- Building reference data ---
+#
+# The building list (~110 codes) almost never changes, so every process keeps
+# an immutable id -> name map and resolves building names from it instead of
+# joining / querying the building table per room. The map is swapped as a
+# whole, so readers never see a half-built one.
+#
+# Writes bump the "building" change counter (db_models.versioning). The worker
+# that handled the write reloads at once; other gunicorn workers compare the
+# counter at most every BUILDING_CACHE_CHECK_SECONDS and reload when it moved.
+
+logger = logging.getLogger(__name__)
+
+BUILDING_COUNTER = Building.__tablename__
+DEFAULT_CHECK_SECONDS = 30
+
+
+class BuildingNames:
+    def __init__(self, check_seconds=DEFAULT_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self.names = MappingProxyType({})
+        self.version = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def load(self):
+        """(Re)load the map from the database."""
+        with self.lock:
+            version = current_version(db.session, BUILDING_COUNTER)
+            rows = db.session.query(Building.id, Building.name).order_by(Building.id).all()
+            self.names = MappingProxyType(dict(rows))
+            self.version = version
+            self.checked_at = time.monotonic()
+        logger.debug("Loaded %d building names at version %s", len(rows), version)
+
+    def preload(self):
+        """Load at startup; a database without tables yet (before `flask db upgrade`) is loaded on first use."""
+        try:
+            self.load()
+        except SQLAlchemyError:
+            db.session.rollback()
+            logger.info("Building names not preloaded; they will load on first use")
+
+    def current(self):
+        """The id -> name map, reloaded if another process changed the buildings."""
+        if self.version is None:
+            self.load()
+        elif time.monotonic() - self.checked_at > self.check_seconds:
+            self.checked_at = time.monotonic()
+            if current_version(db.session, BUILDING_COUNTER) != self.version:
+                self.load()
+        return self.names
+
+    def name(self, building_id, default="Unknown"):
+        return self.current().get(building_id, default)
+
+    def counter_values(self, names):
+        """Counter values for api.conditional, answered from memory."""
+        self.current()
+        return {name: self.version for name in names}
+
+
+building_names = BuildingNames(int(os.environ.get('BUILDING_CACHE_CHECK_SECONDS', DEFAULT_CHECK_SECONDS)))
@@ -0,0 +1,156 @@
+from sqlalchemy import DDL, event, case, func, literal_column, select, table, column, text, or_
+from db_models.models import db, Chemical
+
+# --- Full-text search index over chemical name / CAS number / barcode ---
+#
+# On SQLite the index is an FTS5 external-content table using the trigram
+# tokenizer, so any substring of 3+ characters is answered from the index
+# instead of scanning the chemical table with '%q%'. Triggers keep it in sync
+# with inserts, updates and deletes (including bulk Core inserts).
+#
+# On PostgreSQL the same columns get pg_trgm GIN indexes, which serve the
+# ILIKE '%q%' search directly; results are ranked with similarity().
+
+FTS_TABLE = 'chemical_fts'
+
+# Trigram tokens are 3 characters long; shorter terms cannot hit the index.
+MIN_INDEXED_TERM_LENGTH = 3
+
+# Migration 7c2e9a41b6d3 holds a frozen copy of these statements. Changing
+# them here also needs a new migration that recreates the index/triggers.
+SEARCH_INDEX_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, cas_number, barcode,
+        content='chemical', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS chemical_fts_ai AFTER INSERT ON chemical BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, cas_number, barcode)
+        VALUES (new.id, new.name, new.cas_number, new.barcode);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS chemical_fts_ad AFTER DELETE ON chemical BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, cas_number, barcode)
+        VALUES ('delete', old.id, old.name, old.cas_number, old.barcode);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS chemical_fts_au AFTER UPDATE OF name, cas_number, barcode ON chemical BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, cas_number, barcode)
+        VALUES ('delete', old.id, old.name, old.cas_number, old.barcode);
+        INSERT INTO {FTS_TABLE}(rowid, name, cas_number, barcode)
+        VALUES (new.id, new.name, new.cas_number, new.barcode);
+    END""",
+]
+
+TRIGRAM_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_chemical_name_trgm ON chemical USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_chemical_cas_number_trgm ON chemical USING gin (cas_number gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_chemical_barcode_trgm ON chemical USING gin (barcode gin_trgm_ops)",
+]
+
+
+def _trigram_extension_available(ddl, target, bind, **kw):
+    if bind.dialect.name != 'postgresql':
+        return False
+    return bind.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first() is not None
+
+
+# Make db.create_all() build the index alongside the chemical table.
+for statement in SEARCH_INDEX_DDL:
+    event.listen(Chemical.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in TRIGRAM_INDEX_DDL:
+    event.listen(Chemical.__table__, 'after_create', DDL(statement).execute_if(callable_=_trigram_extension_available))
+
+
+FTS5 = 'fts5'
+TRIGRAM = 'trigram'
+
+# Backend detected per database URL, so searches skip the catalog lookup.
+_search_backends = {}
+
+
+def search_backend():
+    """Return FTS5, TRIGRAM or None depending on which index the current database has."""
+    bind = db.session.get_bind()
+    if bind.url in _search_backends:
+        return _search_backends[bind.url]
+
+    backend = None
+    if bind.dialect.name == 'sqlite':
+        found = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE}
+        ).first()
+        backend = FTS5 if found is not None else None
+    elif bind.dialect.name == 'postgresql':
+        found = db.session.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+        backend = TRIGRAM if found is not None else None
+
+    # Only remember positive results so a later migration is picked up
+    if backend is not None:
+        _search_backends[bind.url] = backend
+    return backend
+
+
+def rebuild_search_index():
+    """Repopulate the FTS5 index from the chemical table (SQLite only)."""
+    if search_backend() != FTS5:
+        return
+    db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    db.session.commit()
+
+
+def _fts_phrase(term):
+    # Quote the term as a single FTS5 phrase so punctuation (e.g. the dashes in
+    # CAS numbers) is matched literally rather than parsed as query syntax.
+    return '"' + term.replace('"', '""') + '"'
+
+
+def search_chemicals(term, room_ids=None):
+    """
+    Build a Chemical query matching `term` against name, CAS number or barcode,
+    restricted to `room_ids` when given. Matches are ranked: barcode / CAS / name
+    prefix matches first, then by FTS relevance (or trigram similarity).
+    """
+    term = (term or '').strip()
+    query = Chemical.query
+    if room_ids is not None:
+        query = query.filter(Chemical.room_id.in_(room_ids))
+
+    if not term:
+        return query.order_by(Chemical.id)
+
+    prefix = f"{term}%"
+    prefix_rank = case(
+        (or_(Chemical.barcode.ilike(prefix), Chemical.cas_number.ilike(prefix), Chemical.name.ilike(prefix)), 0),
+        else_=1
+    )
+
+    backend = search_backend()
+    if len(term) >= MIN_INDEXED_TERM_LENGTH and backend == FTS5:
+        fts = table(FTS_TABLE, column('rowid'))
+        matches = (
+            select(fts.c.rowid.label('chemical_id'), literal_column(f'bm25({FTS_TABLE})').label('score'))
+            .select_from(fts)
+            .where(text(f'{FTS_TABLE} MATCH :fts_query').bindparams(fts_query=_fts_phrase(term)))
+            .subquery()
+        )
+        return (
+            query.join(matches, Chemical.id == matches.c.chemical_id)
+            .order_by(prefix_rank, matches.c.score, Chemical.id)
+        )
+
+    # Substring match: GIN-indexed on PostgreSQL with pg_trgm, otherwise a scan
+    # (short terms, or no index on this backend).
+    pattern = f"%{term}%"
+    query = query.filter(or_(
+        Chemical.name.ilike(pattern),
+        Chemical.cas_number.ilike(pattern),
+        Chemical.barcode.ilike(pattern)
+    ))
+    if backend == TRIGRAM:
+        similarity = func.greatest(
+            func.similarity(Chemical.name, term),
+            func.similarity(Chemical.cas_number, term),
+            func.similarity(Chemical.barcode, term)
+        )
+        return query.order_by(prefix_rank, similarity.desc(), Chemical.id)
+    return query.order_by(prefix_rank, Chemical.name, Chemical.id)
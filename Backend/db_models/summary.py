@@ -0,0 +1,139 @@
+from collections import defaultdict
+from sqlalchemy import event, func, inspect, insert, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from db_models.models import Chemical, InventorySummary, Space
+from db_models.versioning import previous_values
+
+# --- Incrementally maintained inventory summary ---
+#
+# inventory_summary holds COUNT and SUM(total_weight_lbs) of chemicals per
+# (room, space type). Dashboards aggregate those rows (a few per room) by room,
+# PI, building or space type instead of scanning every chemical.
+#
+# A before_flush hook turns chemical inserts, edits and deletes, and space
+# type changes, into per-key deltas and applies them with one upsert
+# per key in the same transaction. Core bulk inserts (api.bulk_ingest) call
+# apply_deltas() themselves. rebuild_inventory_summary() recomputes the table
+# from scratch (used by the migration, and to repair after raw SQL writes).
+
+# Chemical columns that move a chemical between keys or change its weight
+TRACKED_COLUMNS = ('room_id', 'space_id', 'total_weight_lbs')
+
+
+def space_types(session, space_ids):
+    """{space_id: space_type} for `space_ids`, one query."""
+    space_ids = {space_id for space_id in space_ids if space_id is not None}
+    if not space_ids:
+        return {}
+    with session.no_autoflush:
+        rows = session.execute(select(Space.id, Space.space_type).where(Space.id.in_(space_ids))).all()
+    return dict(rows)
+
+
+def _key(room_id, space_type):
+    return room_id, space_type or ''
+
+
+def deltas_for_rows(session, rows, sign=1):
+    """Deltas for chemical rows (dicts with room_id, space_id, total_weight_lbs and optionally space_type)."""
+    types = space_types(session, [row.get('space_id') for row in rows])
+    deltas = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        space_type = row['space_type'] if 'space_type' in row else types.get(row.get('space_id'))
+        delta = deltas[_key(row['room_id'], space_type)]
+        delta[0] += sign
+        delta[1] += sign * (row.get('total_weight_lbs') or 0.0)
+    return deltas
+
+
+def apply_deltas(session, deltas):
+    """Add {(room_id, space_type): [count, weight]} deltas to the summary table."""
+    dialect = session.get_bind().dialect.name
+    for (room_id, space_type), (count, weight) in sorted(deltas.items()):
+        if count == 0 and weight == 0:
+            continue
+        values = dict(room_id=room_id, space_type=space_type, chemical_count=count, total_weight_lbs=weight)
+        if dialect in ('sqlite', 'postgresql'):
+            upsert = (sqlite.insert if dialect == 'sqlite' else postgresql.insert)(InventorySummary).values(**values)
+            session.execute(upsert.on_conflict_do_update(
+                index_elements=[InventorySummary.room_id, InventorySummary.space_type],
+                set_={
+                    'chemical_count': InventorySummary.chemical_count + count,
+                    'total_weight_lbs': InventorySummary.total_weight_lbs + weight,
+                }
+            ))
+        else:
+            row = session.get(InventorySummary, (room_id, space_type))
+            if row is None:
+                session.execute(insert(InventorySummary).values(**values))
+            else:
+                row.chemical_count += count
+                row.total_weight_lbs += weight
+
+
+@event.listens_for(Session, 'before_flush')
+def track_inventory_changes(session, flush_context, instances):
+    added, removed = [], []
+    retyped_spaces = []
+    for obj in session.new:
+        if isinstance(obj, Chemical):
+            added.append(_chemical_values(obj))
+    for obj in session.deleted:
+        if isinstance(obj, Chemical):
+            removed.append(previous_values(session, obj, TRACKED_COLUMNS))
+    for obj in session.dirty:
+        state = inspect(obj)
+        if isinstance(obj, Chemical):
+            if any(state.attrs[column].history.has_changes() for column in TRACKED_COLUMNS):
+                removed.append(previous_values(session, obj, TRACKED_COLUMNS))
+                added.append(_chemical_values(obj))
+        elif isinstance(obj, Space) and obj.id is not None:
+            if state.attrs['space_type'].history.has_changes():
+                old_type = previous_values(session, obj, ['space_type'])['space_type']
+                retyped_spaces.append((obj, old_type))
+
+    if not added and not removed and not retyped_spaces:
+        return
+
+    deltas = deltas_for_rows(session, added)
+    for key, (count, weight) in deltas_for_rows(session, removed, sign=-1).items():
+        deltas[key][0] += count
+        deltas[key][1] += weight
+
+    # A space changing type moves all of its (unchanged) chemicals at once
+    for space, old_type in retyped_spaces:
+        with session.no_autoflush:
+            per_room = session.execute(
+                select(Chemical.room_id, func.count(Chemical.id), func.coalesce(func.sum(Chemical.total_weight_lbs), 0.0))
+                .where(Chemical.space_id == space.id)
+                .group_by(Chemical.room_id)
+            ).all()
+        for room_id, count, weight in per_room:
+            deltas[_key(room_id, old_type)][0] -= count
+            deltas[_key(room_id, old_type)][1] -= weight
+            deltas[_key(room_id, space.space_type)][0] += count
+            deltas[_key(room_id, space.space_type)][1] += weight
+
+    apply_deltas(session, deltas)
+
+
+def _chemical_values(chemical):
+    values = {column: getattr(chemical, column) for column in TRACKED_COLUMNS}
+    if values['space_id'] is None and chemical.space is not None:
+        # Space added in the same flush: no id yet, read its type directly
+        values['space_type'] = chemical.space.space_type
+    return values
+
+
+def rebuild_inventory_summary(session):
+    """Recompute the whole summary table from the chemical table."""
+    space_type = func.coalesce(Space.space_type, '')
+    session.execute(delete(InventorySummary))
+    session.execute(insert(InventorySummary).from_select(
+        ['room_id', 'space_type', 'chemical_count', 'total_weight_lbs'],
+        select(Chemical.room_id, space_type, func.count(Chemical.id), func.sum(Chemical.total_weight_lbs))
+        .select_from(Chemical)
+        .outerjoin(Space, Chemical.space_id == Space.id)
+        .group_by(Chemical.room_id, space_type)
+    ))
@@ -0,0 +1,172 @@
+from sqlalchemy import and_, case, func, literal, or_, select, update
+from db_models.models import Chemical, Space
+from db_models.summary import apply_deltas
+from db_models.versioning import bump_counters, next_version, room_counter
+
+# --- Unit conversion ---
+#
+# total_weight_lbs is derived from amount + unit (+ the chemical's density for
+# volumes). Every write path converts through to_pounds(), and the backfill
+# below uses pounds_expression(), the same registry rendered as a SQL
+# expression, so stored values match whichever path wrote them.
+#
+# Volumes are converted with the density of the chemical's CAS number when it
+# is listed below, and with the density of water (1 g/mL) otherwise.
+
+LB_PER_G = 1 / 453.59237
+
+# unit (lower case) -> pounds per unit
+MASS_UNITS = {
+    'lb': 1.0,
+    'lbs': 1.0,
+    'oz': 1 / 16,
+    'kg': 1000 * LB_PER_G,
+    'g': LB_PER_G,
+    'mg': LB_PER_G / 1000,
+    'ug': LB_PER_G / 1000000,
+    'µg': LB_PER_G / 1000000,
+}
+
+# unit (lower case) -> millilitres per unit
+VOLUME_UNITS = {
+    'l': 1000.0,
+    'ml': 1.0,
+    'ul': 0.001,
+    'µl': 0.001,
+    'gal': 3785.411784,
+    'fl oz': 29.5735295625,
+}
+
+DEFAULT_DENSITY = 1.0  # g/mL (water)
+
+# CAS number -> density in g/mL at room temperature (reagent grade)
+DENSITIES = {
+    '7732-18-5': 1.000,   # water
+    '64-17-5': 0.789,     # ethanol
+    '67-56-1': 0.792,     # methanol
+    '67-63-0': 0.786,     # 2-propanol
+    '67-64-1': 0.784,     # acetone
+    '75-05-8': 0.786,     # acetonitrile
+    '75-09-2': 1.326,     # dichloromethane
+    '67-66-3': 1.489,     # chloroform
+    '110-54-3': 0.659,    # hexane
+    '108-88-3': 0.867,    # toluene
+    '71-43-2': 0.876,     # benzene
+    '141-78-6': 0.902,    # ethyl acetate
+    '60-29-7': 0.713,     # diethyl ether
+    '109-99-9': 0.889,    # tetrahydrofuran
+    '67-68-5': 1.100,     # dimethyl sulfoxide
+    '68-12-2': 0.944,     # N,N-dimethylformamide
+    '110-86-1': 0.982,    # pyridine
+    '56-81-5': 1.261,     # glycerol
+    '64-19-7': 1.049,     # acetic acid, glacial
+    '7664-93-9': 1.830,   # sulfuric acid, 95-98%
+    '7439-97-6': 13.534,  # mercury
+}
+
+
+class UnitError(ValueError):
+    pass
+
+
+def normalize_unit(unit):
+    return (unit or '').strip().lower()
+
+
+def is_known_unit(unit):
+    unit = normalize_unit(unit)
+    return unit in MASS_UNITS or unit in VOLUME_UNITS
+
+
+def density(cas_number):
+    return DENSITIES.get((cas_number or '').strip(), DEFAULT_DENSITY)
+
+
+def pounds_factor(unit, cas_number=None):
+    """Pounds per one `unit` of the chemical with `cas_number`; raises UnitError for unknown units."""
+    unit = normalize_unit(unit)
+    if unit in MASS_UNITS:
+        return MASS_UNITS[unit]
+    if unit in VOLUME_UNITS:
+        return VOLUME_UNITS[unit] * LB_PER_G * density(cas_number)
+    raise UnitError(f"Unknown unit: {unit!r}")
+
+
+def to_pounds(amount, unit, cas_number=None):
+    """Convert `amount` of `unit` to pounds."""
+    return float(amount) * pounds_factor(unit, cas_number)
+
+
+def pounds_expression(amount=Chemical.amount, unit=Chemical.unit, cas_number=Chemical.cas_number):
+    """
+    to_pounds() as a SQL expression over chemical columns; NULL for rows whose
+    unit is not in the registry.
+    """
+    unit = func.lower(func.trim(unit))
+    density_ = case(DENSITIES, value=func.trim(cas_number), else_=literal(DEFAULT_DENSITY))
+    factor = case(
+        {name: literal(factor) for name, factor in MASS_UNITS.items()}
+        | {name: literal(ml * LB_PER_G) * density_ for name, ml in VOLUME_UNITS.items()},
+        value=unit,
+    )
+    return amount * factor
+
+
+# --- Backfill ---
+#
+# `flask backfill-weights` recomputes total_weight_lbs for the whole table with
+# one set-based UPDATE per chunk of ids (no ORM objects are loaded). Only rows
+# whose stored value differs are written; they get a new sync version and
+# their change is added to inventory_summary in the same transaction.
+
+BACKFILL_CHUNK_SIZE = 5000
+
+
+def backfill_total_weights(session, chunk_size=BACKFILL_CHUNK_SIZE, progress=None):
+    """
+    Recompute total_weight_lbs from amount and unit; returns counts of updated
+    and unconvertible rows. `progress(done, total)` is called after each chunk.
+    """
+    pounds = pounds_expression()
+    stale = and_(
+        pounds.isnot(None),
+        or_(Chemical.total_weight_lbs.is_(None), Chemical.total_weight_lbs != pounds),
+    )
+    unknown = session.execute(select(func.count(Chemical.id)).where(pounds.is_(None))).scalar()
+    total = session.execute(select(func.count(Chemical.id))).scalar()
+
+    updated = 0
+    done = 0
+    last_id = 0
+    while True:
+        upper = session.execute(
+            select(Chemical.id).where(Chemical.id > last_id).order_by(Chemical.id)
+            .offset(chunk_size - 1).limit(1)
+        ).scalar()
+        in_chunk = Chemical.id > last_id if upper is None else Chemical.id.between(last_id + 1, upper)
+
+        space_type = func.coalesce(Space.space_type, '')
+        changes = session.execute(
+            select(Chemical.room_id, space_type, func.count(Chemical.id),
+                   func.sum(pounds - func.coalesce(Chemical.total_weight_lbs, 0.0)))
+            .outerjoin(Space, Chemical.space_id == Space.id)
+            .where(in_chunk, stale)
+            .group_by(Chemical.room_id, space_type)
+        ).all()
+        if changes:
+            version = next_version(session)
+            bump_counters(session, {Chemical.__tablename__} | {room_counter(room_id) for room_id, *_ in changes})
+            session.execute(
+                update(Chemical).where(in_chunk, stale).values(total_weight_lbs=pounds, version=version),
+                execution_options={'synchronize_session': False},
+            )
+            apply_deltas(session, {(room_id, space_type): [0, weight] for room_id, space_type, _, weight in changes})
+            updated += sum(count for _, _, count, _ in changes)
+        session.commit()
+        done = total if upper is None else min(done + chunk_size, total)
+        if progress is not None:
+            progress(done, total)
+
+        if upper is None:
+            return {'updated': updated, 'unknown_unit': unknown}
+        last_id = upper
@@ -0,0 +1,154 @@
+from sqlalchemy import DDL, event, inspect, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from db_models.models import db, Chemical, Room, Space, Tombstone, VersionCounter
+
+# --- Row versions for delta sync ---
+#
+# Every flush that inserts, changes or deletes a Chemical, Room or Space takes
+# the next value of the "sync" counter and stamps it on the touched rows.
+# Deleted rows leave a Tombstone with the same version, and so do rows moved to
+# another room / PI, so a client of the old scope learns to drop them. A client
+# that last synced at version N asks for everything with version > N.
+#
+# The same flush also bumps one counter per touched table (named after the
+# table) and one per touched room ("room:<id>", covering the room, its spaces
+# and its chemicals). api.conditional builds ETags from these.
+#
+# Core bulk inserts (api.bulk_ingest) bypass the ORM and call next_version()
+# / bump_counters() themselves.
+
+SYNC_COUNTER = 'sync'
+
+# Versioned model -> the column that decides which sync scope a row belongs to
+VERSIONED_MODELS = {Chemical: 'room_id', Space: 'room_id', Room: 'pi_id'}
+
+event.listen(
+    VersionCounter.__table__, 'after_create',
+    DDL(f"INSERT INTO version_counter (name, value) VALUES ('{SYNC_COUNTER}', 0)")
+)
+
+
+def room_counter(room_id):
+    return f'room:{room_id}'
+
+
+def next_version(session, name=SYNC_COUNTER):
+    """Increment counter `name` in the current transaction and return its new value."""
+    dialect = session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        # Upsert, so concurrent first bumps of a new counter do not collide
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        session.execute(
+            insert(VersionCounter).values(name=name, value=1).on_conflict_do_update(
+                index_elements=[VersionCounter.name], set_={'value': VersionCounter.value + 1})
+        )
+    else:
+        result = session.execute(
+            update(VersionCounter).where(VersionCounter.name == name).values(value=VersionCounter.value + 1)
+        )
+        if result.rowcount == 0:
+            session.execute(VersionCounter.__table__.insert().values(name=name, value=1))
+    return session.execute(
+        db.select(VersionCounter.value).where(VersionCounter.name == name)
+    ).scalar_one()
+
+
+def current_version(session, name=SYNC_COUNTER):
+    value = session.execute(
+        db.select(VersionCounter.value).where(VersionCounter.name == name)
+    ).scalar()
+    return value or 0
+
+
+def counter_values(session, names):
+    """{name: value} for `names` in one query; counters never bumped read as 0."""
+    values = dict.fromkeys(names, 0)
+    values.update(session.execute(
+        db.select(VersionCounter.name, VersionCounter.value).where(VersionCounter.name.in_(list(names)))
+    ).all())
+    return values
+
+
+def bump_counters(session, names):
+    # Fixed order so concurrent transactions lock counter rows the same way
+    for name in sorted(names):
+        next_version(session, name)
+
+
+def previous_values(session, obj, columns):
+    """
+    Database values of `columns` for a persistent object about to be flushed.
+    Taken from attribute history when loaded; an attribute that was expired
+    (e.g. after a commit) before being set has no old value there, so the row
+    is read back instead (the flush has not written it yet).
+    """
+    state = inspect(obj)
+    values = {}
+    for column in columns:
+        history = state.attrs[column].history
+        if history.deleted:
+            values[column] = history.deleted[0]
+        elif history.unchanged:
+            values[column] = history.unchanged[0]
+        else:
+            break
+    else:
+        return values
+    model = type(obj)
+    with session.no_autoflush:
+        row = session.execute(
+            db.select(*[getattr(model, column) for column in columns]).where(model.id == obj.id)
+        ).one()
+    return dict(zip(columns, row))
+
+
+def _tombstone(obj, scope_column, scope_value, version):
+    tombstone = Tombstone(table_name=obj.__tablename__, row_id=obj.id, version=version)
+    setattr(tombstone, 'pi_id' if scope_column == 'pi_id' else 'room_id', scope_value)
+    return tombstone
+
+
+def _touched_counters(session, objects):
+    """Table and room counters affected by inserting / changing / deleting `objects`."""
+    names = set()
+    for obj in objects:
+        table_name = getattr(obj, '__tablename__', None)
+        if table_name is None or table_name in (VersionCounter.__tablename__, Tombstone.__tablename__):
+            continue
+        names.add(table_name)
+        if isinstance(obj, Room) and obj.id is not None:
+            names.add(room_counter(obj.id))
+        elif isinstance(obj, (Chemical, Space)):
+            room_ids = {obj.room_id}
+            if obj.id is not None and inspect(obj).attrs['room_id'].history.has_changes():
+                room_ids.add(previous_values(session, obj, ['room_id'])['room_id'])
+            names.update(room_counter(room_id) for room_id in room_ids if room_id is not None)
+    return names
+
+
+@event.listens_for(Session, 'before_flush')
+def stamp_versions(session, flush_context, instances):
+    dirty = [obj for obj in session.dirty if session.is_modified(obj)]
+    bump_counters(session, _touched_counters(session, list(session.new) + dirty + list(session.deleted)))
+
+    changed = [obj for obj in session.new if type(obj) in VERSIONED_MODELS] + [
+        obj for obj in dirty
+        if type(obj) in VERSIONED_MODELS and session.is_modified(obj, include_collections=False)
+    ]
+    deleted = [obj for obj in session.deleted if type(obj) in VERSIONED_MODELS]
+    if not changed and not deleted:
+        return
+
+    version = next_version(session)
+    for obj in changed:
+        obj.version = version
+        scope_column = VERSIONED_MODELS[type(obj)]
+        if obj.id is None or not inspect(obj).attrs[scope_column].history.has_changes():
+            continue
+        old_scope = previous_values(session, obj, [scope_column])[scope_column]
+        if old_scope is not None and old_scope != getattr(obj, scope_column):
+            session.add(_tombstone(obj, scope_column, old_scope, version))
+    for obj in deleted:
+        scope_column = VERSIONED_MODELS[type(obj)]
+        session.add(_tombstone(obj, scope_column, getattr(obj, scope_column), version))
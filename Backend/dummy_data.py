@@ -1,9 +1,29 @@
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
 from faker import Faker
-from db_models.models import db, Chemical, PI, User, Building, Room, Space
-from app import app  # Assuming your app instance is in app.py
+from sqlalchemy import func, insert, select, text
+from db_models.models import db, bcrypt, Chemical, PI, User, Building, Room, Space, user_pi
+from db_models.units import to_pounds
+from db_models.summary import rebuild_inventory_summary
+from db_models.versioning import bump_counters
+from db_models.search import FTS5, SEARCH_INDEX_DDL, rebuild_search_index, search_backend
 
-# Initialize Faker
-fake = Faker()
+# --- Synthetic data generator ---
+#
+#   python dummy_data.py [--rooms 2000 --chemicals 1000000 ...] [--seed 1] [--manifest loadtest.json]
+#
+# Rows are built from a seeded random generator and written with chunked Core
+# executemany inserts, using explicit ids (so children need no round trip to
+# learn their parents' ids). Every account gets the same precomputed bcrypt
+# hash, so no per-row hashing. The same seed on the same database produces
+# the same data. --manifest writes sample logins, barcodes and search terms
+# for loadtest.py. Defaults match the original small dev data set.
+#
+# On SQLite the per-row FTS5 insert trigger is dropped during the load and the
+# search index rebuilt once afterwards (about 4x faster for large loads).
 
 # Random chemicals
 chemical_names = [
@@ -15,85 +35,202 @@ chemical_names = [
     'Diethyl Ether', 'Sodium Hypochlorite'
 ]
 
-# Generate a large number of dummy records
-def generate_dummy_data():
-    with app.app_context():
-        # Create dummy users
-        users = []
-        for _ in range(10):
-            user = User(
-                name=fake.name(),
-                email=fake.email(),
-            )
-            user.set_password('password')
-            db.session.add(user)
-            users.append(user)  # Store users for later association
-
-        # Create dummy PIs and associate them with users
-        pis = []
-        for _ in range(5):
-            pi = PI(
-                name=fake.name(),
-                email=fake.email(),
-            )
-            pi.set_password('password')
-            db.session.add(pi)
-            pis.append(pi)
-
-        # Associate users with random PIs, ensuring no duplicate associations
-        for user in users:
-            # Get 1 to 3 unique random PIs for the user
-            random_pis = fake.random_elements(elements=pis, length=fake.random_int(min=1, max=3), unique=True)
-            for pi in random_pis:
-                if pi not in user.pis:  # Ensure no duplicate association
-                    user.pis.append(pi)
-
-        # Create dummy buildings and rooms
-        for _ in range(3):
-            building = Building(
-                name=fake.company()
-            )
-            db.session.add(building)
-            db.session.flush()  # Ensures the building gets an ID before creating rooms
-
-            for _ in range(2):
-                room = Room(
-                    building_id=building.id,
-                    room_number=fake.building_number(),
-                    pi_id=fake.random_element(pis).id,  # Associate with a random PI
-                    contact_name=fake.name(),
-                    contact_phone=fake.phone_number()
-                )
-                db.session.add(room)
-                db.session.flush()
-
-                # Create dummy spaces
-                for _ in range(3):
-                    space = Space(
-                        room_id=room.id,
-                        description=fake.sentence(),
-                        space_type=fake.word()
-                    )
-                    db.session.add(space)
-                    db.session.flush()
-
-                    # Create dummy chemicals in the space
-                    for _ in range(10):
-                        chemical = Chemical(
-                            name=fake.random_element(chemical_names),
-                            cas_number=fake.ein(),
-                            room_id=room.id,
-                            space_id=space.id,
-                            amount=fake.random_number(digits=3),
-                            unit='g',  # Example unit
-                            expiration_date=fake.future_date(),
-                            total_weight_lbs=fake.random_number(digits=3)
-                        )
-                        db.session.add(chemical)
-
-        # Commit all the dummy data to the database
+SPACE_TYPES = ["Non-Hazardous", "Radioactive", "Hazardous", "Toxic", "Non-Toxic"]
+SPACE_DESCRIPTIONS = ["Cabinet", "Shelf", "Fridge", "Freezer", "Fume Hood", "Drawer", "Bench"]
+UNITS = ['g', 'g', 'kg', 'mg', 'mL', 'mL', 'L']
+
+DEFAULT_PASSWORD = 'password'
+INSERT_CHUNK_SIZE = 10000
+NAME_POOL_SIZE = 1000
+MANIFEST_SAMPLE_SIZE = 5000
+
+
+def synthetic_barcode(chemical_id):
+    # The D prefix keeps generated barcodes apart from real (numeric) labels
+    return f'D{chemical_id:09d}'
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _insert_chunked(table, rows, chunk_size):
+    """Insert an iterable of row dicts in chunks, one transaction per chunk; returns the row count."""
+    count, chunk = 0, []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            db.session.execute(insert(table), chunk)
+            db.session.commit()
+            count, chunk = count + len(chunk), []
+    if chunk:
+        db.session.execute(insert(table), chunk)
         db.session.commit()
+        count += len(chunk)
+    return count
+
+
+def _reset_sequences(tables):
+    # Explicit ids leave PostgreSQL's serial sequences behind
+    if db.session.get_bind().dialect.name == 'postgresql':
+        for table in tables:
+            db.session.execute(text(
+                f'''SELECT setval(pg_get_serial_sequence('"{table}"', 'id'), (SELECT MAX(id) FROM "{table}"))'''
+            ))
+        db.session.commit()
+
+
+def _insert_without_search_trigger(insert_rows, timings):
+    if search_backend() != FTS5:
+        return insert_rows()
+    db.session.execute(text('DROP TRIGGER IF EXISTS chemical_fts_ai'))
+    db.session.commit()
+    try:
+        return insert_rows()
+    finally:
+        db.session.rollback()
+        db.session.execute(text(SEARCH_INDEX_DDL[1]))  # chemical_fts_ai
+        db.session.commit()
+        started = time.perf_counter()
+        rebuild_search_index()
+        timings['chemical_fts'] = (None, round(time.perf_counter() - started, 2))
+
+
+def generate_dummy_data(users=10, pis=5, buildings=3, rooms=6, spaces_per_room=3, chemicals=180,
+                        seed=1, password=DEFAULT_PASSWORD, chunk_size=INSERT_CHUNK_SIZE, manifest=None):
+    """Insert a synthetic data set; returns {table: (rows, seconds)}."""
+    rng = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    people = [fake.name() for _ in range(NAME_POOL_SIZE)]
+    phones = [fake.phone_number()[:15] for _ in range(NAME_POOL_SIZE)]
+    password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+    timings = {}
+
+    def timed(table, rows):
+        started = time.perf_counter()
+        count = _insert_chunked(table, rows, chunk_size)
+        timings[table.name] = (count, round(time.perf_counter() - started, 2))
+
+    user_start, pi_start = _next_id(User), _next_id(PI)
+    building_start, room_start = _next_id(Building), _next_id(Room)
+    space_start, chemical_start = _next_id(Space), _next_id(Chemical)
+    pi_ids = range(pi_start, pi_start + pis)
+    room_ids = range(room_start, room_start + rooms)
+
+    timed(User.__table__, ({
+        'id': user_id, 'name': rng.choice(people), 'email': f'user{user_id}@example.edu', 'password_hash': password_hash
+    } for user_id in range(user_start, user_start + users)))
+    timed(PI.__table__, ({
+        'id': pi_id, 'name': rng.choice(people), 'email': f'pi{pi_id}@example.edu', 'password_hash': password_hash
+    } for pi_id in pi_ids))
+    timed(user_pi, ({'user_id': user_id, 'pi_id': pi_id}
+                    for user_id in range(user_start, user_start + users)
+                    for pi_id in rng.sample(pi_ids, min(len(pi_ids), rng.randint(1, 3)))))
+    timed(Building.__table__, ({'id': building_id, 'name': f'B{building_id}'}
+                               for building_id in range(building_start, building_start + buildings)))
+
+    # Room i belongs to PI room_pis[i]; its spaces are ids space_start + i * spaces_per_room + k
+    room_pis = [rng.choice(pi_ids) for _ in room_ids]
+    timed(Room.__table__, ({
+        'id': room_id,
+        'building_id': rng.randrange(building_start, building_start + buildings),
+        'room_number': str(rng.randint(100, 4999)),
+        'pi_id': room_pis[index],
+        'contact_name': rng.choice(people),
+        'contact_phone': rng.choice(phones),
+        'version': 0
+    } for index, room_id in enumerate(room_ids)))
+    timed(Space.__table__, ({
+        'id': space_start + index * spaces_per_room + k,
+        'room_id': room_id,
+        'description': f'{rng.choice(SPACE_DESCRIPTIONS)} {k + 1}',
+        'space_type': rng.choice(SPACE_TYPES),
+        'version': 0
+    } for index, room_id in enumerate(room_ids) for k in range(spaces_per_room)))
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    cas_numbers = [f'{rng.randint(50, 99999)}-{rng.randint(10, 99)}-{rng.randint(0, 9)}' for _ in range(NAME_POOL_SIZE)]
+    sampled = set(rng.sample(range(chemical_start, chemical_start + chemicals), min(chemicals, MANIFEST_SAMPLE_SIZE)))
+    barcodes = []  # [barcode, room_id] of the sampled chemicals, for the manifest
+
+    def chemical_rows():
+        for chemical_id in range(chemical_start, chemical_start + chemicals):
+            index = rng.randrange(rooms)
+            if chemical_id in sampled:
+                barcodes.append([synthetic_barcode(chemical_id), room_start + index])
+            amount = float(rng.randint(1, 999))
+            unit = rng.choice(UNITS)
+            cas_number = rng.choice(cas_numbers)
+            yield {
+                'id': chemical_id,
+                'name': rng.choice(chemical_names),
+                'cas_number': cas_number,
+                'barcode': synthetic_barcode(chemical_id),
+                'room_id': room_start + index,
+                'space_id': space_start + index * spaces_per_room + rng.randrange(spaces_per_room) if spaces_per_room else None,
+                'amount': amount,
+                'unit': unit,
+                'expiration_date': today + timedelta(days=rng.randint(-365, 3 * 365)),
+                'date_added': today,
+                'total_weight_lbs': to_pounds(amount, unit, cas_number),
+                'version': 0
+            }
+    _insert_without_search_trigger(lambda: timed(Chemical.__table__, chemical_rows()), timings)
+
+    _reset_sequences(['user', 'pi', 'building', 'room', 'space', 'chemical'])
+    # Core inserts skip the flush hooks: refresh the summary and the change counters once
+    started = time.perf_counter()
+    rebuild_inventory_summary(db.session)
+    bump_counters(db.session, {'user', 'pi', 'building', 'room', 'space', 'chemical'})
+    db.session.commit()
+    timings['inventory_summary'] = (None, round(time.perf_counter() - started, 2))
+
+    if manifest:
+        write_manifest(manifest, password, user_start, users, pi_start, pis, room_start, room_pis, barcodes,
+                       space_start, spaces_per_room)
+    return timings
+
+
+def write_manifest(path, password, user_start, users, pi_start, pis, room_start, room_pis, barcodes,
+                   space_start, spaces_per_room):
+    """Sample logins, rooms (with their spaces), barcodes (with their rooms) and search terms for loadtest.py."""
+    manifest = {
+        'password': password,
+        'users': [f'user{user_id}@example.edu' for user_id in range(user_start, user_start + min(users, 200))],
+        'pis': [{'id': pi_id, 'email': f'pi{pi_id}@example.edu'} for pi_id in range(pi_start, pi_start + min(pis, 200))],
+        'rooms': [{
+            'id': room_start + index,
+            'pi_id': pi_id,
+            'spaces': list(range(space_start + index * spaces_per_room, space_start + (index + 1) * spaces_per_room))
+        } for index, pi_id in enumerate(room_pis[:MANIFEST_SAMPLE_SIZE])],
+        'barcodes': barcodes,
+        'search_terms': sorted({name.split()[0].lower()[:5] for name in chemical_names}),
+    }
+    with open(path, 'w') as f:
+        json.dump(manifest, f)
+
 
 if __name__ == '__main__':
-    generate_dummy_data()
+    from app import app
+
+    parser = argparse.ArgumentParser(description='Insert synthetic users, PIs, rooms and chemicals.')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--pis', type=int, default=5)
+    parser.add_argument('--buildings', type=int, default=3)
+    parser.add_argument('--rooms', type=int, default=6)
+    parser.add_argument('--spaces-per-room', type=int, default=3)
+    parser.add_argument('--chemicals', type=int, default=180)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of every generated user and PI')
+    parser.add_argument('--chunk-size', type=int, default=INSERT_CHUNK_SIZE)
+    parser.add_argument('--manifest', help='Write sample logins and barcodes for loadtest.py to this file')
+    args = parser.parse_args()
+
+    with app.app_context():
+        timings = generate_dummy_data(
+            args.users, args.pis, args.buildings, args.rooms, args.spaces_per_room, args.chemicals,
+            args.seed, args.password, args.chunk_size, args.manifest)
+    for table, (rows, seconds) in timings.items():
+        print(f"{table}: {rows if rows is not None else '-'} rows in {seconds}s")
     print("Dummy data successfully added.")
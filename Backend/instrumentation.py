@@ -0,0 +1,169 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+# --- Per-request latency and SQL instrumentation ---
+#
+# Records wall time, SQL query count and SQL time for every request into
+# in-process histograms, exposed on /metrics in the Prometheus text format.
+# Optionally adds a Server-Timing header (SERVER_TIMING=1) and logs statements
+# slower than SLOW_QUERY_MS together with their parameters.
+#
+# Histograms are per process; with several gunicorn workers each worker
+# reports its own series, which Prometheus sums when scraped per worker.
+#
+# A streamed response (exports, ?stream=true listings) runs most of its
+# queries while the body is sent, after after_request. Those requests are
+# recorded when the response is closed instead; their Server-Timing header,
+# sent before the body, only covers the work done until then.
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricFamily:
+    """A named histogram with one series per label combination."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            histogram = self.series.get(key)
+            if histogram is None:
+                histogram = self.series[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for key, histogram in sorted(self.series.items()):
+                labels = ','.join(f'{name}="{_escape(value)}"' for name, value in key)
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'{self.name}_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'{self.name}_count{{{labels}}} {histogram.count}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_DURATION = MetricFamily(
+    'http_request_duration_seconds', 'Wall time spent handling a request.', LATENCY_BUCKETS)
+REQUEST_SQL_QUERIES = MetricFamily(
+    'http_request_sql_queries', 'SQL statements executed per request.', QUERY_COUNT_BUCKETS)
+REQUEST_SQL_DURATION = MetricFamily(
+    'http_request_sql_duration_seconds', 'Time spent in SQL statements per request.', LATENCY_BUCKETS)
+
+# Extra collectors (e.g. cache counters) registered by other modules; each is
+# a callable returning a list of exposition-format lines.
+_collectors = []
+
+
+def register_collector(collector):
+    _collectors.append(collector)
+
+
+def render_metrics():
+    lines = []
+    for family in (REQUEST_DURATION, REQUEST_SQL_QUERIES, REQUEST_SQL_DURATION):
+        lines.extend(family.render())
+    for collector in _collectors:
+        lines.extend(collector())
+    return '\n'.join(lines) + '\n'
+
+
+def _endpoint_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _observe_request(timings, labels, status_code):
+    """Record a finished request from its g (request_start, sql_count, sql_time)."""
+    REQUEST_DURATION.observe(dict(labels, status=str(status_code)), time.perf_counter() - timings.request_start)
+    REQUEST_SQL_QUERIES.observe(labels, timings.sql_count)
+    REQUEST_SQL_DURATION.observe(labels, timings.sql_time)
+
+
+def init_instrumentation(app, engine):
+    """Attach request timing hooks to `app` and SQL timing events to `engine`."""
+    slow_query_seconds = float(os.environ.get('SLOW_QUERY_MS', 200)) / 1000
+    server_timing = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+
+    # Start times are keyed by cursor, so a statement that raises (and never
+    # reaches after_cursor_execute) cannot leave an entry behind that a later
+    # statement would pick up; handle_error drops it.
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', {})[id(cursor)] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop(id(cursor))
+        if has_request_context() and 'sql_count' in g:
+            g.sql_count += 1
+            g.sql_time += elapsed
+        if elapsed > slow_query_seconds:
+            logger.warning("Slow query (%.1f ms): %s; parameters: %r", elapsed * 1000, statement, parameters)
+
+    @event.listens_for(engine, 'handle_error')
+    def drop_query_timer(exception_context):
+        conn, context = exception_context.connection, exception_context.execution_context
+        if conn is not None and context is not None:
+            conn.info.get('query_start', {}).pop(id(context.cursor), None)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+
+    @app.after_request
+    def record_request(response):
+        if 'request_start' not in g:
+            return response
+        if server_timing:
+            response.headers['Server-Timing'] = (
+                f'app;dur={(time.perf_counter() - g.request_start) * 1000:.1f}, '
+                f'db;dur={g.sql_time * 1000:.1f};desc="{g.sql_count} queries"'
+            )
+        # The streamed body's queries still count into this g (stream_with_context)
+        timings, labels = g._get_current_object(), {'endpoint': _endpoint_label(), 'method': request.method}
+        if response.is_streamed:
+            response.call_on_close(lambda: _observe_request(timings, labels, response.status_code))
+        else:
+            _observe_request(timings, labels, response.status_code)
+        return response
+
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
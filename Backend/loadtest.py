@@ -0,0 +1,294 @@
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+# --- HTTP load test ---
+#
+#   python dummy_data.py --rooms 2000 --chemicals 1000000 --manifest loadtest.json
+#   gunicorn -w 4 app:app
+#   python loadtest.py --manifest loadtest.json --concurrency 32 --duration 60 --mix scan=70,search=25,login=5
+#
+# Closed-loop virtual clients, one thread and one keep-alive connection
+# each. Every client picks its next request from the weighted mix and fires
+# it as soon as the previous one returns. Requests are built from the
+# dummy_data manifest:
+#   scan    POST /scan/check_chemical with a known barcode (mostly in its own room)
+#   search  POST /search-chemical for a PI's rooms with a common name prefix
+#           (each client signs in as a random PI first and sends its token)
+#   login   POST /login or /pi-login with a generated account
+#   room    GET /chemicals/room/<id>
+#   add     POST /add_chemical with a new barcode               (writer)
+#   edit    PUT /chemicals/update of a known chemical           (writer)
+#   bulk    POST /chemicals/bulk with BULK_ROWS new chemicals   (writer)
+# The report gives throughput, error counts and latency percentiles per
+# request kind; --json also writes it to a file.
+#
+# Reader/writer contention: save a read-only run, then the same readers with
+# writers added, and compare the two:
+#   python loadtest.py --manifest loadtest.json --mix scan=80,search=20 --json readers.json
+#   python loadtest.py --manifest loadtest.json --mix scan=80,search=20,add=10,edit=10 --compare readers.json
+
+DEFAULT_MIX = 'scan=70,search=25,login=5'
+MISPLACED_SCAN_RATE = 0.1
+BULK_ROWS = 100
+BARCODE_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+# Answers that are part of the workload rather than failures: a misplaced scan is a 400
+EXPECTED_STATUSES = {'scan': (400, 404)}
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown request kind {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def scan(rng, manifest, client):
+    barcode, room_id = rng.choice(manifest['barcodes'])
+    if rng.random() < MISPLACED_SCAN_RATE:
+        room_id = rng.choice(manifest['rooms'])['id']
+    return 'POST', '/scan/check_chemical', {'barcode': barcode, 'selected_room_id': room_id}
+
+
+def search(rng, manifest, client):
+    return 'POST', '/search-chemical', {
+        'scope': 'pi', 'pi_id': client.pi_id, 'query': rng.choice(manifest['search_terms'])
+    }
+
+
+def login(rng, manifest, client):
+    if manifest['pis'] and rng.random() < 0.3:
+        return 'POST', '/pi-login', {'email': rng.choice(manifest['pis'])['email'], 'password': manifest['password']}
+    return 'POST', '/login', {'email': rng.choice(manifest['users']), 'password': manifest['password']}
+
+
+def room(rng, manifest, client):
+    return 'GET', f"/chemicals/room/{rng.choice(manifest['rooms'])['id']}?limit=100", None
+
+
+def chemical_body(rng, manifest, client, room):
+    return {
+        'barcode': client.next_barcode(), 'name': rng.choice(manifest['search_terms']).title() + ' Load Test',
+        'cas_number': '7664-93-9', 'room_id': room['id'], 'space_id': rng.choice(room['spaces']) if room['spaces'] else None,
+        'amount': rng.randint(1, 999), 'unit': 'mL', 'expiration_date': '2030-01-01'
+    }
+
+
+def add(rng, manifest, client):
+    return 'POST', '/add_chemical', chemical_body(rng, manifest, client, rng.choice(manifest['rooms']))
+
+
+def edit(rng, manifest, client):
+    barcode, room_id = rng.choice(manifest['editable'])
+    return 'PUT', '/chemicals/update', {
+        'id': int(barcode[1:]),  # dummy_data.synthetic_barcode
+        'name': rng.choice(manifest['search_terms']).title() + ' Load Test',
+        'cas_number': '7664-93-9',
+        'amount': rng.randint(1, 999),
+        'unit': 'mL',
+        'expiration_date': '2030-01-01',
+        'space_id': rng.choice(manifest['rooms_by_id'][room_id]['spaces'])
+    }
+
+
+def bulk(rng, manifest, client):
+    room = rng.choice(manifest['rooms'])
+    return 'POST', '/chemicals/bulk', [chemical_body(rng, manifest, client, room) for _ in range(BULK_ROWS)]
+
+
+SCENARIOS = {'scan': scan, 'search': search, 'login': login, 'room': room, 'add': add, 'edit': edit, 'bulk': bulk}
+
+
+def prepare_manifest(manifest):
+    """Index the manifest for the writer scenarios."""
+    manifest['rooms_by_id'] = {room['id']: room for room in manifest['rooms']}
+    manifest['editable'] = [
+        [barcode, room_id] for barcode, room_id in manifest['barcodes']
+        if manifest['rooms_by_id'].get(room_id, {}).get('spaces')
+    ]
+    return manifest
+
+
+class ClientState:
+    """
+    Per-client state: the PI the client signed in as, and its new barcodes
+    ('W' + run id + client number + counter, 10 characters).
+    """
+
+    def __init__(self, run_id, number):
+        self.prefix = 'W' + _base36(run_id, 3) + _base36(number, 2)
+        self.count = 0
+        self.pi_id = None
+        self.token = None
+
+    def next_barcode(self):
+        self.count += 1
+        return self.prefix + _base36(self.count, 4)
+
+
+def _base36(value, width):
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, 36)
+        digits.append(BARCODE_ALPHABET[digit])
+    return ''.join(reversed(digits))
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, kind, seconds, ok):
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(seconds)
+            if not ok:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def client(url, manifest, weights, stats, deadline, seed, warmup_until, state):
+    rng = random.Random(seed)
+    kinds, kind_weights = list(weights), list(weights.values())
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.hostname, parts.port, timeout=30)
+    if 'search' in weights:
+        sign_in(connection, manifest, rng, state)
+    while time.monotonic() < deadline:
+        kind = rng.choices(kinds, kind_weights)[0]
+        method, path, body = SCENARIOS[kind](rng, manifest, state)
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'} if payload else {'Accept-Encoding': 'gzip'}
+        if state.token:
+            headers['Authorization'] = f'Bearer {state.token}'
+        started = time.monotonic()
+        try:
+            connection.request(method, path, payload, headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status < 400 or response.status in EXPECTED_STATUSES.get(kind, ())
+        except (OSError, http.client.HTTPException):
+            ok = False
+            connection.close()
+        if started >= warmup_until:
+            stats.record(kind, time.monotonic() - started, ok)
+    connection.close()
+
+
+def sign_in(connection, manifest, rng, state):
+    """Log in as a random PI; scoped search takes the principal from its token."""
+    pi = rng.choice(manifest['pis'])
+    connection.request('POST', '/pi-login', json.dumps({'email': pi['email'], 'password': manifest['password']}),
+                       {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    body = json.loads(response.read())
+    if response.status != 200:
+        raise RuntimeError(f"PI login failed ({response.status}): {body}")
+    state.pi_id, state.token = pi['id'], body['token']
+
+
+def run(url, manifest, weights, concurrency, duration, warmup=0.0, seed=1):
+    stats = Stats()
+    warmup_until = time.monotonic() + warmup
+    deadline = warmup_until + duration
+    run_id = int(time.time()) % 36 ** 3  # keeps new barcodes apart from earlier runs'
+    threads = [
+        threading.Thread(
+            target=client,
+            args=(url, manifest, weights, stats, deadline, seed + i, warmup_until, ClientState(run_id, i)),
+            daemon=True)
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return report(stats, duration, concurrency)
+
+
+def report(stats, duration, concurrency):
+    kinds = {}
+    total = 0
+    for kind, latencies in sorted(stats.latencies.items()):
+        ordered = sorted(latencies)
+        total += len(ordered)
+        kinds[kind] = {
+            'requests': len(ordered),
+            'errors': stats.errors.get(kind, 0),
+            'throughput': round(len(ordered) / duration, 1),
+            'p50_ms': round(percentile(ordered, 0.50) * 1000, 1),
+            'p90_ms': round(percentile(ordered, 0.90) * 1000, 1),
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 1),
+            'max_ms': round(ordered[-1] * 1000, 1),
+        }
+    return {
+        'concurrency': concurrency,
+        'duration': duration,
+        'requests': total,
+        'errors': sum(stats.errors.values()),
+        'throughput': round(total / duration, 1),
+        'kinds': kinds,
+    }
+
+
+def print_report(result):
+    print(f"{result['requests']} requests in {result['duration']}s with {result['concurrency']} clients: "
+          f"{result['throughput']} req/s, {result['errors']} errors")
+    print(f"{'kind':<8}{'req':>8}{'err':>6}{'req/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for kind, row in result['kinds'].items():
+        print(f"{kind:<8}{row['requests']:>8}{row['errors']:>6}{row['throughput']:>9}"
+              f"{row['p50_ms']:>9}{row['p90_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}")
+
+
+def compare(before, after):
+    """Print p50/p99 per request kind of two reports side by side, with the change."""
+    print(f"{'kind':<8}{'p50 before':>12}{'p50 after':>11}{'change':>9}{'p99 before':>12}{'p99 after':>11}{'change':>9}")
+    for kind, row in after['kinds'].items():
+        old = before['kinds'].get(kind)
+        if old is None:
+            print(f"{kind:<8}{'-':>12}{row['p50_ms']:>11}{'':>9}{'-':>12}{row['p99_ms']:>11}")
+            continue
+        print(f"{kind:<8}{old['p50_ms']:>12}{row['p50_ms']:>11}{_change(old['p50_ms'], row['p50_ms']):>9}"
+              f"{old['p99_ms']:>12}{row['p99_ms']:>11}{_change(old['p99_ms'], row['p99_ms']):>9}")
+
+
+def _change(before, after):
+    return f'{(after - before) / before * 100:+.0f}%' if before else '-'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a scan / search / login mix against a running server.')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--manifest', required=True, help='Written by dummy_data.py --manifest')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Weights per request kind (default {DEFAULT_MIX})')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help='Seconds measured after the warm-up')
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='Also write the report to this file')
+    parser.add_argument('--compare', help='An earlier --json report to compare p50/p99 with (e.g. a read-only run)')
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = prepare_manifest(json.load(f))
+    result = run(args.url, manifest, parse_mix(args.mix), args.concurrency, args.duration, args.warmup, args.seed)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print()
+            compare(json.load(f), result)
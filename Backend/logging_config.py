@@ -0,0 +1,74 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+
+# --- Application logging ---
+#
+# Log records are put on an in-memory queue by the request thread and formatted
+# and written to stderr by a background listener thread, so request handlers
+# never pay for formatting or block on I/O. The level comes from LOG_LEVEL (default INFO); debug calls below that
+# level are dropped before their arguments are formatted.
+#
+# Every request gets an id (the incoming X-Request-ID header, or a new one),
+# which is added to its log lines and echoed back in the response headers.
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s'
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+
+class RawQueueHandler(QueueHandler):
+    """
+    QueueHandler.prepare formats the message (and any traceback) before
+    queueing it, on the request thread. The queue never leaves this process,
+    so the record can go as it is and the listener's handler formats it.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return True
+
+
+def configure_logging(app, level=None, stream=None):
+    """Route application logs through a queue handler and add request-id correlation."""
+    level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = RawQueueHandler(log_queue)
+    # The filter has to run on the request thread, where the request context lives
+    queue_handler.addFilter(RequestIdFilter())
+
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    # Flask adds its own stderr handler to app.logger; send everything through the queue instead
+    app.logger.handlers.clear()
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+
+    @app.after_request
+    def echo_request_id(response):
+        response.headers[REQUEST_ID_HEADER] = g.get('request_id', '')
+        return response
+
+    return listener
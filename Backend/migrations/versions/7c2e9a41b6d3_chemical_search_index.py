@@ -0,0 +1,65 @@
+"""Chemical full-text search index
+
+Revision ID: 7c2e9a41b6d3
+Revises: 1513dce5f3f2
+Create Date: 2026-10-18 09:12:40.318224
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9a41b6d3'
+down_revision = '1513dce5f3f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 trigram index is SQLite-only; other backends keep the ILIKE search path.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    # A frozen copy of db_models.search.SEARCH_INDEX_DDL as of this revision.
+    # Do not import it or edit it here: a change to the index or triggers
+    # needs a new migration, so databases upgraded through this revision
+    # stay reproducible.
+    op.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS chemical_fts USING fts5(
+            name, cas_number, barcode,
+            content='chemical', content_rowid='id', tokenize='trigram'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS chemical_fts_ai AFTER INSERT ON chemical BEGIN
+            INSERT INTO chemical_fts(rowid, name, cas_number, barcode)
+            VALUES (new.id, new.name, new.cas_number, new.barcode);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS chemical_fts_ad AFTER DELETE ON chemical BEGIN
+            INSERT INTO chemical_fts(chemical_fts, rowid, name, cas_number, barcode)
+            VALUES ('delete', old.id, old.name, old.cas_number, old.barcode);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS chemical_fts_au AFTER UPDATE OF name, cas_number, barcode ON chemical BEGIN
+            INSERT INTO chemical_fts(chemical_fts, rowid, name, cas_number, barcode)
+            VALUES ('delete', old.id, old.name, old.cas_number, old.barcode);
+            INSERT INTO chemical_fts(rowid, name, cas_number, barcode)
+            VALUES (new.id, new.name, new.cas_number, new.barcode);
+        END
+    """)
+    # Index the rows that already exist
+    op.execute("INSERT INTO chemical_fts(chemical_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS chemical_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS chemical_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS chemical_fts_ai")
+    op.execute("DROP TABLE IF EXISTS chemical_fts")
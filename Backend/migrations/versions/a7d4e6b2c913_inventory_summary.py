@@ -0,0 +1,38 @@
+"""Inventory summary table (count / weight per room and space type)
+
+Revision ID: a7d4e6b2c913
+Revises: c3f7a2d81e56
+Create Date: 2026-10-18 19:02:11.514203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d4e6b2c913'
+down_revision = 'c3f7a2d81e56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('inventory_summary',
+    sa.Column('room_id', sa.Integer(), nullable=False),
+    sa.Column('space_type', sa.String(length=50), nullable=False),
+    sa.Column('chemical_count', sa.Integer(), nullable=False),
+    sa.Column('total_weight_lbs', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['room_id'], ['room.id'], ),
+    sa.PrimaryKeyConstraint('room_id', 'space_type')
+    )
+    # Backfill from the existing inventory
+    op.execute("""
+        INSERT INTO inventory_summary (room_id, space_type, chemical_count, total_weight_lbs)
+        SELECT chemical.room_id, COALESCE(space.space_type, ''), COUNT(chemical.id), SUM(chemical.total_weight_lbs)
+        FROM chemical LEFT OUTER JOIN space ON chemical.space_id = space.id
+        GROUP BY chemical.room_id, COALESCE(space.space_type, '')
+    """)
+
+
+def downgrade():
+    op.drop_table('inventory_summary')
@@ -0,0 +1,31 @@
+"""Data migration checkpoint table
+
+Revision ID: b5c0e7f4a362
+Revises: d91e3a6c5b28
+Create Date: 2026-10-18 23:52:48.640119
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5c0e7f4a362'
+down_revision = 'd91e3a6c5b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('data_migration',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('position', sa.Text(), nullable=True),
+    sa.Column('applied', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('data_migration')
@@ -0,0 +1,40 @@
+"""Indexes for hot lookup columns
+
+Revision ID: b94d0e3f5a17
+Revises: 7c2e9a41b6d3
+Create Date: 2026-10-18 11:47:05.902113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b94d0e3f5a17'
+down_revision = '7c2e9a41b6d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_building_name', 'building', ['name'], unique=False)
+    op.create_index('ix_room_building_id', 'room', ['building_id'], unique=False)
+    op.create_index('ix_room_pi_id', 'room', ['pi_id'], unique=False)
+    op.create_index('ix_space_room_id', 'space', ['room_id'], unique=False)
+    op.create_index('ix_user_pi_pi_id', 'user_pi', ['pi_id'], unique=False)
+    op.create_index('ix_chemical_room_id_name', 'chemical', ['room_id', 'name'], unique=False)
+    op.create_index('ix_chemical_space_id', 'chemical', ['space_id'], unique=False)
+    op.create_index('ix_chemical_cas_number', 'chemical', ['cas_number'], unique=False)
+    op.create_index('ix_chemical_expiration_date', 'chemical', ['expiration_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_chemical_expiration_date', table_name='chemical')
+    op.drop_index('ix_chemical_cas_number', table_name='chemical')
+    op.drop_index('ix_chemical_space_id', table_name='chemical')
+    op.drop_index('ix_chemical_room_id_name', table_name='chemical')
+    op.drop_index('ix_user_pi_pi_id', table_name='user_pi')
+    op.drop_index('ix_space_room_id', table_name='space')
+    op.drop_index('ix_room_pi_id', table_name='room')
+    op.drop_index('ix_room_building_id', table_name='room')
+    op.drop_index('ix_building_name', table_name='building')
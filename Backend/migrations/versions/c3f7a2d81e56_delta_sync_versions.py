@@ -0,0 +1,64 @@
+"""Row versions, change counter and tombstones for delta sync
+
+Revision ID: c3f7a2d81e56
+Revises: e5a81c09d4f2
+Create Date: 2026-10-18 18:13:37.890138
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7a2d81e56'
+down_revision = 'e5a81c09d4f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('version_counter',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute("INSERT INTO version_counter (name, value) VALUES ('sync', 0)")
+
+    op.create_table('tombstone',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('room_id', sa.Integer(), nullable=True),
+    sa.Column('pi_id', sa.Integer(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstone_pi_id', 'tombstone', ['pi_id'], unique=False)
+    op.create_index('ix_tombstone_room_id', 'tombstone', ['room_id'], unique=False)
+    op.create_index('ix_tombstone_version', 'tombstone', ['version'], unique=False)
+
+    # Existing rows start at version 0, i.e. they are part of every full sync
+    for table in ('chemical', 'room', 'space'):
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+        op.execute(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP")
+    op.create_index('ix_chemical_room_id_version', 'chemical', ['room_id', 'version'], unique=False)
+    op.create_index('ix_room_version', 'room', ['version'], unique=False)
+    op.create_index('ix_space_version', 'space', ['version'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_space_version', table_name='space')
+    op.drop_index('ix_room_version', table_name='room')
+    op.drop_index('ix_chemical_room_id_version', table_name='chemical')
+    for table in ('space', 'room', 'chemical'):
+        # Plain DROP COLUMN (SQLite 3.35+); batch mode would rebuild chemical and lose the FTS triggers
+        op.drop_column(table, 'version')
+        op.drop_column(table, 'updated_at')
+
+    op.drop_index('ix_tombstone_version', table_name='tombstone')
+    op.drop_index('ix_tombstone_room_id', table_name='tombstone')
+    op.drop_index('ix_tombstone_pi_id', table_name='tombstone')
+    op.drop_table('tombstone')
+    op.drop_table('version_counter')
@@ -0,0 +1,40 @@
+"""PostgreSQL trigram search indexes
+
+Revision ID: e5a81c09d4f2
+Revises: b94d0e3f5a17
+Create Date: 2026-10-18 13:05:51.447310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a81c09d4f2'
+down_revision = 'b94d0e3f5a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite uses the FTS5 index from 7c2e9a41b6d3 instead
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    available = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first()
+    if available is None:
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_chemical_name_trgm ON chemical USING gin (name gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_chemical_cas_number_trgm ON chemical USING gin (cas_number gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_chemical_barcode_trgm ON chemical USING gin (barcode gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_chemical_barcode_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_chemical_cas_number_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_chemical_name_trgm")
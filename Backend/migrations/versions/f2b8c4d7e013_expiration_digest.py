@@ -0,0 +1,33 @@
+"""Per-PI expiration digest table
+
+Revision ID: f2b8c4d7e013
+Revises: a7d4e6b2c913
+Create Date: 2026-10-18 21:14:37.802511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8c4d7e013'
+down_revision = 'a7d4e6b2c913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('expiration_digest',
+    sa.Column('pi_id', sa.Integer(), nullable=False),
+    sa.Column('generated_at', sa.DateTime(), nullable=False),
+    sa.Column('window_days', sa.Integer(), nullable=False),
+    sa.Column('expired_count', sa.Integer(), nullable=False),
+    sa.Column('expiring_count', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['pi_id'], ['pi.id'], ),
+    sa.PrimaryKeyConstraint('pi_id')
+    )
+
+
+def downgrade():
+    op.drop_table('expiration_digest')
@@ -1,6 +1,18 @@
+import argparse
 import random
-from db_models.models import db, Building, Space
-from app import app
+from sqlalchemy import func, insert, select, update
+from db_models.models import db, Building, Chemical, Space
+from db_models.data_migrations import DataMigration, DEFAULT_CHUNK_SIZE, run_data_migration
+from db_models.reference import BUILDING_COUNTER
+from db_models.summary import apply_deltas
+from db_models.versioning import bump_counters, next_version, room_counter
+
+# --- Reference data seeding ---
+#
+# Adds the building codes and gives every space without a type one of
+# SPACE_TYPES, as resumable data migrations (db_models.data_migrations):
+#   python update_database.py [--dry-run] [--chunk-size N] [--rerun]
+# or `flask data-migrate`. Re-running changes nothing once the data is in place.
 
 # Lists of building codes and space types
 BUILDING_CODES = [
@@ -20,32 +32,91 @@ BUILDING_CODES = [
 
 SPACE_TYPES = ["Non-Hazardous", "Radioactive", "Hazardous", "Toxic", "Non-Toxic"]
 
-def update_database():
-    try:
-        # Add new buildings if they don't exist
-        print("Adding new buildings...")
-        for code in BUILDING_CODES:
-            existing_building = Building.query.filter_by(name=code).first()
-            if not existing_building:
-                new_building = Building(name=code)
-                db.session.add(new_building)
-                print(f"Added new Building: {code}")
-
-        # Update Space types
-        print("Updating Space types...")
-        spaces = Space.query.all()
-        for space in spaces:
-            random_type = random.choice(SPACE_TYPES)
-            space.space_type = random_type
-            print(f"Updated Space ID {space.id} to Type {space.space_type}")
-
-        # Commit changes to the database
-        db.session.commit()
-        print("Database updates committed successfully.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        db.session.rollback()
+
+class AddBuildings(DataMigration):
+    name = 'add-buildings'
+    description = 'Add missing BUILDING_CODES to the building table'
+
+    def pending(self, session, after, limit):
+        codes = sorted(code for code in set(BUILDING_CODES) if after is None or code > after)
+        existing = set(session.execute(select(Building.name).where(Building.name.in_(codes))).scalars())
+        return [code for code in codes if code not in existing][:limit]
+
+    def apply(self, session, codes):
+        session.execute(insert(Building), [{'name': code} for code in codes])
+        bump_counters(session, {BUILDING_COUNTER})
+        return len(codes)
+
+
+class AssignSpaceTypes(DataMigration):
+    name = 'assign-space-types'
+    description = 'Give spaces without a type a random one of SPACE_TYPES'
+
+    def pending(self, session, after, limit):
+        query = select(Space.id).where(func.coalesce(Space.space_type, '') == '')
+        if after is not None:
+            query = query.where(Space.id > after)
+        return session.execute(query.order_by(Space.id).limit(limit)).scalars().all()
+
+    def apply(self, session, space_ids):
+        # Core / bulk statements skip the ORM flush hooks: version the spaces and
+        # move their chemicals' summary rows here, as api.bulk_ingest does
+        version = next_version(session)
+        space_types = {space_id: random.choice(SPACE_TYPES) for space_id in space_ids}
+        rooms = dict(session.execute(select(Space.id, Space.room_id).where(Space.id.in_(space_ids))).all())
+        session.execute(update(Space), [
+            {'id': space_id, 'space_type': space_type, 'version': version}
+            for space_id, space_type in space_types.items()
+        ])
+        bump_counters(session, {Space.__tablename__} | {room_counter(room_id) for room_id in rooms.values()})
+
+        deltas = {}
+        contents = session.execute(
+            select(Chemical.room_id, Chemical.space_id, func.count(Chemical.id),
+                   func.coalesce(func.sum(Chemical.total_weight_lbs), 0.0))
+            .where(Chemical.space_id.in_(space_ids))
+            .group_by(Chemical.room_id, Chemical.space_id)
+        )
+        for room_id, space_id, count, weight in contents:
+            for key, sign in (((room_id, ''), -1), ((room_id, space_types[space_id]), 1)):
+                delta = deltas.setdefault(key, [0, 0.0])
+                delta[0] += sign * count
+                delta[1] += sign * weight
+        apply_deltas(session, deltas)
+        return len(space_ids)
+
+
+DATA_MIGRATIONS = [AddBuildings(), AssignSpaceTypes()]
+
+
+def update_database(chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, rerun=False, names=None):
+    """Run the data migrations (all, or those in `names`) in order; returns their reports."""
+    reports = []
+    for migration in DATA_MIGRATIONS:
+        if names and migration.name not in names:
+            continue
+        reports.append(run_data_migration(db.session, migration, chunk_size, dry_run, rerun))
+    return reports
+
+
+def print_report(report):
+    if report['skipped']:
+        print(f"{report['name']}: already applied (use --rerun to run it again)")
+        return
+    verb = 'would change' if report['dry_run'] else 'changed'
+    print(f"{report['name']}: {verb} {report['changed']} rows in {report['chunks']} chunks, {report['seconds']}s")
+    if report['dry_run'] and report['planned']:
+        print(f"  e.g. {', '.join(str(key) for key in report['planned'])}")
+
 
 if __name__ == "__main__":
+    from app import app
+
+    parser = argparse.ArgumentParser(description='Seed buildings and space types.')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--rerun', action='store_true', help='Run migrations that already finished again')
+    args = parser.parse_args()
     with app.app_context():
-        update_database()
\ No newline at end of file
+        for report in update_database(args.chunk_size, args.dry_run, args.rerun):
+            print_report(report)
@@ -0,0 +1,215 @@
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from sqlalchemy import event
+
+# --- Endpoint benchmarks: measurement and baselines ---
+#
+# Each benchmark case sends a list of prepared requests through the Flask test
+# client (no network or server in the way):
+#   warm-up requests    not recorded
+#   timed rounds        wall time per request -> min / median / mean / p90
+#   one traced request  peak Python memory allocated while handling it
+#                       (tracemalloc) and the response body size in bytes
+# SQL statements are counted on the engine during every timed round, and the
+# highest count is kept. A route whose cost depends on its input (a cold
+# barcode or a bigger room) is still judged by its worst round. Every
+# response must have an expected status, and pass the case's check (if any)
+# on its body, so a fast wrong answer fails too.
+#
+# Baselines are JSON files in baselines/, one per data set size and database
+# backend (small.json for SQLite, small-postgresql.json, ...). A run fails
+# when any case is worse than its baseline:
+#   latency    median over baseline * (1 + tolerance) + LATENCY_SLACK_MS
+#   queries    any more statements than the baseline
+#   memory     peak over baseline * (1 + MEMORY_TOLERANCE) + MEMORY_SLACK_KIB
+#   size       body over baseline * (1 + BYTES_TOLERANCE) + BYTES_SLACK
+# Metrics missing from either side (a case that does not trace memory, or a
+# baseline recorded before the metric existed) are not compared.
+# Latency baselines are machine-specific: record them on the machine that
+# runs the suite (pytest --bench-update).
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+DEFAULT_ROUNDS = 20
+DEFAULT_WARMUP = 2
+DEFAULT_LATENCY_TOLERANCE = 0.5
+LATENCY_SLACK_MS = 2.0
+MEMORY_TOLERANCE = 0.25
+MEMORY_SLACK_KIB = 64
+BYTES_TOLERANCE = 0.1
+BYTES_SLACK = 256
+
+
+class QueryCounter:
+    """Counts (and keeps) the statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.count = 0
+        self.statements = []
+        self.active = False
+        event.listen(engine, 'before_cursor_execute', self.on_execute)
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active:
+            self.count += 1
+            self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        self.count = 0
+        self.statements = []
+        self.active = True
+        return self
+
+    def __exit__(self, *exc):
+        self.active = False
+
+
+class Case:
+    """
+    One benchmarked request shape. `requests(ctx, n)` returns n request dicts
+    (method, path and optional json / headers / query_string); any set-up they
+    need (fresh rows to delete, queued jobs to cancel) happens there, outside
+    the timed section. `check(spec, response)` asserts on the body of each
+    response with an expected status. `sizes` limits the case to those data
+    set sizes; trace_memory=False skips tracemalloc for requests too big to
+    trace in reasonable time.
+    """
+
+    def __init__(self, name, method, rule, requests, expect=(200,), rounds=DEFAULT_ROUNDS, warmup=DEFAULT_WARMUP,
+                 check=None, sizes=None, trace_memory=True):
+        self.name = name
+        self.method = method
+        self.rule = rule
+        self.requests = requests
+        self.expect = expect
+        self.rounds = rounds
+        self.warmup = warmup
+        self.check = check
+        self.sizes = sizes
+        self.trace_memory = trace_memory
+
+    def __repr__(self):
+        return self.name
+
+
+def send(client, spec):
+    spec = dict(spec)
+    method = spec.pop('method')
+    path = spec.pop('path')
+    return client.open(path, method=method, **spec)
+
+
+def run_case(client, counter, case, ctx):
+    """Measure `case`; returns the result dict recorded in baselines."""
+    specs = case.requests(ctx, case.warmup + case.rounds + 1)
+    failures = []
+
+    def call(spec):
+        response = send(client, spec)
+        response.get_data()  # drain streamed bodies inside the measurement
+        if response.status_code not in case.expect:
+            failures.append(f"{spec['method']} {spec['path']} -> {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        elif case.check is not None:
+            try:
+                case.check(spec, response)
+            except AssertionError as e:
+                failures.append(f"{spec['method']} {spec['path']}: {str(e) or 'check failed'}")
+        return response
+
+    for spec in specs[:case.warmup]:
+        call(spec)
+
+    timings, queries = [], 0
+    for spec in specs[case.warmup:case.warmup + case.rounds]:
+        with counter:
+            started = time.perf_counter()
+            call(spec)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = max(queries, counter.count)
+
+    peak = None
+    if case.trace_memory:
+        tracemalloc.start()
+        try:
+            response = call(specs[-1])
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    else:
+        response = call(specs[-1])
+
+    if failures:
+        raise AssertionError(f'{case.name}: unexpected responses\n' + '\n'.join(failures[:5]))
+
+    return {
+        **latency_summary(timings),
+        'queries': queries,
+        'peak_kib': round(peak / 1024, 1) if peak is not None else None,
+        'bytes': len(response.get_data()),
+    }
+
+
+def latency_summary(timings):
+    """rounds / min / median / mean / p90 / p99 of a list of milliseconds."""
+    timings = sorted(timings)
+
+    def percentile(fraction):
+        return round(timings[min(len(timings) - 1, int(fraction * len(timings)))], 3)
+    return {
+        'rounds': len(timings),
+        'min_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p90_ms': percentile(0.9),
+        'p99_ms': percentile(0.99),
+    }
+
+
+def regressions(result, baseline, latency_tolerance=DEFAULT_LATENCY_TOLERANCE):
+    """Human-readable list of the metrics in `result` worse than `baseline`."""
+    problems = []
+
+    def compared(metric):
+        return result.get(metric) is not None and baseline.get(metric) is not None
+
+    if compared('median_ms'):
+        limit = baseline['median_ms'] * (1 + latency_tolerance) + LATENCY_SLACK_MS
+        if result['median_ms'] > limit:
+            problems.append(f"median {result['median_ms']} ms > {limit:.3f} ms (baseline {baseline['median_ms']} ms)")
+    if compared('queries') and result['queries'] > baseline['queries']:
+        problems.append(f"{result['queries']} queries > baseline {baseline['queries']}")
+    if compared('peak_kib'):
+        limit = baseline['peak_kib'] * (1 + MEMORY_TOLERANCE) + MEMORY_SLACK_KIB
+        if result['peak_kib'] > limit:
+            problems.append(f"peak memory {result['peak_kib']} KiB > {limit:.1f} KiB (baseline {baseline['peak_kib']} KiB)")
+    if compared('bytes'):
+        limit = baseline['bytes'] * (1 + BYTES_TOLERANCE) + BYTES_SLACK
+        if result['bytes'] > limit:
+            problems.append(f"response {result['bytes']} bytes > {limit:.0f} bytes (baseline {baseline['bytes']} bytes)")
+    return problems
+
+
+def baseline_path(size, backend='sqlite'):
+    name = size if backend == 'sqlite' else f'{size}-{backend}'
+    return os.path.join(BASELINE_DIR, f'{name}.json')
+
+
+def load_baselines(size, backend='sqlite'):
+    try:
+        with open(baseline_path(size, backend)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baselines(size, dataset, results, previous=None, backend='sqlite'):
+    """Write the results as the new baselines; cases not run this time keep their old entries."""
+    benchmarks = dict(previous['benchmarks']) if previous else {}
+    benchmarks.update(results)
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    with open(baseline_path(size, backend), 'w') as f:
+        json.dump({'size': size, 'backend': backend, 'dataset': dataset, 'benchmarks': dict(sorted(benchmarks.items()))}, f, indent=2)
+        f.write('\n')
@@ -0,0 +1,273 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import pytest
+from sqlalchemy.engine import make_url
+from bench import (
+    DEFAULT_LATENCY_TOLERANCE, QueryCounter, load_baselines, regressions, run_case, save_baselines
+)
+
+# --- Benchmark session set-up ---
+#
+#   cd BackendTest && python -m pytest -q [--bench-size small|medium|large] [--bench-update]
+#       [--bench-database-url postgresql://user@host/chem_bench]
+#
+# Boots the real app (app.py) against a seeded SQLite database of the chosen
+# size. The seeded database is built once with `flask db upgrade` plus
+# dummy_data.generate_dummy_data and cached in BENCH_CACHE_DIR (default: the
+# system temp dir), keyed by the size, seed, migrations and generator.
+# Every session then benchmarks a fresh copy, because the write endpoints
+# change it.
+#
+# With --bench-database-url (or BENCH_DATABASE_URL) the suite runs against
+# that database server instead, which must be a scratch database: its public
+# schema is dropped and seeded again at the start of every session. Results
+# are compared with that backend's own baselines (e.g. small-postgresql.json).
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Backend')
+sys.path.insert(0, BACKEND_DIR)
+
+SIZES = {
+    'small': {'users': 50, 'pis': 20, 'buildings': 5, 'rooms': 100, 'spaces_per_room': 3, 'chemicals': 10000},
+    'medium': {'users': 200, 'pis': 50, 'buildings': 10, 'rooms': 1000, 'spaces_per_room': 3, 'chemicals': 100000},
+    'large': {'users': 2000, 'pis': 300, 'buildings': 30, 'rooms': 3000, 'spaces_per_room': 4, 'chemicals': 1000000},
+}
+SEED = 1
+
+results_key = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('bench', 'endpoint benchmarks')
+    group.addoption('--bench-size', choices=sorted(SIZES), default='small', help='Seeded data set size (default small)')
+    group.addoption('--bench-update', action='store_true', help='Record the results as the new baselines instead of comparing')
+    group.addoption('--bench-tolerance', type=float, default=DEFAULT_LATENCY_TOLERANCE,
+                    help=f'Allowed median latency increase as a fraction (default {DEFAULT_LATENCY_TOLERANCE})')
+    group.addoption('--bench-json', help='Also write this run\'s results to this file')
+    group.addoption('--bench-database-url', default=os.environ.get('BENCH_DATABASE_URL'),
+                    help='Run against this scratch server database (wiped first) instead of SQLite')
+
+
+def pytest_configure(config):
+    config.stash[results_key] = {}
+    url = config.getoption('--bench-database-url')
+    if url:
+        name = make_url(url).database or ''
+        if 'bench' not in name and 'test' not in name:
+            raise pytest.UsageError(
+                f"--bench-database-url: refusing to wipe database {name!r}; use one whose name contains 'bench' or 'test'")
+
+
+def bench_backend(config):
+    url = config.getoption('--bench-database-url')
+    return make_url(url).get_backend_name() if url else 'sqlite'
+
+
+def dataset_key(size):
+    digest = hashlib.sha1(json.dumps([size, SIZES[size], SEED]).encode())
+    sources = sorted(glob.glob(os.path.join(BACKEND_DIR, 'migrations', 'versions', '*.py')))
+    for path in sources + [os.path.join(BACKEND_DIR, 'dummy_data.py')]:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+class Dataset:
+    """Ids and credentials of the seeded data (from the dummy_data manifest), plus the app."""
+
+    def __init__(self, app, manifest):
+        self.app = app
+        self.password = manifest['password']
+        self.users = manifest['users']
+        self.pis = manifest['pis']
+        self.rooms = manifest['rooms']
+        self.barcodes = manifest['barcodes']  # [barcode, room_id]
+        self.search_terms = manifest['search_terms']
+        self.tokens = {}
+        self._taken = 0
+
+    def take_barcodes(self, n):
+        """Barcodes no earlier case has used (for edits and deletes)."""
+        taken = self.barcodes[len(self.barcodes) - self._taken - n:len(self.barcodes) - self._taken]
+        self._taken += n
+        return taken
+
+    def access_token(self, kind, principal_id):
+        """A signed access token for any principal, without a login round trip."""
+        from api.auth import issue_tokens
+        with self.app.app_context():
+            return issue_tokens(kind, principal_id)['token']
+
+    @staticmethod
+    def chemical_id(barcode):
+        return int(barcode[1:])  # dummy_data.synthetic_barcode
+
+    def room_barcodes(self):
+        """{room_id: [barcode, ...]} of the sampled chemicals."""
+        rooms = {}
+        for barcode, room_id in self.barcodes:
+            rooms.setdefault(room_id, []).append(barcode)
+        return rooms
+
+
+def seed_database(app, size, manifest_path):
+    from flask_migrate import upgrade
+    from dummy_data import generate_dummy_data
+    with app.app_context():
+        upgrade(directory=os.path.join(BACKEND_DIR, 'migrations'))
+        generate_dummy_data(seed=SEED, manifest=manifest_path, **SIZES[size])
+
+
+def set_app_environment(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('SECRET_KEY', 'bench-secret-key')
+    # A periodic counter read would make the scan cases' query counts depend on timing
+    os.environ.setdefault('SCAN_CACHE_CHECK_SECONDS', '3600')
+
+
+def server_app(database_url, size, manifest_path):
+    """The app on a wiped and freshly seeded server database (nothing is cached)."""
+    set_app_environment(database_url)
+    from sqlalchemy import text
+    from app import app
+    from db_models.models import db
+    with app.app_context():
+        db.session.execute(text('DROP SCHEMA public CASCADE'))
+        db.session.execute(text('CREATE SCHEMA public'))
+        db.session.commit()
+    seed_database(app, size, manifest_path)
+    return app
+
+
+@pytest.fixture(scope='session')
+def bench_app(request, tmp_path_factory):
+    size = request.config.getoption('--bench-size')
+    database_url = request.config.getoption('--bench-database-url')
+    if database_url:
+        manifest_path = str(tmp_path_factory.mktemp('bench') / 'manifest.json')
+        app = server_app(database_url, size, manifest_path)
+        with open(manifest_path) as f:
+            app.config['BENCH_MANIFEST'] = json.load(f)
+        return app
+
+    cache_dir = os.environ.get('BENCH_CACHE_DIR', tempfile.gettempdir())
+    pristine = os.path.join(cache_dir, f'chemicals-bench-{size}-{dataset_key(size)}.db')
+    manifest_path = pristine[:-len('.db')] + '.json'
+    working = str(tmp_path_factory.mktemp('bench') / 'chemicals.db')
+    seeded = os.path.exists(pristine) and os.path.exists(manifest_path)
+    if seeded:
+        shutil.copyfile(pristine, working)
+
+    set_app_environment('sqlite:///' + working)
+    from app import app
+    from db_models.models import db
+
+    if not seeded:
+        from sqlalchemy import text
+        seed_database(app, size, manifest_path)
+        with app.app_context():
+            db.session.execute(text('PRAGMA wal_checkpoint(TRUNCATE)'))
+            db.session.remove()
+            db.engine.dispose()
+        shutil.copyfile(working, pristine)
+
+    with open(manifest_path) as f:
+        app.config['BENCH_MANIFEST'] = json.load(f)
+    return app
+
+
+@pytest.fixture(scope='session')
+def client(bench_app):
+    return bench_app.test_client()
+
+
+@pytest.fixture(scope='session')
+def counter(bench_app):
+    from db_models.models import db
+    with bench_app.app_context():
+        return QueryCounter(db.engine)
+
+
+@pytest.fixture(scope='session')
+def dataset(bench_app, client):
+    dataset = Dataset(bench_app, bench_app.config['BENCH_MANIFEST'])
+    for kind, path, email in (('user', '/login', dataset.users[0]), ('pi', '/pi-login', dataset.pis[0]['email'])):
+        body = client.post(path, json={'email': email, 'password': dataset.password}).get_json()
+        dataset.tokens[kind] = body
+    return dataset
+
+
+@pytest.fixture
+def record(request):
+    """Record {name: result} and fail on a regression against the baselines."""
+    config = request.config
+    size = config.getoption('--bench-size')
+    backend = bench_backend(config)
+
+    def record(results):
+        config.stash[results_key].update(results)
+        if config.getoption('--bench-update'):
+            return
+        baselines = (load_baselines(size, backend) or {}).get('benchmarks', {})
+        missing = [name for name in results if name not in baselines]
+        problems = [f'{name} regressed: ' + '; '.join(found) for name, result in results.items() if name in baselines
+                    for found in [regressions(result, baselines[name], config.getoption('--bench-tolerance'))] if found]
+        if problems:
+            pytest.fail('\n'.join(problems), pytrace=False)
+        if missing:
+            pytest.skip(f"No {size} {backend} baseline for {', '.join(missing)}; record one with --bench-update")
+    return record
+
+
+@pytest.fixture
+def benchmark(request, client, counter, dataset, record):
+    """Run a Case, record its result and fail on a regression against the baseline."""
+    size = request.config.getoption('--bench-size')
+
+    def run(case):
+        if case.sizes and size not in case.sizes:
+            pytest.skip(f"{case.name} only runs on {', '.join(case.sizes)} data sets")
+        result = run_case(client, counter, case, dataset)
+        record({case.name: result})
+        return result
+    return run
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    results = config.stash.get(results_key, {})
+    if not results:
+        return
+    size = config.getoption('--bench-size')
+    backend = bench_backend(config)
+    if config.getoption('--bench-update'):
+        save_baselines(size, dict(SIZES[size], seed=SEED), results, load_baselines(size, backend), backend)
+    if config.getoption('--bench-json'):
+        with open(config.getoption('--bench-json'), 'w') as f:
+            json.dump({'size': size, 'backend': backend, 'benchmarks': results}, f, indent=2)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash.get(results_key, {})
+    if not results:
+        return
+    size = config.getoption('--bench-size')
+    backend = bench_backend(config)
+    baselines = (load_baselines(size, backend) or {}).get('benchmarks', {})
+    write = terminalreporter.write_line
+    terminalreporter.section(f'endpoint benchmarks ({size}, {backend})')
+    write(f"{'case':<32}{'median ms':>11}{'p90 ms':>10}{'baseline':>10}{'queries':>9}{'peak KiB':>10}{'bytes':>10}")
+    for name, result in sorted(results.items()):
+        baseline = baselines.get(name)
+        write(f"{name:<32}{result['median_ms']:>11}{result['p90_ms']:>10}"
+              f"{baseline['median_ms'] if baseline else '-':>10}{_shown(result.get('queries')):>9}"
+              f"{_shown(result.get('peak_kib')):>10}{_shown(result.get('bytes')):>10}")
+
+
+def _shown(value):
+    return '-' if value is None else value
@@ -0,0 +1,91 @@
+import io
+import logging
+import queue
+from logging.handlers import QueueListener
+import pytest
+from flask import Flask, Response, stream_with_context
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from api.auth import secret_key_from_env
+from db_models.data_migrations import DataMigration
+from instrumentation import REQUEST_SQL_QUERIES, init_instrumentation
+from logging_config import LOG_FORMAT, RawQueueHandler
+
+
+# --- Application set-up checks (no benchmarking) ---
+
+def test_log_records_are_queued_unformatted():
+    log_queue = queue.SimpleQueue()
+    handler = RawQueueHandler(log_queue)
+    record = logging.LogRecord('chem', logging.INFO, __file__, 1, 'scanned %s in %d ms', ('B0001', 4), None)
+    record.request_id = 'abc'
+    handler.handle(record)
+
+    queued = log_queue.get_nowait()
+    assert queued.msg == 'scanned %s in %d ms' and queued.args == ('B0001', 4)
+    assert not hasattr(queued, 'message')
+
+    stream = io.StringIO()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = QueueListener(log_queue, output)
+    log_queue.put(queued)
+    listener.start()
+    listener.stop()
+    assert stream.getvalue().endswith('INFO [chem] [abc] scanned B0001 in 4 ms\n')
+
+
+def test_failed_statement_leaves_no_query_timer_behind():
+    engine = create_engine('sqlite://')
+    init_instrumentation(Flask(__name__), engine)
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text('SELECT * FROM missing_table'))
+        assert conn.info['query_start'] == {}
+        conn.execute(text('SELECT 1'))
+        assert conn.info['query_start'] == {}
+
+
+def test_streamed_response_queries_are_recorded_after_the_body():
+    app, engine = Flask(__name__), create_engine('sqlite://')
+    init_instrumentation(app, engine)
+
+    @app.route('/streamed-rows')
+    def streamed_rows():
+        def generate():
+            with engine.connect() as conn:
+                for n in range(3):
+                    yield f'{conn.execute(text(f"SELECT {n}")).scalar()}\n'
+        return Response(stream_with_context(generate()))
+
+    def observed():
+        series = REQUEST_SQL_QUERIES.series.get((('endpoint', '/streamed-rows'), ('method', 'GET')))
+        return (series.count, series.sum) if series else (0, 0)
+
+    before = observed()
+    response = app.test_client().get('/streamed-rows')
+    assert response.get_data(as_text=True) == '0\n1\n2\n'
+    response.close()
+    count, total = observed()
+    assert (count - before[0], total - before[1]) == (1, 3)
+
+
+def test_missing_secret_key_fails_outside_debug(monkeypatch):
+    monkeypatch.delenv('SECRET_KEY', raising=False)
+    with pytest.raises(RuntimeError):
+        secret_key_from_env(debug=False)
+    first, second = secret_key_from_env(debug=True), secret_key_from_env(debug=True)
+    assert len(first) == 64 and first != second
+    monkeypatch.setenv('SECRET_KEY', 'configured')
+    assert secret_key_from_env(debug=False) == 'configured'
+
+
+def test_data_migration_must_implement_pending_and_apply():
+    class OnlyPending(DataMigration):
+        name = 'only-pending'
+
+        def pending(self, session, after, limit):
+            return []
+
+    with pytest.raises(TypeError):
+        OnlyPending()
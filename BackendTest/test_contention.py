@@ -0,0 +1,97 @@
+import itertools
+import threading
+import time
+from bench import latency_summary, send
+from test_endpoints import chemical_body, edit_chemical_requests, search_pi_requests
+
+# --- Readers against writers (the user-007 SQLite tuning) ---
+#
+# READERS threads scan and search, each with its own test client, first on
+# their own and then while WRITERS threads keep adding and editing chemicals.
+# Both runs record reader p50/p99 (contention-readers-only and
+# contention-readers-with-writers) and are compared with the baselines like any
+# case. Every response must succeed: a "database is locked" 500 under write
+# load fails the test.
+
+READERS = 4
+WRITERS = 2
+READS_PER_READER = 100
+# Past the barcodes the scan and audit cases read, so the scan cache starts cold
+FIRST_BARCODE = 2000
+
+READ_EXPECT = {'/scan/check_chemical': 200, '/search-chemical': 200}
+WRITE_EXPECT = {'/add_chemical': 201, '/chemicals/update': 200}
+
+
+def reader_requests(ctx, start, n):
+    """n requests alternating scans of barcodes from `start` on and PI-scoped searches."""
+    scans = [dict(method='POST', path='/scan/check_chemical', json={'barcode': barcode, 'selected_room_id': room_id})
+             for barcode, room_id in ctx.barcodes[start:start + (n + 1) // 2]]
+    searches = search_pi_requests(ctx, n // 2)
+    return [spec for pair in itertools.zip_longest(scans, searches) for spec in pair if spec][:n]
+
+
+def writer_requests(ctx, number, edits):
+    """Endless adds (new barcodes) alternating with edits of existing chemicals."""
+    rooms = itertools.cycle(room['id'] for room in ctx.rooms)
+    for i in itertools.count():
+        yield dict(method='POST', path='/add_chemical', json=chemical_body(f'CW{number}{i:07d}', next(rooms)))
+        yield edits[i % len(edits)]
+
+
+def run_threads(app, readers, writers):
+    """Run the reader request lists to completion while the writer generators run; returns (timings, writes, failures)."""
+    timings, failures, writes = [], [], [0]
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def check(spec, response, expect):
+        if response.status_code != expect[spec['path']]:
+            with lock:
+                failures.append(f"{spec['method']} {spec['path']} -> {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+    def read(specs):
+        client = app.test_client()
+        for spec in specs:
+            started = time.perf_counter()
+            response = send(client, spec)
+            response.get_data()
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                timings.append(elapsed)
+            check(spec, response, READ_EXPECT)
+
+    def write(specs):
+        client = app.test_client()
+        for spec in specs:
+            if done.is_set():
+                return
+            check(spec, send(client, spec), WRITE_EXPECT)
+            with lock:
+                writes[0] += 1
+
+    reader_threads = [threading.Thread(target=read, args=(specs,)) for specs in readers]
+    writer_threads = [threading.Thread(target=write, args=(specs,)) for specs in writers]
+    for thread in writer_threads + reader_threads:
+        thread.start()
+    for thread in reader_threads:
+        thread.join()
+    done.set()
+    for thread in writer_threads:
+        thread.join()
+    return timings, writes[0], failures
+
+
+def test_readers_with_and_without_writers(client, dataset, record):
+    per_run = READERS * READS_PER_READER // 2
+    runs = {}
+    for run, (start, writers) in enumerate(((FIRST_BARCODE, 0), (FIRST_BARCODE + per_run, WRITERS))):
+        readers = [reader_requests(dataset, start + i * READS_PER_READER // 2, READS_PER_READER) for i in range(READERS)]
+        edits = [edit_chemical_requests(dataset, 20) for _ in range(writers)]
+        timings, writes, failures = run_threads(
+            dataset.app, readers, [writer_requests(dataset, number, edits[number]) for number in range(writers)])
+        assert not failures, '\n'.join(failures[:5])
+        runs[run] = dict(latency_summary(timings), readers=READERS, writers=writers, writes=writes)
+
+    assert runs[1]['writes'] > 0
+    record({'contention-readers-only': runs[0], 'contention-readers-with-writers': runs[1]})
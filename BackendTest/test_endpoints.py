@@ -0,0 +1,481 @@
+import csv
+import gzip
+import io
+import itertools
+import json
+from datetime import date, timedelta
+import pytest
+from bench import Case
+
+# --- One benchmark case per route (and method) of initialize_routes ---
+#
+# Request builders take the Dataset and a count and return that many request
+# dicts. Rounds rotate through users, PIs, rooms and barcodes so that caches
+# (scan lookups, session scopes) are not hit on every round.
+
+
+def cycle(values, n):
+    return list(itertools.islice(itertools.cycle(values), n))
+
+
+def same(method, path, **kwargs):
+    """The same request every round."""
+    return lambda ctx, n: [dict(method=method, path=path, **kwargs)] * n
+
+
+def bearer(ctx, kind='user'):
+    return {'Authorization': f"Bearer {ctx.tokens[kind]['token']}"}
+
+
+def db_setup(ctx, work):
+    """Run `work(db)` in an app context (set-up outside the timed section); returns its result."""
+    from db_models.models import db
+    with ctx.app.app_context():
+        return work(db)
+
+
+# --- Response checks: check(spec, response) asserts the answer is right, not just fast ---
+
+def has_token(spec, response):
+    assert response.get_json().get('token'), 'no access token'
+
+
+def matches_query(spec, response):
+    term = spec['json']['query'].lower()
+    names = [result['name'] for result in response.get_json()['results']]
+    assert all(term in name.lower() for name in names), f'a result does not match {term!r}'
+
+
+def scanned_chemical(spec, response):
+    info = response.get_json()['chemical_info']
+    assert (info['barcode'], info['room_id']) == (spec['json']['barcode'], spec['json']['selected_room_id'])
+
+
+def misplaced_alert(spec, response):
+    assert response.get_json()['alert'].startswith('Please return this chemical to ')
+
+
+def audit_counts(spec, response):
+    body = response.get_json()
+    counts, scanned = body['counts'], spec['json']['barcodes']
+    assert counts['scanned'] == len(scanned)
+    assert counts['matched'] + counts['misplaced'] + counts['unknown'] == len(scanned)
+    assert 'X000000000' in body['unknown']
+    assert all(chemical['room_id'] == spec['json']['room_id'] for chemical in body['matched'] + body['not_scanned'])
+
+
+def in_requested_room(spec, response):
+    room_id = int(spec['path'].rsplit('/', 1)[1])
+    chemicals = response.get_json()['chemicals']
+    assert chemicals and all(chemical['room_id'] == room_id for chemical in chemicals)
+
+
+def page_after_cursor(spec, response):
+    ids = [chemical['id'] for chemical in response.get_json()['chemicals']]
+    assert len(ids) == spec['query_string']['limit'] and ids == sorted(ids) and ids[0] > spec['query_string']['cursor']
+
+
+def named(spec, response):
+    chemicals = response.get_json()['chemicals']
+    assert chemicals and all(chemical['name'] == spec['query_string']['name'] for chemical in chemicals)
+
+
+def one_barcode(spec, response):
+    barcodes = [chemical['barcode'] for chemical in response.get_json()['chemicals']]
+    assert barcodes == [spec['query_string']['barcode']], barcodes
+
+
+def exported_room(spec, response):
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert rows and all(int(row['room_id']) == spec['query_string']['room_id'] for row in rows)
+
+
+def expiring_in_window(spec, response):
+    body = response.get_json()
+    cutoff = date.fromisoformat(body['as_of']) + timedelta(days=body['days'])
+    dates = [chemical['expiration_date'] for pi in body['pis'] for room in pi['rooms'] for chemical in room['chemicals']]
+    assert dates and all(date.fromisoformat(value) <= cutoff for value in dates)
+
+
+def synced_room(spec, response):
+    assert [room['id'] for room in response.get_json()['rooms']] == [spec['query_string']['room_id']]
+
+
+def all_inserted(spec, response):
+    body = response.get_json()
+    assert (body['inserted'], body['failed']) == (len(spec['json']), 0), body['results'][:3]
+
+
+def same_barcode(spec, response):
+    assert response.get_json()['barcode'] == spec['json']['barcode']
+
+
+def not_modified(spec, response):
+    assert response.get_data() == b'' and response.headers['ETag'] == spec['headers']['If-None-Match']
+
+
+def gzipped(spec, response):
+    assert response.headers.get('Content-Encoding') == 'gzip'
+    assert json.loads(gzip.decompress(response.get_data()))
+
+
+def whole_table(spec, response):
+    ids = [chemical['id'] for chemical in response.get_json()]
+    assert ids and ids == sorted(set(ids))
+
+
+# --- Authentication ---
+
+def login_requests(ctx, n):
+    return [dict(method='POST', path='/login', json={'email': email, 'password': ctx.password})
+            for email in cycle(ctx.users, n)]
+
+
+def pi_login_requests(ctx, n):
+    return [dict(method='POST', path='/pi-login', json={'email': pi['email'], 'password': ctx.password})
+            for pi in cycle(ctx.pis, n)]
+
+
+def session_requests(ctx, n):
+    return [dict(method='GET', path='/auth/session', headers=bearer(ctx))] * n
+
+
+def refresh_requests(ctx, n):
+    return [dict(method='POST', path='/auth/refresh', json={'refresh_token': ctx.tokens['user']['refresh_token']})] * n
+
+
+# --- Search and scanning ---
+
+def search_pi_requests(ctx, n):
+    pairs = zip(cycle(ctx.rooms, n), cycle(ctx.search_terms, n))
+    return [dict(method='POST', path='/search-chemical',
+                 headers={'Authorization': f"Bearer {ctx.access_token('pi', room['pi_id'])}"},
+                 json={'scope': 'pi', 'pi_id': room['pi_id'], 'query': term})
+            for room, term in pairs]
+
+
+def search_user_requests(ctx, n):
+    return [dict(method='POST', path='/search-chemical', headers=bearer(ctx), json={'scope': 'all', 'query': term})
+            for term in cycle(ctx.search_terms, n)]
+
+
+def scan_requests(ctx, n):
+    return [dict(method='POST', path='/scan/check_chemical', json={'barcode': barcode, 'selected_room_id': room_id})
+            for barcode, room_id in ctx.barcodes[:n]]
+
+
+def misplaced_scan_requests(ctx, n):
+    rooms = [room['id'] for room in ctx.rooms]
+    return [dict(method='POST', path='/scan/check_chemical',
+                 json={'barcode': barcode, 'selected_room_id': next(r for r in rooms if r != room_id)})
+            for barcode, room_id in ctx.barcodes[n:2 * n]]
+
+
+def audit_requests(ctx, n):
+    rooms = ctx.room_barcodes()
+    return [dict(method='POST', path='/scan/audit', json={'room_id': room_id, 'barcodes': rooms[room_id] + ['X000000000']})
+            for room_id in cycle(sorted(rooms), n)]
+
+
+def large_audit_requests(ctx, n, size=1000):
+    """A 1000-barcode audit: the room's own chemicals are matched, the rest misplaced."""
+    barcodes = [barcode for barcode, _ in ctx.barcodes[:size - 1]] + ['X000000000']
+    return [dict(method='POST', path='/scan/audit', json={'room_id': room_id, 'barcodes': barcodes})
+            for room_id in room_ids(ctx, n)]
+
+
+# --- Rooms, spaces and chemical lists ---
+
+def room_ids(ctx, n):
+    return [room['id'] for room in cycle(ctx.rooms, n)]
+
+
+def room_details_requests(ctx, n):
+    return [dict(method='POST', path='/rooms/details', json={'room_id': room_id}) for room_id in room_ids(ctx, n)]
+
+
+def room_chemicals_requests(ctx, n):
+    return [dict(method='GET', path=f'/chemicals/room/{room_id}', query_string={'limit': 100}) for room_id in room_ids(ctx, n)]
+
+
+def room_spaces_requests(ctx, n):
+    return [dict(method='GET', path=f'/rooms/{room_id}/spaces') for room_id in room_ids(ctx, n)]
+
+
+def room_revalidate_requests(ctx, n):
+    """Room listings sent with the ETag they were just served with, so every round is a 304."""
+    fetch = ctx.app.test_client().get
+    etags = {room_id: fetch(f'/chemicals/room/{room_id}', query_string={'limit': 100}).headers['ETag']
+             for room_id in room_ids(ctx, len(ctx.rooms))}
+    return [dict(method='GET', path=f'/chemicals/room/{room_id}', query_string={'limit': 100},
+                 headers={'If-None-Match': etags[room_id]}) for room_id in room_ids(ctx, n)]
+
+
+def revalidate(path):
+    """The same GET every round, sent with the ETag it was just served with."""
+    def requests(ctx, n):
+        etag = ctx.app.test_client().get(path).headers['ETag']
+        return [dict(method='GET', path=path, headers={'If-None-Match': etag})] * n
+    return requests
+
+
+def deep_page_requests(ctx, n):
+    cursor = ctx.chemical_id(ctx.barcodes[len(ctx.barcodes) // 2][0])
+    return [dict(method='GET', path='/chemicals', query_string={'limit': 100, 'cursor': cursor})] * n
+
+
+def query_by_barcode_requests(ctx, n):
+    return [dict(method='GET', path='/chemicals/query', query_string={'barcode': barcode})
+            for barcode, _ in ctx.barcodes[:n]]
+
+
+def export_requests(ctx, n):
+    return [dict(method='GET', path='/chemicals/export', query_string={'format': 'csv', 'room_id': room_id})
+            for room_id in room_ids(ctx, n)]
+
+
+def sync_room_requests(ctx, n):
+    return [dict(method='GET', path='/sync', query_string={'room_id': room_id, 'since': 0}) for room_id in room_ids(ctx, n)]
+
+
+def sync_pi_requests(ctx, n):
+    return [dict(method='GET', path='/sync', query_string={'pi_id': pi['id'], 'since': 0}) for pi in cycle(ctx.pis, n)]
+
+
+def expiring_requests(ctx, n):
+    return [dict(method='GET', path='/chemicals/expiring', query_string={'days': 30, 'pi_id': pi['id']})
+            for pi in cycle(ctx.pis, n)]
+
+
+def digest_requests(ctx, n):
+    from api.expiration import DEFAULT_WINDOW_DAYS, refresh_expiration_digests
+    db_setup(ctx, lambda db: refresh_expiration_digests(db.session, DEFAULT_WINDOW_DAYS))
+    return [dict(method='GET', path='/expiration/digest', query_string={'pi_id': pi['id']}) for pi in cycle(ctx.pis, n)]
+
+
+def user_pis_requests(ctx, n):
+    from db_models.models import User
+    emails = cycle(ctx.users, n)
+    ids = db_setup(ctx, lambda db: dict(db.session.query(User.email, User.id).filter(User.email.in_(emails))))
+    return [dict(method='GET', path=f'/users/{ids[email]}/pis') for email in emails]
+
+
+# --- Writes ---
+
+def chemical_body(barcode, room_id):
+    return {'barcode': barcode, 'name': 'Benchmark Acid', 'cas_number': '7664-93-9', 'room_id': room_id,
+            'amount': 500, 'unit': 'mL', 'expiration_date': '2030-01-01'}
+
+
+def add_chemical_requests(ctx, n):
+    return [dict(method='POST', path='/add_chemical', json=chemical_body(f'BA{i:08d}', room_id))
+            for i, room_id in enumerate(room_ids(ctx, n))]
+
+
+def create_chemical_requests(ctx, n):
+    return [dict(method='POST', path='/chemicals', json=chemical_body(f'BC{i:08d}', room_id))
+            for i, room_id in enumerate(room_ids(ctx, n))]
+
+
+def bulk_requests(ctx, n, rows=100, prefix='BB'):
+    return [dict(method='POST', path='/chemicals/bulk',
+                 json=[chemical_body(f'{prefix}{i * rows + k:08d}', room_id) for k in range(rows)])
+            for i, room_id in enumerate(room_ids(ctx, n))]
+
+
+def bulk_10k_requests(ctx, n):
+    return bulk_requests(ctx, n, 10000, 'BK')
+
+
+def bulk_100k_requests(ctx, n):
+    return bulk_requests(ctx, n, 100000, 'BM')
+
+
+def edit_chemical_requests(ctx, n):
+    from db_models.models import Chemical
+    ids = [ctx.chemical_id(barcode) for barcode, _ in ctx.take_barcodes(n)]
+    spaces = db_setup(ctx, lambda db: dict(db.session.query(Chemical.id, Chemical.space_id).filter(Chemical.id.in_(ids))))
+    return [dict(method='PUT', path='/chemicals/update', json={
+        'id': chemical_id, 'name': 'Benchmark Acid', 'cas_number': '7664-93-9', 'amount': 250, 'unit': 'mL',
+        'expiration_date': '2030-01-01', 'space_id': spaces[chemical_id]
+    }) for chemical_id in ids]
+
+
+def delete_chemical_requests(ctx, n):
+    return [dict(method='DELETE', path=f'/chemicaldelete/{ctx.chemical_id(barcode)}') for barcode, _ in ctx.take_barcodes(n)]
+
+
+def building_ids(ctx):
+    from db_models.models import Building
+    return db_setup(ctx, lambda db: [building_id for building_id, in db.session.query(Building.id).order_by(Building.id)])
+
+
+def add_room_requests(ctx, n):
+    buildings = building_ids(ctx)
+    return [dict(method='POST', path='/add_room', json={
+        'pi_id': pi['id'], 'room_number': f'B{i}', 'building_id': buildings[i % len(buildings)], 'contact_name': 'Bench'
+    }) for i, pi in enumerate(cycle(ctx.pis, n))]
+
+
+def create_room_requests(ctx, n):
+    buildings = building_ids(ctx)
+    return [dict(method='POST', path='/rooms', json={
+        'pi_id': pi['id'], 'room_number': f'C{i}', 'building_id': buildings[i % len(buildings)]
+    }) for i, pi in enumerate(cycle(ctx.pis, n))]
+
+
+def update_room_requests(ctx, n):
+    return [dict(method='POST', path='/rooms/update_field', json={'room_id': room_id, 'contact_name': f'Bench {i}'})
+            for i, room_id in enumerate(room_ids(ctx, n))]
+
+
+def edit_space_requests(ctx, n):
+    from db_models.models import Space
+    rooms = room_ids(ctx, n)
+    spaces = db_setup(ctx, lambda db: dict(db.session.query(Space.room_id, Space.id).filter(Space.room_id.in_(rooms))))
+    return [dict(method='POST', path='/manage_space', json={'id': spaces[room_id], 'room_id': room_id, 'description': f'Shelf {i}'})
+            for i, room_id in enumerate(rooms)]
+
+
+def create_space_requests(ctx, n):
+    return [dict(method='POST', path='/spaces', json={'room_id': room_id, 'description': 'Bench shelf', 'space_type': 'Hazardous'})
+            for room_id in room_ids(ctx, n)]
+
+
+def create_building_requests(ctx, n):
+    return [dict(method='POST', path='/buildings', json={'name': f'Bench Hall {i}'}) for i in range(n)]
+
+
+def create_user_requests(ctx, n):
+    return [dict(method='POST', path='/users', json={'name': 'Bench User', 'email': f'bench-user{i}@example.edu', 'password': ctx.password})
+            for i in range(n)]
+
+
+def create_pi_requests(ctx, n):
+    return [dict(method='POST', path='/pis', json={'name': 'Bench PI', 'email': f'bench-pi{i}@example.edu', 'password': ctx.password})
+            for i in range(n)]
+
+
+def bare_user(ctx, email, pi_ids=()):
+    """Insert a user (sharing the seeded password hash) linked to `pi_ids`; returns its id."""
+    from sqlalchemy import insert
+    from db_models.models import User, user_pi
+
+    def work(db):
+        password_hash = db.session.query(User.password_hash).limit(1).scalar()
+        user_id = db.session.execute(insert(User).values(name='Bench User', email=email, password_hash=password_hash)).inserted_primary_key[0]
+        if pi_ids:
+            db.session.execute(insert(user_pi), [{'user_id': user_id, 'pi_id': pi_id} for pi_id in pi_ids])
+        db.session.commit()
+        return user_id
+    return db_setup(ctx, work)
+
+
+def link_pi_requests(ctx, n):
+    pairs = []
+    while len(pairs) < n:
+        user_id = bare_user(ctx, f'bench-link{len(pairs)}@example.edu')
+        pairs.extend((user_id, pi['id']) for pi in ctx.pis[:n - len(pairs)])
+    return [dict(method='POST', path=f'/users/{user_id}/pis/{pi_id}') for user_id, pi_id in pairs]
+
+
+def unlink_pi_requests(ctx, n):
+    pairs = []
+    while len(pairs) < n:
+        pi_ids = [pi['id'] for pi in ctx.pis[:n - len(pairs)]]
+        user_id = bare_user(ctx, f'bench-unlink{len(pairs)}@example.edu', pi_ids)
+        pairs.extend((user_id, pi_id) for pi_id in pi_ids)
+    return [dict(method='DELETE', path=f'/users/{user_id}/pis/{pi_id}') for user_id, pi_id in pairs]
+
+
+# --- Background jobs ---
+
+def queued_jobs(ctx, n):
+    from db_models.jobs import enqueue
+    return db_setup(ctx, lambda db: [enqueue(db.session, 'expiration-digest', {'days': 30}).id for _ in range(n)])
+
+
+def job_status_requests(ctx, n):
+    return [dict(method='GET', path=f'/jobs/{job_id}') for job_id in cycle(queued_jobs(ctx, 5), n)]
+
+
+def cancel_job_requests(ctx, n):
+    return [dict(method='POST', path=f'/jobs/{job_id}/cancel') for job_id in queued_jobs(ctx, n)]
+
+
+CASES = [
+    Case('login', 'POST', '/login', login_requests, rounds=5, warmup=1, check=has_token),
+    Case('pi-login', 'POST', '/pi-login', pi_login_requests, rounds=5, warmup=1, check=has_token),
+    Case('auth-session', 'GET', '/auth/session', session_requests),
+    Case('auth-refresh', 'POST', '/auth/refresh', refresh_requests, check=has_token),
+    Case('search-pi', 'POST', '/search-chemical', search_pi_requests, check=matches_query),
+    Case('search-user-all', 'POST', '/search-chemical', search_user_requests, check=matches_query),
+    Case('scan', 'POST', '/scan/check_chemical', scan_requests, check=scanned_chemical),
+    Case('scan-misplaced', 'POST', '/scan/check_chemical', misplaced_scan_requests, expect=(400,), check=misplaced_alert),
+    Case('scan-audit', 'POST', '/scan/audit', audit_requests, check=audit_counts),
+    Case('scan-audit-1000', 'POST', '/scan/audit', large_audit_requests, rounds=10, check=audit_counts),
+    Case('room-details', 'POST', '/rooms/details', room_details_requests),
+    Case('room-chemicals', 'GET', '/chemicals/room/<int:room_id>', room_chemicals_requests, check=in_requested_room),
+    Case('room-chemicals-304', 'GET', '/chemicals/room/<int:room_id>', room_revalidate_requests, expect=(304,),
+         check=not_modified),
+    Case('room-spaces', 'GET', '/rooms/<int:room_id>/spaces', room_spaces_requests),
+    Case('chemicals-list', 'GET', '/chemicals', same('GET', '/chemicals', query_string={'limit': 100})),
+    Case('chemicals-list-deep', 'GET', '/chemicals', deep_page_requests, check=page_after_cursor),
+    # Serializes the whole table: 10k chemicals on the small data set
+    Case('chemicals-stream-all', 'GET', '/chemicals', same('GET', '/chemicals', query_string={'stream': 'true'}),
+         rounds=5, warmup=1, check=whole_table),
+    Case('chemicals-query-name', 'GET', '/chemicals/query', same('GET', '/chemicals/query', query_string={'name': 'Acetone', 'limit': 100}),
+         check=named),
+    Case('chemicals-query-barcode', 'GET', '/chemicals/query', query_by_barcode_requests, check=one_barcode),
+    Case('chemicals-export-room', 'GET', '/chemicals/export', export_requests, check=exported_room),
+    Case('inventory-summary', 'GET', '/inventory/summary', same('GET', '/inventory/summary', query_string={'group_by': 'building,space_type'})),
+    Case('chemicals-expiring', 'GET', '/chemicals/expiring', expiring_requests, check=expiring_in_window),
+    Case('expiration-digest', 'GET', '/expiration/digest', digest_requests),
+    Case('sync-room', 'GET', '/sync', sync_room_requests, check=synced_room),
+    Case('sync-pi', 'GET', '/sync', sync_pi_requests),
+    Case('buildings-fetch', 'GET', '/buildings-fetch', same('GET', '/buildings-fetch')),
+    Case('pis-all', 'GET', '/pis/all', same('GET', '/pis/all')),
+    Case('pis-all-304', 'GET', '/pis/all', revalidate('/pis/all'), expect=(304,), check=not_modified),
+    Case('users-all', 'GET', '/users/all', same('GET', '/users/all')),
+    # Same response as users-all; compare the bytes columns for the bandwidth saved
+    Case('users-all-gzip', 'GET', '/users/all', same('GET', '/users/all', headers={'Accept-Encoding': 'gzip'}),
+         check=gzipped),
+    Case('user-pis', 'GET', '/users/<int:user_id>/pis', user_pis_requests),
+    Case('jobs-list', 'GET', '/jobs', same('GET', '/jobs')),
+    Case('job-status', 'GET', '/jobs/<int:job_id>', job_status_requests),
+    Case('job-submit', 'POST', '/jobs', same('POST', '/jobs', json={'kind': 'expiration-digest', 'params': {}}), expect=(202,)),
+    Case('job-cancel', 'POST', '/jobs/<int:job_id>/cancel', cancel_job_requests),
+    Case('add-chemical', 'POST', '/add_chemical', add_chemical_requests, expect=(201,)),
+    Case('chemicals-create', 'POST', '/chemicals', create_chemical_requests, check=same_barcode),
+    Case('chemicals-bulk-100', 'POST', '/chemicals/bulk', bulk_requests, rounds=10, check=all_inserted),
+    Case('chemical-edit', 'PUT', '/chemicals/update', edit_chemical_requests),
+    Case('chemical-delete', 'DELETE', '/chemicaldelete/<int:chemical_id>', delete_chemical_requests),
+    Case('add-room', 'POST', '/add_room', add_room_requests),
+    Case('rooms-create', 'POST', '/rooms', create_room_requests),
+    Case('room-update-field', 'POST', '/rooms/update_field', update_room_requests),
+    Case('space-edit', 'POST', '/manage_space', edit_space_requests),
+    Case('spaces-create', 'POST', '/spaces', create_space_requests),
+    Case('buildings-create', 'POST', '/buildings', create_building_requests),
+    Case('users-create', 'POST', '/users', create_user_requests, rounds=3, warmup=0),
+    Case('pis-create', 'POST', '/pis', create_pi_requests, rounds=3, warmup=0),
+    Case('user-pi-link', 'POST', '/users/<int:user_id>/pis/<int:pi_id>', link_pi_requests),
+    Case('user-pi-unlink', 'DELETE', '/users/<int:user_id>/pis/<int:pi_id>', unlink_pi_requests),
+    # Last, so the rows they add do not change what the cases above read
+    Case('chemicals-bulk-10k', 'POST', '/chemicals/bulk', bulk_10k_requests, rounds=3, warmup=0, check=all_inserted),
+    Case('chemicals-bulk-100k', 'POST', '/chemicals/bulk', bulk_100k_requests, rounds=2, warmup=0, check=all_inserted,
+         sizes=('medium', 'large'), trace_memory=False),
+]
+
+
+def test_every_route_has_a_case(bench_app):
+    ignored = {'static', 'metrics'}
+    methods = {'GET', 'POST', 'PUT', 'DELETE', 'PATCH'}
+    routes = {(method, rule.rule) for rule in bench_app.url_map.iter_rules() if rule.endpoint not in ignored
+              for method in rule.methods & methods}
+    missing = routes - {(case.method, case.rule) for case in CASES}
+    assert not missing, f'Routes without a benchmark case: {sorted(missing)}'
+
+
+@pytest.mark.parametrize('case', CASES, ids=[case.name for case in CASES])
+def test_endpoint(case, benchmark):
+    benchmark(case)
@@ -0,0 +1,61 @@
+import logging
+import time
+from bench import latency_summary, send
+from test_endpoints import chemical_body, search_pi_requests
+
+# --- Cost of DEBUG logging (the user-009 queued, level-gated logging) ---
+#
+# The same mix of searches and chemical adds runs with the root logger at INFO
+# and then at DEBUG. Both timings are recorded (log-level-info and
+# log-level-debug), along with how many records each request produced: at INFO
+# no debug record may get past the level check.
+
+REQUESTS = 100
+
+
+class CountingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.levels = []
+
+    def emit(self, record):
+        self.levels.append(record.levelno)
+
+
+def mixed_requests(ctx, prefix):
+    searches = search_pi_requests(ctx, REQUESTS // 2)
+    adds = [dict(method='POST', path='/add_chemical', json=chemical_body(f'{prefix}{i:08d}', room['id']))
+            for i, room in enumerate(ctx.rooms[:REQUESTS // 2])]
+    return [spec for pair in zip(searches, adds) for spec in pair]
+
+
+def timed_at(level, client, specs):
+    root = logging.getLogger()
+    counter = CountingHandler()
+    previous = root.level
+    root.setLevel(level)
+    root.addHandler(counter)
+    try:
+        timings = []
+        for spec in specs:
+            started = time.perf_counter()
+            response = send(client, spec)
+            response.get_data()
+            timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code in (200, 201), response.get_data(as_text=True)[:200]
+    finally:
+        root.removeHandler(counter)
+        root.setLevel(previous)
+    return timings, counter.levels
+
+
+def test_debug_logging_overhead(client, dataset, record):
+    info_timings, info_levels = timed_at(logging.INFO, client, mixed_requests(dataset, 'LI'))
+    debug_timings, debug_levels = timed_at(logging.DEBUG, client, mixed_requests(dataset, 'LD'))
+
+    assert info_levels and min(info_levels) >= logging.INFO
+    assert debug_levels.count(logging.DEBUG) > 0
+    record({
+        'log-level-info': dict(latency_summary(info_timings), records_per_request=round(len(info_levels) / REQUESTS, 2)),
+        'log-level-debug': dict(latency_summary(debug_timings), records_per_request=round(len(debug_levels) / REQUESTS, 2)),
+    })
@@ -0,0 +1,58 @@
+import time
+from sqlalchemy import func, select, update
+from bench import latency_summary
+
+# --- Data migration timing (the user-023 update_database rewrite) ---
+#
+# Clears every space type of the seeded database, then times the
+# assign-space-types data migration as a dry run and for real (chunked, one
+# commit per chunk). The migration must type every space, keep the
+# incrementally maintained inventory summary equal to a full rebuild, and be a
+# no-op when run again.
+
+MIGRATION = 'assign-space-types'
+
+
+def summary_rows(session):
+    from db_models.models import InventorySummary
+    rows = session.execute(select(
+        InventorySummary.room_id, InventorySummary.space_type,
+        InventorySummary.chemical_count, InventorySummary.total_weight_lbs,
+    ).where(InventorySummary.chemical_count != 0)).all()
+    return {(room_id, space_type): (count, round(weight, 3)) for room_id, space_type, count, weight in rows}
+
+
+def timed(work):
+    started = time.perf_counter()
+    result = work()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def test_assign_space_types_timing(dataset, record):
+    from db_models.models import db, Space
+    from db_models.summary import rebuild_inventory_summary
+    from update_database import update_database
+
+    with dataset.app.app_context():
+        session = db.session
+        session.execute(update(Space).values(space_type=None))
+        rebuild_inventory_summary(session)  # raw update above skipped the summary hook
+        session.commit()
+        spaces = session.scalar(select(func.count(Space.id)))
+
+        (dry_run,), dry_ms = timed(lambda: update_database(dry_run=True, rerun=True, names=[MIGRATION]))
+        (applied,), applied_ms = timed(lambda: update_database(rerun=True, names=[MIGRATION]))
+        (again,) = update_database(names=[MIGRATION])
+
+        assert dry_run['changed'] == applied['changed'] == spaces
+        assert session.scalar(select(func.count(Space.id)).where(func.coalesce(Space.space_type, '') == '')) == 0
+        assert again['skipped']
+        maintained = summary_rows(session)
+        rebuild_inventory_summary(session)
+        assert maintained == summary_rows(session)
+        session.commit()
+
+    record({
+        'data-migration-dry-run': dict(latency_summary([dry_ms]), rows=spaces),
+        'data-migration-apply': dict(latency_summary([applied_ms]), rows=spaces, chunks=applied['chunks']),
+    })
@@ -0,0 +1,50 @@
+import re
+import pytest
+from sqlalchemy import text
+from bench import send
+from test_endpoints import CASES
+
+# --- Query plans of the read routes (the user-006 indexes) ---
+#
+# Sends one request per case, then EXPLAINs every SELECT it ran and fails on
+# a full scan of the chemical, room or space tables. On PostgreSQL sequential
+# scans are switched off for the EXPLAIN, so a Seq Scan only shows up when no
+# index can serve the query (on small tables the planner would otherwise pick
+# one regardless).
+
+PLANNED_CASES = [
+    'search-pi', 'search-user-all', 'scan', 'scan-audit', 'room-details', 'room-chemicals', 'room-spaces',
+    'chemicals-list', 'chemicals-list-deep', 'chemicals-query-barcode', 'chemicals-export-room',
+    'chemicals-expiring', 'sync-room', 'sync-pi', 'user-pis',
+]
+FULL_SCAN = {
+    'sqlite': re.compile(r'^SCAN (chemical|room|space)\b'),
+    'postgresql': re.compile(r'Seq Scan on (chemical|room|space)\b'),
+}
+CASES_BY_NAME = {case.name: case for case in CASES}
+
+
+def explain(conn, statement, parameters):
+    if conn.dialect.name == 'sqlite':
+        return [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+    return [row[0] for row in conn.exec_driver_sql('EXPLAIN ' + statement, parameters)]
+
+
+@pytest.mark.parametrize('name', PLANNED_CASES)
+def test_read_route_uses_indexes(name, client, counter, dataset):
+    from db_models.models import db
+    spec = CASES_BY_NAME[name].requests(dataset, 1)[0]
+    with counter:
+        send(client, spec).get_data()
+    selects = [(statement, parameters) for statement, parameters in counter.statements
+               if statement.lstrip().upper().startswith('SELECT') and 'sqlite_master' not in statement]
+    assert selects
+
+    with dataset.app.app_context(), db.engine.connect() as conn:
+        full_scan = FULL_SCAN[conn.dialect.name]
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text('SET enable_seqscan = off'))
+        for statement, parameters in selects:
+            plan = explain(conn, statement, parameters)
+            scans = [line for line in plan if full_scan.search(line.strip())]
+            assert not scans, f'{name} scans a whole table:\n{statement}\n' + '\n'.join(plan)
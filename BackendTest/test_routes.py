@@ -0,0 +1,204 @@
+import json
+from datetime import date, timedelta
+from api.validation import INVALID_BARCODE_MESSAGE, INVALID_DATE_MESSAGE, SERVER_ERROR_MESSAGE
+
+# --- Behaviour of individual routes ---
+#
+# Uses the same seeded app as the benchmarks (see conftest.py); every test
+# creates the rows it checks, so it does not depend on the benchmark cases.
+
+
+def test_created_user_can_log_in(client):
+    response = client.post('/users', json={'name': 'Route Test', 'email': 'route-user@example.edu', 'password': 's3cret'})
+    assert response.status_code == 200
+    assert response.get_json()['name'] == 'Route Test'
+
+    login = client.post('/login', json={'email': 'route-user@example.edu', 'password': 's3cret'})
+    assert login.status_code == 200
+    assert login.get_json()['token']
+    assert client.post('/login', json={'email': 'route-user@example.edu', 'password': 'wrong'}).status_code == 401
+
+
+def test_created_pi_can_log_in(client):
+    response = client.post('/pis', json={'name': 'Route PI', 'email': 'route-pi@example.edu', 'password': 's3cret'})
+    assert response.status_code == 200
+
+    login = client.post('/pi-login', json={'email': 'route-pi@example.edu', 'password': 's3cret'})
+    assert login.status_code == 200
+    assert login.get_json()['pi_id'] == response.get_json()['id']
+    assert client.post('/pi-login', json={'email': 'route-pi@example.edu', 'password': 'wrong'}).status_code == 401
+
+
+def test_create_chemical_keeps_its_barcode(client, dataset):
+    room_id = dataset.rooms[0]['id']
+    for barcode in ('RT00000001', 'RT00000002'):
+        response = client.post('/chemicals', json={
+            'barcode': barcode, 'name': 'Route Acid', 'cas_number': '7664-93-9', 'room_id': room_id,
+            'amount': 1, 'unit': 'L', 'expiration_date': '2030-01-01'
+        })
+        assert response.status_code == 200
+        assert response.get_json()['barcode'] == barcode
+
+        scan = client.post('/scan/check_chemical', json={'barcode': barcode, 'selected_room_id': room_id})
+        assert scan.status_code == 200
+        assert scan.get_json()['chemical_info']['name'] == 'Route Acid'
+
+
+def add_chemical(client, barcode, room_id, expiration_date='2030-01-01', **fields):
+    body = {'barcode': barcode, 'name': 'Route Acid', 'cas_number': '7664-93-9', 'room_id': room_id,
+            'amount': 1, 'unit': 'L', 'expiration_date': expiration_date, **fields}
+    response = client.post('/add_chemical', json=body)
+    assert response.status_code == 201, response.get_json()
+    return body
+
+
+def exported_barcodes(client, **filters):
+    lines = client.get('/chemicals/export', query_string={'format': 'ndjson', **filters}).get_data(as_text=True).splitlines()
+    return {json.loads(line)['barcode'] for line in lines}
+
+
+def test_export_uses_the_earlier_expiry_cutoff(client, dataset):
+    room_id = dataset.rooms[1]['id']
+    today = date.today()
+    for barcode, days in (('RX00000005', 5), ('RX00000020', 20)):
+        add_chemical(client, barcode, room_id, (today + timedelta(days=days)).isoformat())
+    ours = {'RX00000005', 'RX00000020'}
+
+    soon = (today + timedelta(days=10)).isoformat()
+    later = (today + timedelta(days=365)).isoformat()
+    assert exported_barcodes(client, room_id=room_id, expiring_within_days=30, expires_before=soon) & ours == {'RX00000005'}
+    assert exported_barcodes(client, room_id=room_id, expiring_within_days=10, expires_before=later) & ours == {'RX00000005'}
+    assert exported_barcodes(client, room_id=room_id, expiring_within_days=30) & ours == ours
+
+
+def test_non_string_expiration_date_is_a_validation_error(client, dataset):
+    room_id = dataset.rooms[2]['id']
+    body = {'barcode': 'RD00000001', 'name': 'Route Acid', 'cas_number': '7664-93-9', 'room_id': room_id,
+            'amount': 1, 'unit': 'L', 'expiration_date': 20300101}
+    response = client.post('/add_chemical', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == INVALID_DATE_MESSAGE
+
+    response = client.post('/chemicals/bulk', json=[body])
+    assert response.status_code == 200
+    assert response.get_json()['results'][0]['message'] == INVALID_DATE_MESSAGE
+
+
+def test_non_string_barcode_is_a_validation_error(client, dataset):
+    room_id = dataset.rooms[2]['id']
+    row = {'name': 'Route Acid', 'cas_number': '7664-93-9', 'room_id': room_id, 'amount': 1, 'unit': 'L'}
+    rows = [dict(row, barcode=['RN00000001']), dict(row, barcode={'code': 'RN00000002'}),
+            dict(row, barcode='RN00000003'), dict(row, barcode=40000004)]
+    response = client.post('/chemicals/bulk', json=rows)
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['message'] for result in results[:2]] == [INVALID_BARCODE_MESSAGE] * 2
+    assert [result['success'] for result in results] == [False, False, True, True]
+    assert results[3]['barcode'] == '40000004'
+
+    response = client.post('/add_chemical', json=dict(row, barcode=['RN00000005']))
+    assert response.status_code == 400
+    assert response.get_json()['message'] == INVALID_BARCODE_MESSAGE
+
+
+def test_failed_bulk_chunk_is_retried_row_by_row(client, dataset, monkeypatch):
+    import api.bulk_ingest
+    from db_models.models import db, Chemical
+    # Skip the up-front barcode check, so the duplicate reaches the INSERT
+    monkeypatch.setattr(api.bulk_ingest, 'existing_barcodes', lambda barcodes: set())
+    duplicate, room_id = dataset.barcodes[0]
+    rows = [
+        {'barcode': barcode, 'name': 'Route Base', 'cas_number': '1310-73-2', 'room_id': room_id, 'amount': 2, 'unit': 'kg'}
+        for barcode in ('RB00000001', duplicate, 'RB00000002')
+    ]
+    results = client.post('/chemicals/bulk', json=rows).get_json()['results']
+
+    assert [result['success'] for result in results] == [True, False, True]
+    assert results[1]['message'].startswith(SERVER_ERROR_MESSAGE) and results[1]['message'] != SERVER_ERROR_MESSAGE
+    with dataset.app.app_context():
+        stored = db.session.query(Chemical.barcode).filter(Chemical.barcode.in_(['RB00000001', 'RB00000002'])).count()
+        in_room = db.session.query(Chemical).filter_by(room_id=room_id).count()
+    assert stored == 2
+    summary = client.get('/inventory/summary', query_string={'group_by': 'room', 'room_id': room_id}).get_json()
+    assert summary['totals']['chemical_count'] == in_room
+
+
+def test_scoped_search_takes_the_principal_only_from_the_token(client, dataset):
+    owner = dataset.rooms[0]['pi_id']
+    other = next(room['pi_id'] for room in dataset.rooms if room['pi_id'] != owner)
+    body = {'scope': 'pi', 'pi_id': owner, 'query': dataset.search_terms[0]}
+    assert client.post('/search-chemical', json=body).status_code == 401
+    assert client.post('/search-chemical', json=dict(body, user_id=1)).status_code == 401
+
+    def search_as(pi_id):
+        headers = {'Authorization': f"Bearer {dataset.access_token('pi', pi_id)}"}
+        return client.post('/search-chemical', json=body, headers=headers)
+    assert search_as(owner).status_code == 200
+    assert search_as(other).status_code == 403
+
+
+def test_audit_rejects_a_body_that_is_not_an_object(client, dataset):
+    for body in ([dataset.rooms[0]['id'], 'B0001'], 'B0001', 7):
+        response = client.post('/scan/audit', json=body)
+        assert response.status_code == 400, body
+        assert response.get_json()['success'] is False
+
+
+def test_audit_lists_unscanned_chemicals_like_the_room_listing(client, dataset):
+    room_id, barcodes = next(iter(dataset.room_barcodes().items()))
+    listing = client.get(f'/chemicals/room/{room_id}', query_string={'stream': 'true'}).get_json()
+    audit = client.post('/scan/audit', json={'room_id': room_id, 'barcodes': barcodes[:1]}).get_json()
+    assert audit['not_scanned'] == [chemical for chemical in listing if chemical['barcode'] != barcodes[0]]
+
+
+def test_scan_cache_drops_chemicals_the_jobs_worker_deleted(client, dataset, monkeypatch):
+    from api.jobs import run_job
+    from api.scan_cache import barcode_cache
+    from db_models.jobs import enqueue
+    from db_models.models import db, Chemical
+
+    monkeypatch.setattr(barcode_cache, 'check_seconds', 0)
+    room_id = dataset.rooms[0]['id']
+    add_chemical(client, 'RJOBDEL01', room_id)
+
+    def scan():
+        return client.post('/scan/check_chemical', json={'barcode': 'RJOBDEL01', 'selected_room_id': room_id})
+    assert scan().status_code == 200  # now cached in this (web) process
+
+    # The worker's delete only reaches this process through the shared counter
+    with dataset.app.app_context():
+        params = {'ids': [Chemical.query.filter_by(barcode='RJOBDEL01').one().id]}
+        run_job(enqueue(db.session, 'delete-chemicals', params).id, 'delete-chemicals', params)
+    assert scan().status_code == 404
+
+
+def test_a_write_clears_other_processes_scan_caches(client, dataset):
+    from api.scan_cache import BarcodeCache, LocalCacheBackend
+    from db_models.models import db, Chemical
+
+    room_id = dataset.rooms[0]['id']
+    add_chemical(client, 'RXPROC01', room_id)
+    # Two processes' local caches; `writer` belongs to the process that makes the writes
+    writer, other = BarcodeCache(LocalCacheBackend(), check_seconds=0), BarcodeCache(LocalCacheBackend(), check_seconds=0)
+    with dataset.app.app_context():
+        for cache in (writer, other):
+            assert cache.lookup('RXPROC01')['chemical_info']['amount'] == 1
+
+        chemical = Chemical.query.filter_by(barcode='RXPROC01').one()
+        chemical.amount = 3
+        db.session.commit()
+        writer.invalidate('RXPROC01')
+        assert other.lookup('RXPROC01')['chemical_info']['amount'] == 3
+
+        db.session.delete(Chemical.query.filter_by(barcode='RXPROC01').one())
+        db.session.commit()
+        writer.invalidate('RXPROC01')
+        assert other.lookup('RXPROC01') is None
+
+
+def test_job_list_rejects_a_limit_below_one(client):
+    for limit in (0, -1):
+        response = client.get('/jobs', query_string={'limit': limit})
+        assert response.status_code == 400, limit
+        assert response.get_json()['success'] is False
+    assert client.get('/jobs', query_string={'limit': 1}).status_code == 200